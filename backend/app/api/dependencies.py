@@ -1,7 +1,7 @@
 from typing import Annotated
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from app.models.user import User
+from app.services.principal_cache import Principal
 from app.services.user_service import UserService
 from app.core.config import settings
 from app.db.base import SessionDep
@@ -11,7 +11,7 @@ from jwt import InvalidTokenError, ExpiredSignatureError
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login", scheme_name="JWT")
 
-def get_current_user(db_session: SessionDep, token: Annotated[str, Depends(oauth2_scheme)]) -> User:
+async def get_current_user(db_session: SessionDep, token: Annotated[str, Depends(oauth2_scheme)]) -> Principal:
   """Dependency to get the currenet user from the token."""
   credentials_exception = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -25,7 +25,7 @@ def get_current_user(db_session: SessionDep, token: Annotated[str, Depends(oauth
     user_id: str = payload.get("user_id")
     
     user_service = UserService(db_session)
-    user = user_service.get_user_or_404(user_id)
+    user = await user_service.get_principal(user_id)
 
     return user
     
@@ -42,4 +42,4 @@ def get_current_user(db_session: SessionDep, token: Annotated[str, Depends(oauth
   except ValueError as e:
     raise e
   
-CurrentUserDep = Annotated[User, Depends(get_current_user)]
\ No newline at end of file
+CurrentUserDep = Annotated[Principal, Depends(get_current_user)]
\ No newline at end of file
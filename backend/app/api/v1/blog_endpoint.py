@@ -1,13 +1,17 @@
-from fastapi import HTTPException, status, Request 
+from fastapi import HTTPException, Query, status, Request
 from fastapi.routing import APIRouter
 
 from app.api.dependencies import CurrentUserDep
+from app.core.compression import precompressed_response
+from app.core.http_cache import is_not_modified, not_modified
 from app.core.limiter import limiter
+from app.core.responses import ModelResponse
 from app.services.blog_service import BlogServiceDep
+from app.services.count_service import CountMode
 from app.services.comment_service import CommentServiceDep 
-from app.schemas.blog_schema import BlogCreate, BlogResponse, BlogUpdate
+from app.schemas.blog_schema import BlogCreate, BlogResponse, BlogSearchHit, BlogUpdate
 from app.schemas.comment_schema import CommentCreate, CommentResponse
-from app.schemas.shared_schema import PaginatedResponse
+from app.schemas.shared_schema import LikeStatus, PaginatedResponse, ResourceId
 
 router = APIRouter(
   prefix="/blogs",
@@ -15,7 +19,7 @@ router = APIRouter(
 
 @router.post("/", response_model=BlogResponse, status_code=201)
 @limiter.limit("100/hour")
-def create_blog(
+async def create_blog(
   request: Request,
   blog_data: BlogCreate,
   blog_service: BlogServiceDep,
@@ -23,8 +27,8 @@ def create_blog(
 ):
   """Create a new blog post."""
   try:
-    blog = blog_service.create_blog(blog_data, str(current_user.id))
-    return BlogResponse.model_validate(blog)
+    blog = await blog_service.create_blog(blog_data, str(current_user.id))
+    return ModelResponse(BlogResponse.model_validate(blog), status_code=201)
   except HTTPException as http_exc:
     raise http_exc
   except Exception as e:
@@ -32,39 +36,100 @@ def create_blog(
 
 @router.get("/", response_model=PaginatedResponse[BlogResponse])
 @limiter.limit("1000/hour")
-def get_blogs(
+async def get_blogs(
   request: Request,
   blog_service: BlogServiceDep,
   limit: int = 5,
   offset: int = 0,
+  cursor: str | None = None,
 ):
   """Get all blogs"""
   try:
-    blogs, total = blog_service.get_blogs(limit, offset)
+    page = await blog_service.get_blogs(limit, offset, cursor, count_mode=CountMode.ESTIMATED)
 
-    return PaginatedResponse[BlogResponse](
-      items=blogs,
-      total=total,
+    return ModelResponse(PaginatedResponse[BlogResponse](
+      items=page.items,
+      total=page.total,
+      total_is_exact=page.total_is_exact,
       limit=limit,
-      offset=offset
-    )
+      offset=offset,
+      cursor=cursor,
+      next_cursor=page.next_cursor,
+      prev_cursor=page.prev_cursor,
+    ))
   except HTTPException as http_exc:
     raise http_exc
   except Exception as e:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
+@router.get("/trending", response_model=PaginatedResponse[BlogResponse])
+@limiter.limit("1000/hour")
+async def get_trending_blogs(
+  request: Request,
+  blog_service: BlogServiceDep,
+  limit: int = Query(5, ge=1, le=50),
+  offset: int = Query(0, ge=0),
+):
+  """Get blogs ranked by recent likes, comments and views."""
+  try:
+    page = await blog_service.get_trending_blogs(limit, offset)
+
+    return ModelResponse(PaginatedResponse[BlogResponse](
+      items=page.items,
+      total=page.total,
+      limit=limit,
+      offset=offset,
+    ))
+  except HTTPException as http_exc:
+    raise http_exc
+  except Exception as e:
+    print(f"Error getting trending blogs: {e}")
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/search", response_model=PaginatedResponse[BlogSearchHit])
+@limiter.limit("1000/hour")
+async def search_blogs(
+  request: Request,
+  blog_service: BlogServiceDep,
+  q: str = Query(min_length=1),
+  limit: int = 5,
+  offset: int = 0,
+):
+  """Search blogs by title and content."""
+  try:
+    page = await blog_service.search_blogs(q, limit, offset)
+
+    return ModelResponse(PaginatedResponse[BlogSearchHit](
+      items=page.items,
+      total=page.total,
+      total_is_exact=page.total_is_exact,
+      limit=limit,
+      offset=offset,
+    ))
+  except HTTPException as http_exc:
+    raise http_exc
+  except Exception as e:
+    print(f"Error searching blogs: {e}")
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
 @router.get("/{blog_id}", response_model=BlogResponse, status_code=200)
 @limiter.limit("1000/hour")
-def get_blog_by_id(
-  blog_id: str, 
+async def get_blog_by_id(
+  blog_id: ResourceId, 
   request: Request,
   blog_service: BlogServiceDep
 ):
   """Get a blog by its ID."""
   try:
-    blog = blog_service.get_blog_or_404(blog_id)
-    
-    return BlogResponse.model_validate(blog)
+    body, validator = await blog_service.get_blog_response(blog_id)
+    if is_not_modified(request, validator):
+      return not_modified(validator)
+
+    # Revalidations are not views, only a delivered body counts
+    await blog_service.record_view(blog_id)
+
+    # Already serialized, skip response_model validation
+    return precompressed_response(request, body, headers=validator.headers)
   except HTTPException as http_exc:
     raise http_exc
   except Exception as e:
@@ -72,8 +137,8 @@ def get_blog_by_id(
       
 @router.put("/{blog_id}", response_model=BlogResponse, status_code=200)
 @limiter.limit("1000/hour")
-def update_blog(
-  blog_id: str,
+async def update_blog(
+  blog_id: ResourceId,
   request: Request,
   blog_data: BlogUpdate,
   blog_service: BlogServiceDep,
@@ -81,8 +146,8 @@ def update_blog(
 ):
   """Update a blog post."""
   try:
-    blog = blog_service.update_blog(blog_id, blog_data, str(current_user.id))
-    return BlogResponse.model_validate(blog)
+    blog = await blog_service.update_blog(blog_id, blog_data, str(current_user.id))
+    return ModelResponse(BlogResponse.model_validate(blog))
   except HTTPException as http_exc:
     raise http_exc
   except Exception as e:
@@ -90,15 +155,15 @@ def update_blog(
 
 @router.delete("/{blog_id}", status_code=200)
 @limiter.limit("1000/hour")
-def delete_blog(
-  blog_id: str,
+async def delete_blog(
+  blog_id: ResourceId,
   request: Request,
   blog_service: BlogServiceDep,
   current_user: CurrentUserDep,
 ):
   """Delete a blog post."""
   try:
-    blog_service.delete_blog(blog_id, str(current_user.id))
+    await blog_service.delete_blog(blog_id, str(current_user.id))
     return {"detail": "Blog deleted successfully"}
   except HTTPException as http_exc:
     raise http_exc
@@ -107,8 +172,8 @@ def delete_blog(
 
 @router.post("/{blog_id}/comments", response_model=CommentResponse, status_code=201)
 @limiter.limit("1000/hour")
-def create_comment(
-  blog_id: str,
+async def create_comment(
+  blog_id: ResourceId,
   request: Request,
   comment_data: CommentCreate,
   comment_service: CommentServiceDep,
@@ -116,9 +181,9 @@ def create_comment(
 ):
   """Create a new comment on a blog post."""
   try:
-    comment = comment_service.create_comment(data=comment_data)
+    comment = await comment_service.create_comment(data=comment_data, author=current_user)
 
-    return CommentResponse.model_validate(comment)
+    return ModelResponse(CommentResponse.model_validate(comment), status_code=201)
   except HTTPException as http_exc:
     raise http_exc
   except Exception as e:
@@ -126,41 +191,80 @@ def create_comment(
 
 @router.get("/{blog_id}/comments", response_model=PaginatedResponse[CommentResponse], status_code=200)
 @limiter.limit("1000/hour")
-def get_comments(
-  blog_id: str,
+async def get_comments(
+  blog_id: ResourceId,
   request: Request,
   comment_service: CommentServiceDep,
   limit: int = 5,
   offset: int = 0,
+  cursor: str | None = None,
 ):
   """Get all comments for a blog post."""
   try:
-    comments, total = comment_service.get_blog_comments(blog_id, limit, offset)
+    page = await comment_service.get_blog_comments(blog_id, limit, offset, cursor, count_mode=CountMode.CACHED)
     
-    return PaginatedResponse[CommentResponse](
-      items=comments,
-      total=total,
+    return ModelResponse(PaginatedResponse[CommentResponse](
+      items=page.items,
+      total=page.total,
+      total_is_exact=page.total_is_exact,
       limit=limit,
-      offset=offset
-    )
+      offset=offset,
+      cursor=cursor,
+      next_cursor=page.next_cursor,
+      prev_cursor=page.prev_cursor,
+    ))
   except HTTPException as http_exc:
     raise http_exc
   except Exception as e:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-@router.put("/{blog_id}/toggle-like", response_model=BlogResponse, status_code=200)
+@router.put("/{blog_id}/toggle-like", response_model=LikeStatus, status_code=200)
 @limiter.limit("1000/hour")
-def toggle_like_blog(
-  blog_id: str,
+async def toggle_like_blog(
+  blog_id: ResourceId,
   request: Request,
   blog_service: BlogServiceDep,
   current_user: CurrentUserDep
 ):
   """Toggle like status for a blog post."""
   try:
-    blog = blog_service.toggle_blog_like(blog_id, current_user)
-    return BlogResponse.model_validate(blog)
+    like_status = await blog_service.toggle_blog_like(blog_id, current_user)
+    return ModelResponse(like_status)
+  except HTTPException as http_exc:
+    raise http_exc
+  except Exception as e:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.put("/{blog_id}/like", response_model=LikeStatus, status_code=200)
+@limiter.limit("1000/hour")
+async def like_blog(
+  blog_id: ResourceId,
+  request: Request,
+  blog_service: BlogServiceDep,
+  current_user: CurrentUserDep
+):
+  """Like a blog post, liking it again is a no-op."""
+  try:
+    like_status = await blog_service.set_blog_like(blog_id, current_user, liked=True)
+    return ModelResponse(like_status)
   except HTTPException as http_exc:
     raise http_exc
   except Exception as e:
-    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
\ No newline at end of file
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.delete("/{blog_id}/like", response_model=LikeStatus, status_code=200)
+@limiter.limit("1000/hour")
+async def unlike_blog(
+  blog_id: ResourceId,
+  request: Request,
+  blog_service: BlogServiceDep,
+  current_user: CurrentUserDep
+):
+  """Remove a like from a blog post, unliking it again is a no-op."""
+  try:
+    like_status = await blog_service.set_blog_like(blog_id, current_user, liked=False)
+    return ModelResponse(like_status)
+  except HTTPException as http_exc:
+    raise http_exc
+  except Exception as e:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
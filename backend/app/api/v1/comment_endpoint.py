@@ -1,53 +1,86 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
 
 from app.api.dependencies import CurrentUserDep
-from app.schemas.comment_schema import CommentUpdate, CommentResponse
-from app.schemas.shared_schema import PaginatedResponse
+from app.core.http_cache import is_not_modified, not_modified
+from app.core.responses import ModelResponse
+from app.schemas.comment_schema import CommentUpdate, CommentResponse, CommentThread
+from app.schemas.shared_schema import LikeStatus, PaginatedResponse, ResourceId
 from app.services.comment_service import CommentServiceDep 
+from app.services.count_service import CountMode
 
 router = APIRouter(prefix="/comments")
 
 @router.get("/", response_model=PaginatedResponse[CommentResponse])
-def get_comments(
+async def get_comments(
   comment_service: CommentServiceDep,
   limit: int = 10,
   offset: int = 0,
+  cursor: str | None = None,
 ):
   """Get a list of comments."""
   try:
-    comments, total = comment_service.get_comments(limit=limit, offset=offset)
+    page = await comment_service.get_comments(limit=limit, offset=offset, cursor=cursor, count_mode=CountMode.ESTIMATED)
     
-    return PaginatedResponse[CommentResponse](
-      items=comments,
-      total=total,
+    return ModelResponse(PaginatedResponse[CommentResponse](
+      items=page.items,
+      total=page.total,
+      total_is_exact=page.total_is_exact,
       limit=limit,
       offset=offset,
-    )
+      cursor=cursor,
+      next_cursor=page.next_cursor,
+      prev_cursor=page.prev_cursor,
+    ))
+  except HTTPException as http_exc:
+    raise http_exc
   except Exception as e:
     print(f"Error fetching comments: {e}")
     raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/{comment_id}", response_model=CommentResponse, status_code=200)
-def get_comment(comment_id: str, comment_service: CommentServiceDep):
+async def get_comment(comment_id: ResourceId, request: Request, comment_service: CommentServiceDep):
   """Get a comment by its ID."""
   try:
-    comment = comment_service.get_comment_or_404(comment_id)
-    return CommentResponse.model_validate(comment)
+    validator = await comment_service.get_comment_validator(comment_id)
+    if is_not_modified(request, validator):
+      return not_modified(validator)
+
+    comment = await comment_service.get_comment_or_404(comment_id, with_relations=True)
+    return ModelResponse(CommentResponse.model_validate(comment), headers=validator.headers)
+  except HTTPException as http_exc:
+    raise http_exc
   except Exception as e:
     print(f"Error fetching comment: {e}")
     raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+@router.get("/{comment_id}/thread", response_model=CommentThread, status_code=200)
+async def get_comment_thread(
+  comment_id: ResourceId,
+  comment_service: CommentServiceDep,
+  depth: int | None = Query(None, ge=1),
+  per_level: int = Query(10, ge=1, le=100),
+):
+  """Get a comment with its nested replies."""
+  try:
+    comment = await comment_service.get_comment_thread(comment_id, max_depth=depth, per_level=per_level)
+    return ModelResponse(CommentThread.model_validate(comment))
+  except HTTPException as http_exc:
+    raise http_exc
+  except Exception as e:
+    print(f"Error fetching comment thread: {e}")
+    raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
 @router.put("/{comment_id}", response_model=CommentResponse, status_code=200)
-def update_comment(
-  comment_id: str,
+async def update_comment(
+  comment_id: ResourceId,
   comment_data: CommentUpdate,
   comment_service: CommentServiceDep,
   current_user: CurrentUserDep,
 ):
   """Update a comment."""
   try:
-    comment = comment_service.update_comment(comment_id, comment_data, str(current_user.id))
-    return CommentResponse.model_validate(comment)
+    comment = await comment_service.update_comment(comment_id, comment_data, str(current_user.id))
+    return ModelResponse(CommentResponse.model_validate(comment))
   except HTTPException as http_exc:
     raise http_exc
   except Exception as e:
@@ -55,36 +88,41 @@ def update_comment(
     raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/{comment_id}/replies", response_model=PaginatedResponse[CommentResponse], status_code=200)
-def get_comment_replies(
-  comment_id: str, 
+async def get_comment_replies(
+  comment_id: ResourceId, 
   comment_service: CommentServiceDep, 
   limit: int = 10, 
-  offset: int = 0
+  offset: int = 0,
+  cursor: str | None = None,
 ):
   """Get replies for a specific comment."""
   try:
-    replies, total = comment_service.get_comment_replies(comment_id, limit=limit, offset=offset)
+    page = await comment_service.get_comment_replies(comment_id, limit=limit, offset=offset, cursor=cursor)
 
-    return PaginatedResponse[CommentResponse](
-      items=replies,
-      total=total,
+    return ModelResponse(PaginatedResponse[CommentResponse](
+      items=page.items,
+      total=page.total,
+      total_is_exact=page.total_is_exact,
       limit=limit,
       offset=offset,
-    )
+      cursor=cursor,
+      next_cursor=page.next_cursor,
+      prev_cursor=page.prev_cursor,
+    ))
   except HTTPException as http_exc:
     raise http_exc
   except Exception as e:
     raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.delete("/{comment_id}", status_code=200)
-def delete_comment(
-  comment_id: str,
+async def delete_comment(
+  comment_id: ResourceId,
   comment_service: CommentServiceDep,
   current_user: CurrentUserDep,
 ):
   """Delete a comment."""
   try:
-    comment_service.delete_comment(comment_id, str(current_user.id))
+    await comment_service.delete_comment(comment_id, str(current_user.id))
     return {"detail": "Comment deleted successfully"}
   except HTTPException as http_exc:
     raise http_exc
@@ -92,18 +130,50 @@ def delete_comment(
     print(f"Error deleting comment: {e}")
     raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
-@router.put("/{comment_id}/toggle-like", response_model=CommentResponse, status_code=200)
-def toggle_like_comment(
-  comment_id: str,
+@router.put("/{comment_id}/toggle-like", response_model=LikeStatus, status_code=200)
+async def toggle_like_comment(
+  comment_id: ResourceId,
   comment_service: CommentServiceDep,
   current_user: CurrentUserDep,
 ):
   """Toggle the status for a comment."""
   try:
-    comment = comment_service.toggle_comment_like(comment_id, current_user)
-    return CommentResponse.model_validate(comment)
+    like_status = await comment_service.toggle_comment_like(comment_id, current_user)
+    return ModelResponse(like_status)
   except HTTPException as http_exc:
     raise http_exc
   except Exception as e:
     print(f"Error toggling like status: {e}")
-    raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
\ No newline at end of file
+    raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.put("/{comment_id}/like", response_model=LikeStatus, status_code=200)
+async def like_comment(
+  comment_id: ResourceId,
+  comment_service: CommentServiceDep,
+  current_user: CurrentUserDep,
+):
+  """Like a comment, liking it again is a no-op."""
+  try:
+    like_status = await comment_service.set_comment_like(comment_id, current_user, liked=True)
+    return ModelResponse(like_status)
+  except HTTPException as http_exc:
+    raise http_exc
+  except Exception as e:
+    print(f"Error liking comment: {e}")
+    raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.delete("/{comment_id}/like", response_model=LikeStatus, status_code=200)
+async def unlike_comment(
+  comment_id: ResourceId,
+  comment_service: CommentServiceDep,
+  current_user: CurrentUserDep,
+):
+  """Remove a like from a comment, unliking it again is a no-op."""
+  try:
+    like_status = await comment_service.set_comment_like(comment_id, current_user, liked=False)
+    return ModelResponse(like_status)
+  except HTTPException as http_exc:
+    raise http_exc
+  except Exception as e:
+    print(f"Error unliking comment: {e}")
+    raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
@@ -0,0 +1,19 @@
+from fastapi.routing import APIRouter
+
+from app.core.container import container
+from app.db.base import engine
+from app.db.pool_stats import pool_stats
+
+router = APIRouter(
+  prefix="/metrics",
+)
+
+@router.get("/db-pool", status_code=200)
+async def get_db_pool_stats():
+  """Connection pool occupancy and checkout timings for this worker process."""
+  return pool_stats.snapshot(engine)
+
+@router.get("/password-hashing", status_code=200)
+async def get_password_hashing_stats():
+  """bcrypt queue depth and per-route queue wait and hashing times for this worker process."""
+  return container.password_hasher.snapshot()
@@ -1,81 +1,103 @@
-from fastapi import HTTPException, status, UploadFile, File
+from fastapi import HTTPException, status, UploadFile, File, Request
 from fastapi.routing import APIRouter
 
 from app.api.dependencies import CurrentUserDep 
+from app.core.http_cache import is_not_modified, not_modified
+from app.core.limiter import limiter
+from app.core.responses import ModelResponse
 from app.schemas.blog_schema import BlogResponse
-from app.schemas.shared_schema import PaginatedResponse
-from app.schemas.user_schema import  UserResponse, UserUpdate, UserSimple
+from app.schemas.shared_schema import PaginatedResponse, ResourceId
+from app.schemas.user_schema import  AvatarAccepted, UserResponse, UserUpdate, UserSimple
 from app.services.user_service import UserServiceDep 
+from app.services.count_service import CountMode
 
 router = APIRouter(
   prefix="/users",
 )
 
 @router.post("/me", response_model=UserSimple, status_code=201)
-def current_user(user: CurrentUserDep):
+async def current_user(user: CurrentUserDep):
   """Get the current user."""
   try:
-    return UserSimple.model_validate(user)
+    return ModelResponse(UserSimple.model_validate(user), status_code=201)
   except Exception as e:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.get("/{user_id}", response_model=UserResponse, status_code=200)
-def get_user_by_id(user_id: str, user_service: UserServiceDep):
+async def get_user_by_id(user_id: ResourceId, request: Request, user_service: UserServiceDep):
   """Get user by ID."""
   try:
-    user = user_service.get_user_or_404(user_id, with_blogs=True)
+    validator = await user_service.get_user_validator(user_id)
+    if is_not_modified(request, validator):
+      return not_modified(validator)
+
+    user = await user_service.get_user_or_404(user_id, with_blogs=True)
     
-    return UserResponse.model_validate(user)
+    return ModelResponse(UserResponse.model_validate(user), headers=validator.headers)
+  except HTTPException as http_exc:
+    raise http_exc
   except Exception as e:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.get("/{user_id}/blogs", response_model=PaginatedResponse[BlogResponse], status_code=200)
-def get_user_blogs(
-  user_id: str,
+async def get_user_blogs(
+  user_id: ResourceId,
   user_service: UserServiceDep,
   limit: int = 5,
-  offset: int = 0
+  offset: int = 0,
+  cursor: str | None = None,
 ):
   """Get all blogs by a specific user."""
   try:
-    blogs, total = user_service.get_user_blogs(user_id, limit, offset)
+    page = await user_service.get_user_blogs(user_id, limit, offset, cursor, count_mode=CountMode.CACHED)
     
-    return PaginatedResponse[BlogResponse](
-      items=[BlogResponse.model_validate(blog) for blog in blogs],
-      total=total,
+    return ModelResponse(PaginatedResponse[BlogResponse](
+      items=[BlogResponse.model_validate(blog) for blog in page.items],
+      total=page.total,
+      total_is_exact=page.total_is_exact,
       limit=limit,
-      offset=offset
-    )
+      offset=offset,
+      cursor=cursor,
+      next_cursor=page.next_cursor,
+      prev_cursor=page.prev_cursor,
+    ))
+  except HTTPException as http_exc:
+    raise http_exc
   except Exception as e:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.put("/{user_id}/update", response_model=UserResponse, status_code=200)
-def update_user(
+async def update_user(
   user_service: UserServiceDep,
   user_data: UserUpdate,
-  user_id: str,
+  user_id: ResourceId,
   current_user: CurrentUserDep
 ):
   """Update user information."""
   try:
-    updated_user = user_service.update_user(current_user, user_id, user_data)
-    return UserResponse.model_validate(updated_user)
+    updated_user = await user_service.update_user(current_user, user_id, user_data)
+    return ModelResponse(UserResponse.model_validate(updated_user))
   except HTTPException as http_exc:
     raise http_exc
   except Exception as e:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-@router.put("/{user_id}/avatar", response_model=UserResponse, status_code=200)
-def update_user_avatar(
+@router.put("/{user_id}/avatar", response_model=AvatarAccepted, status_code=202)
+@limiter.limit("1000/hour", cost=50, refund_client_errors=True)
+async def update_user_avatar(
+  request: Request,
   user_service: UserServiceDep,
-  user_id: str,
+  user_id: ResourceId,
   current_user: CurrentUserDep,
   profile_img: UploadFile = File(...)
 ):
-  """Update user avatar."""
+  """Upload a new avatar, it replaces the current one once resized in the background."""
   try:
-    updated_user = user_service.update_user_avatar(current_user, user_id, profile_img)
-    return UserResponse.model_validate(updated_user)
+    avatar_url = await user_service.update_user_avatar(current_user, user_id, profile_img)
+    return ModelResponse(
+      AvatarAccepted(detail="Avatar accepted for processing", profile_img=avatar_url),
+      status_code=202,
+    )
   except HTTPException as http_exc:
     raise http_exc
   except Exception as e:
@@ -0,0 +1,83 @@
+"""
+Compare the per-item cost of serializing BlogResponse and CommentResponse pages.
+
+"response_model" is what a route did before: the endpoint builds the model,
+then FastAPI dumps, validates and encodes it again through response_model.
+"ModelResponse" builds the model once and renders it in one pass.
+
+Usage: python -m app.commands.bench_serialization [iterations]
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+import asyncio
+import sys
+import time
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.responses import ModelResponse
+from app.schemas.blog_schema import BlogResponse
+from app.schemas.comment_schema import CommentResponse
+from app.schemas.shared_schema import PaginatedResponse
+
+PAGE_SIZE = 10
+LIKERS = 5
+REPEATS = 5
+
+def fake_user():
+  now = datetime.now(timezone.utc)
+  return SimpleNamespace(
+    id=uuid4(), email="user@example.com", first_name="First", last_name="Last",
+    profile_img="/static/avatars/avatar.webp", created_at=now, updated_at=now,
+  )
+
+def fake_blog():
+  now, author = datetime.now(timezone.utc), fake_user()
+  return SimpleNamespace(
+    id=uuid4(), title="A blog title", content="lorem ipsum " * 100, author_id=author.id,
+    created_at=now, updated_at=now, like_count=LIKERS, comment_count=3,
+    author=author, liked_by=[fake_user() for _ in range(LIKERS)],
+  )
+
+def fake_comment():
+  now, author = datetime.now(timezone.utc), fake_user()
+  return SimpleNamespace(
+    id=uuid4(), content="a comment " * 10, author_id=author.id, blog_id=uuid4(), parent_id=None,
+    created_at=now, updated_at=now, reply_count=2, like_count=LIKERS,
+    author=author, liked_by=[fake_user() for _ in range(LIKERS)],
+  )
+
+def build_page(model, rows):
+  return PaginatedResponse[model](items=rows, total=100, limit=PAGE_SIZE, offset=0, next_cursor="next")
+
+async def render_response_model(field, model, rows) -> bytes:
+  return await serialize_response(field=field, response_content=build_page(model, rows), dump_json=True)
+
+def render_model_response(model, rows) -> bytes:
+  return ModelResponse(build_page(model, rows)).body
+
+async def bench(iterations: int):
+  for model, factory in ((BlogResponse, fake_blog), (CommentResponse, fake_comment)):
+    rows = [factory() for _ in range(PAGE_SIZE)]
+    field = create_model_field(name="Response", type_=PaginatedResponse[model], mode="serialization")
+    assert (await render_response_model(field, model, rows)) == render_model_response(model, rows)
+
+    # Best of a few runs, to keep scheduler noise out of the comparison
+    before, after = float("inf"), float("inf")
+    for _ in range(REPEATS):
+      start = time.perf_counter()
+      for _ in range(iterations):
+        await render_response_model(field, model, rows)
+      before = min(before, (time.perf_counter() - start) / (iterations * PAGE_SIZE) * 1_000_000)
+
+      start = time.perf_counter()
+      for _ in range(iterations):
+        render_model_response(model, rows)
+      after = min(after, (time.perf_counter() - start) / (iterations * PAGE_SIZE) * 1_000_000)
+
+    print(f"{model.__name__}: response_model {before:.1f} µs/item, ModelResponse {after:.1f} µs/item")
+
+if __name__ == "__main__":
+  asyncio.run(bench(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,56 @@
+"""
+Measure what building the per-request service graph costs.
+
+Builds the services a create-comment request needs (the current user lookup
+plus CommentService and the collaborators it touches) and reports the
+average construction time and the memory allocated per request.
+
+Usage: python -m app.commands.bench_service_graph [iterations]
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from app.db.base import SessionLocal
+from app.services.comment_service import CommentService
+from app.services.user_service import UserService
+import app.models
+
+def build_request_graph(db_session):
+  """Construct and touch the collaborators used by a create-comment request."""
+  user_service = UserService(db_session)
+  user_service.user_repository
+
+  comment_service = CommentService(db_session)
+  comment_service.comment_repository
+  comment_service.blog_repository
+  comment_service.count_service
+  comment_service.blog_service
+  comment_service.user_service.user_repository
+
+  return user_service, comment_service
+
+async def bench(iterations: int) -> tuple[float, float]:
+  """Return the mean construction time (µs) and allocated bytes per request."""
+  async with SessionLocal() as db_session:
+    # Warm up process-wide singletons and import-time caches
+    build_request_graph(db_session)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+      build_request_graph(db_session)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    graphs = [build_request_graph(db_session) for _ in range(100)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+  return elapsed / iterations * 1_000_000, (after - before) / len(graphs)
+
+if __name__ == "__main__":
+  iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+  micros, allocated = asyncio.run(bench(iterations))
+  print(f"{iterations} requests: {micros:.1f} µs and {allocated / 1024:.1f} KiB allocated per request graph")
@@ -0,0 +1,107 @@
+"""
+Compare reading the trending page from the Redis index with computing it by
+a SQL aggregate over recent likes and comments, on a seeded SQLite database.
+
+Both rank the same blogs: the index is rebuilt from the seeded data first,
+and the benchmark checks that both top pages match before timing them.
+The index lives under its own key in the configured Redis.
+
+Usage: python -m app.commands.bench_trending [blogs] [likes] [comments] [iterations]
+"""
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+from app.db.base import Base
+from app.models.blog import Blog, blog_likes
+from app.models.comment import Comment
+from app.models.user import User
+from app.repositories.blog_repository import BlogRepository
+from app.services.trending import TrendingIndex
+import app.models
+
+PAGE_SIZE = 10
+USERS = 1000
+WINDOW = timedelta(days=3)
+
+def seed_rows(blogs: int, likes: int, comments: int):
+  """Users, blogs, likes and comments spread over the last WINDOW, with a few hot blogs."""
+  now = datetime.now(timezone.utc)
+  at = lambda: now - WINDOW * random.random()
+  # Skewed towards the first blogs, like real traffic
+  pick = lambda ids: ids[min(int(random.paretovariate(1.2)) - 1, len(ids) - 1)]
+
+  users = [{"id": uuid.uuid4(), "email": f"user{i}@example.com", "first_name": "First", "last_name": "Last",
+            "hashed_password": "x", "created_at": now, "updated_at": now} for i in range(USERS)]
+  blog_rows = [{"id": uuid.uuid4(), "title": f"Blog {i}", "content": "lorem ipsum", "author_id": random.choice(users)["id"],
+                "created_at": now - WINDOW, "updated_at": now} for i in range(blogs)]
+  blog_ids = [row["id"] for row in blog_rows]
+
+  like_rows = {}
+  while len(like_rows) < likes:
+    key = (random.choice(users)["id"], pick(blog_ids))
+    like_rows[key] = {"user_id": key[0], "blog_id": key[1], "created_at": at()}
+
+  comment_rows = []
+  for _ in range(comments):
+    comment_id = uuid.uuid4()
+    comment_rows.append({"id": comment_id, "blog_id": pick(blog_ids), "author_id": random.choice(users)["id"],
+                         "content": "a comment", "path": f"{comment_id.hex}/", "depth": 0,
+                         "created_at": at().replace(tzinfo=None), "updated_at": now.replace(tzinfo=None)})
+
+  return users, blog_rows, list(like_rows.values()), comment_rows
+
+async def bench(blogs: int, likes: int, comments: int, iterations: int):
+  with tempfile.TemporaryDirectory() as directory:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}")
+    async with engine.begin() as connection:
+      await connection.run_sync(Base.metadata.create_all)
+      users, blog_rows, like_rows, comment_rows = seed_rows(blogs, likes, comments)
+      for model, rows in ((User, users), (Blog, blog_rows), (blog_likes, like_rows), (Comment, comment_rows)):
+        await connection.execute(insert(model), rows)
+
+    index = TrendingIndex(key="bench:trending:blogs")
+    async with async_sessionmaker(engine)() as db_session:
+      start = time.perf_counter()
+      ranked = await index.rebuild(db_session)
+      rebuild = time.perf_counter() - start
+
+      repository = BlogRepository(db_session)
+      stmt = repository.query_trending_scores(
+        datetime.now(timezone.utc) - WINDOW,
+        index.half_life,
+        like_weight=index.weights["like"],
+        comment_weight=index.weights["comment"],
+      ).limit(PAGE_SIZE)
+
+      sql_page = [str(blog_id) for blog_id, _ in (await db_session.execute(stmt)).all()]
+      redis_page, _ = await index.top(PAGE_SIZE)
+      assert sql_page == redis_page, (sql_page, redis_page)
+
+      start = time.perf_counter()
+      for _ in range(iterations):
+        (await db_session.execute(stmt)).all()
+      sql = (time.perf_counter() - start) / iterations * 1000
+
+      start = time.perf_counter()
+      for _ in range(iterations):
+        await index.top(PAGE_SIZE)
+      redis = (time.perf_counter() - start) / iterations * 1000
+
+    await index.redis_service.redis.delete(index.key, f"{index.key}:decayed_at")
+    await engine.dispose()
+
+  print(f"Seeded {blogs} blogs, {likes} likes, {comments} comments; rebuilt {ranked} scores in {rebuild * 1000:.0f} ms")
+  print(f"Top {PAGE_SIZE}: SQL aggregate {sql:.2f} ms/request, Redis index {redis:.3f} ms/request ({sql / redis:.0f}x)")
+
+if __name__ == "__main__":
+  args = [int(arg) for arg in sys.argv[1:]]
+  defaults = [2000, 100_000, 20_000, 20]
+  asyncio.run(bench(*(args + defaults[len(args):])))
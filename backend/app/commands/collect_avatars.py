@@ -0,0 +1,17 @@
+"""
+Delete avatar versions no user points at any more.
+
+Usage: python -m app.commands.collect_avatars
+"""
+import asyncio
+
+from app.services.avatar_collector import avatar_collector
+import app.models
+
+async def collect_avatars() -> int:
+  """Run one collection pass now, whether or not a worker ran one recently."""
+  return await avatar_collector.collect(force=True)
+
+if __name__ == "__main__":
+  removed = asyncio.run(collect_avatars())
+  print(f"Deleted {removed} unused avatar files")
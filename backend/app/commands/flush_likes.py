@@ -0,0 +1,14 @@
+"""
+Write every like buffered in Redis to the database, including intents left
+behind by a crashed flush. Run it after turning LIKE_WRITE_BEHIND off.
+
+Usage: python -m app.commands.flush_likes
+"""
+import asyncio
+
+from app.services.like_buffer import like_buffer
+import app.models
+
+if __name__ == "__main__":
+  targets = asyncio.run(like_buffer.drain())
+  print(f"Flushed buffered likes for {targets} blogs and comments")
@@ -0,0 +1,19 @@
+"""
+Recompute the trending index from the likes and comments in the database.
+
+Usage: python -m app.commands.rebuild_trending
+"""
+import asyncio
+
+from app.db.base import SessionLocal
+from app.services.trending import trending
+import app.models
+
+async def rebuild_trending() -> int:
+  """Rebuild the trending sorted set in one pass over recent activity."""
+  async with SessionLocal() as db_session:
+    return await trending.rebuild(db_session)
+
+if __name__ == "__main__":
+  ranked = asyncio.run(rebuild_trending())
+  print(f"Rebuilt the trending index with {ranked} blogs")
@@ -0,0 +1,27 @@
+"""
+Recompute the denormalized like/comment/reply counters from the source tables.
+
+Usage: python -m app.commands.reconcile_counters
+"""
+import asyncio
+
+from app.db.base import SessionLocal
+from app.repositories.blog_repository import BlogRepository
+from app.repositories.comment_repository import CommentRepository
+import app.models
+
+async def reconcile_counters() -> tuple[int, int]:
+  """Recount every blog and comment in one transaction."""
+  async with SessionLocal() as db_session:
+    try:
+      blogs = await BlogRepository(db_session).recount_counters()
+      comments = await CommentRepository(db_session).recount_counters()
+      await db_session.commit()
+      return blogs, comments
+    except Exception:
+      await db_session.rollback()
+      raise
+
+if __name__ == "__main__":
+  blogs, comments = asyncio.run(reconcile_counters())
+  print(f"Reconciled counters for {blogs} blogs and {comments} comments")
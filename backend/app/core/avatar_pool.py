@@ -0,0 +1,57 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import HTTPException, status
+from typing import Awaitable, Callable
+import asyncio
+
+class AvatarPool:
+  """
+  Renders avatars on a small process pool, off the request path.
+
+  Decoding and resizing images is CPU bound and holds the GIL, so it gets
+  its own processes instead of the threadpool shared by the rest of the API.
+  Uploads are accepted once queued. At most `queue_size` wait or render at
+  a time, anything beyond is rejected with 503 instead of piling up.
+  """
+  def __init__(self, max_workers: int, queue_size: int):
+    self.max_workers = max_workers
+    self.queue_size = queue_size
+    self.executor: ProcessPoolExecutor | None = None
+    # Strong references, the event loop only keeps weak ones to tasks
+    self.pending: set[asyncio.Task] = set()
+
+  def submit(self, fn, *args, on_done: Callable[[], Awaitable]):
+    """Run `fn(*args)` on a worker process, then await `on_done()` back on the event loop."""
+    if len(self.pending) >= self.queue_size:
+      raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Avatar processing is busy, please retry shortly",
+        headers={"Retry-After": "5"},
+      )
+
+    task = asyncio.create_task(self._run(fn, args, on_done))
+    self.pending.add(task)
+    task.add_done_callback(self.pending.discard)
+
+  async def _run(self, fn, args: tuple, on_done: Callable[[], Awaitable]):
+    try:
+      # Workers are only started once the first avatar comes in
+      if self.executor is None:
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+      await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+      await on_done()
+    except BrokenProcessPool as e:
+      # A worker died, start a fresh pool for the next avatar
+      print(f"Error processing avatar: {e}")
+      self.executor = None
+    except Exception as e:
+      print(f"Error processing avatar: {e}")
+
+  async def stop(self):
+    """Finish the avatars already accepted and stop the workers."""
+    if self.pending:
+      await asyncio.gather(*self.pending, return_exceptions=True)
+    if self.executor is not None:
+      self.executor.shutdown()
+      self.executor = None
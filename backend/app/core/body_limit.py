@@ -0,0 +1,53 @@
+from fastapi import HTTPException, status
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import re
+
+class BodySizeLimitMiddleware:
+  """
+  Rejects request bodies over a per-route byte limit with 413.
+
+  `limits` maps path patterns to their limit. A declared Content-Length over
+  the limit is refused before anything is read. Otherwise the body is counted
+  as it streams in and reading stops as soon as it goes over.
+  """
+  def __init__(self, app: ASGIApp, limits: dict[re.Pattern, int]):
+    self.app = app
+    self.limits = limits
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send):
+    limit = self._limit(scope) if scope["type"] == "http" else None
+    if limit is None:
+      await self.app(scope, receive, send)
+      return
+
+    content_length = Headers(scope=scope).get("content-length", "")
+    if content_length.isdigit() and int(content_length) > limit:
+      response = JSONResponse({"detail": self._detail(limit)}, status_code=status.HTTP_413_CONTENT_TOO_LARGE)
+      await response(scope, receive, send)
+      return
+
+    received = 0
+
+    async def limited_receive() -> Message:
+      nonlocal received
+      message = await receive()
+      if message["type"] == "http.request":
+        received += len(message.get("body", b""))
+        if received > limit:
+          # Raised inside the body parsing, so the app answers it like any HTTPException
+          raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=self._detail(limit))
+      return message
+
+    await self.app(scope, limited_receive, send)
+
+  def _limit(self, scope: Scope) -> int | None:
+    for pattern, limit in self.limits.items():
+      if pattern.match(scope["path"]):
+        return limit
+    return None
+
+  @staticmethod
+  def _detail(limit: int) -> str:
+    return f"Request body is larger than {limit} bytes"
@@ -0,0 +1,172 @@
+from fastapi import Request, Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import gzip
+import zlib
+
+try:
+  import brotli
+except ImportError:
+  # Optional, gzip is always available
+  brotli = None
+
+from app.core.config import settings
+
+GZIP_MAGIC = b"\x1f\x8b"
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+def skip_compression(request: Request):
+  """Route dependency that opts a response out of compression."""
+  request.scope["compression"] = False
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+  """Content codings the client accepts, ignoring those sent with q=0."""
+  accepted = set()
+  for item in accept_encoding.lower().split(","):
+    coding, _, params = item.strip().partition(";")
+    q = params.strip().removeprefix("q=")
+    try:
+      if params and float(q) == 0:
+        continue
+    except ValueError:
+      continue
+    accepted.add(coding.strip())
+  return accepted
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+  """Pick the best coding we can produce, brotli first when it is installed."""
+  accepted = accepted_encodings(accept_encoding)
+  if brotli and ("br" in accepted or "*" in accepted):
+    return "br"
+  if "gzip" in accepted or "*" in accepted:
+    return "gzip"
+  return None
+
+def precompress(body: bytes) -> bytes:
+  """Gzip a body for storage when it is worth it, small bodies stay as they are."""
+  if len(body) < settings.COMPRESSION_MINIMUM_SIZE:
+    return body
+  return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL)
+
+def precompressed_response(request: Request, body: bytes, headers: dict | None = None, media_type: str = "application/json") -> Response:
+  """Send a body produced by `precompress` as is when the client accepts gzip."""
+  headers = dict(headers or {})
+  if not body.startswith(GZIP_MAGIC):
+    return Response(content=body, media_type=media_type, headers=headers)
+
+  headers["Vary"] = "Accept-Encoding"
+  if "gzip" not in accepted_encodings(request.headers.get("accept-encoding", "")):
+    return Response(content=gzip.decompress(body), media_type=media_type, headers=headers)
+
+  headers["Content-Encoding"] = "gzip"
+  if "ETag" in headers:
+    headers["ETag"] = _weaken(headers["ETag"])
+
+  # Already encoded, the compression middleware leaves it alone
+  return Response(content=body, media_type=media_type, headers=headers)
+
+class CompressionMiddleware:
+  """
+  Negotiated gzip/brotli compression of response bodies.
+
+  Responses smaller than `minimum_size`, responses that are already encoded,
+  non-text content types and routes using `skip_compression` are sent as is.
+  """
+  def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+    self.app = app
+    self.minimum_size = minimum_size
+    self.gzip_level = gzip_level
+    self.brotli_quality = brotli_quality
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send):
+    if scope["type"] != "http":
+      await self.app(scope, receive, send)
+      return
+
+    encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+    if encoding is None:
+      await self.app(scope, receive, send)
+      return
+
+    responder = _CompressionResponder(self, scope, encoding, send)
+    await self.app(scope, receive, responder.send)
+
+  def compressor(self, encoding: str):
+    if encoding == "br":
+      return brotli.Compressor(quality=self.brotli_quality)
+    return zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+class _CompressionResponder:
+  def __init__(self, middleware: CompressionMiddleware, scope: Scope, encoding: str, send: Send):
+    self.middleware = middleware
+    self.scope = scope
+    self.encoding = encoding
+    self._send = send
+    self.start_message: Message | None = None
+    self.compressor = None
+    self.passthrough = False
+
+  async def send(self, message: Message):
+    if message["type"] == "http.response.start":
+      # Headers can still change until the first body chunk is known
+      self.start_message = message
+      return
+
+    if message["type"] != "http.response.body" or self.passthrough:
+      await self._send(message)
+      return
+
+    body = message.get("body", b"")
+    more_body = message.get("more_body", False)
+
+    if self.start_message is not None:
+      start, self.start_message = self.start_message, None
+      headers = MutableHeaders(raw=start["headers"])
+      if not self._should_compress(headers, body, more_body):
+        self.passthrough = True
+        await self._send(start)
+        await self._send(message)
+        return
+
+      self.compressor = self.middleware.compressor(self.encoding)
+      headers["Content-Encoding"] = self.encoding
+      headers.add_vary_header("Accept-Encoding")
+      if "etag" in headers:
+        headers["ETag"] = _weaken(headers["etag"])
+
+      if more_body:
+        del headers["Content-Length"]
+      else:
+        body = self._compress(body, final=True)
+        headers["Content-Length"] = str(len(body))
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": body})
+        return
+
+      await self._send(start)
+
+    await self._send({
+      "type": "http.response.body",
+      "body": self._compress(body, final=not more_body),
+      "more_body": more_body,
+    })
+
+  def _should_compress(self, headers: MutableHeaders, body: bytes, more_body: bool) -> bool:
+    if self.scope.get("compression") is False or "content-encoding" in headers:
+      return False
+    if not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+      return False
+    # Streamed bodies have an unknown size, compress them
+    return more_body or len(body) >= self.middleware.minimum_size
+
+  def _compress(self, body: bytes, final: bool) -> bytes:
+    if self.encoding == "br":
+      chunk = self.compressor.process(body)
+      return chunk + self.compressor.finish() if final else chunk + self.compressor.flush()
+
+    chunk = self.compressor.compress(body)
+    return chunk + self.compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+def _weaken(etag: str) -> str:
+  # The encoded bytes differ from the identity representation the ETag was computed for
+  return etag if etag.startswith("W/") else f"W/{etag}"
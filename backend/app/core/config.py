@@ -4,10 +4,61 @@ from datetime import timedelta
 class Settings(BaseSettings):
   APP_NAME: str = "Blogsite API"
   DATABASE_URL: str = "sqlite:///./test.db"
+  ASYNC_DATABASE_URL: str | None = None
+  DB_POOL_SIZE: int = 5
+  DB_MAX_OVERFLOW: int = 10
+  DB_POOL_TIMEOUT: float = 30
+  DB_POOL_RECYCLE: int = 1800
+  DB_POOL_PRE_PING: bool = True
+  METRICS_ENABLED: bool = False
+  SERVER_TIMING_ENABLED: bool = True
+  SERVER_TIMING_LOG_MS: float | None = 500
+  COMPRESSION_MINIMUM_SIZE: int = 1024
+  COMPRESSION_GZIP_LEVEL: int = 6
+  REDIS_URL: str = "redis://redis:6379/0"
+  REDIS_MAX_CONNECTIONS: int = 50
+  REDIS_SOCKET_TIMEOUT: float | None = 5
   SECRET_KEY: str
   JWT_ALGORITHM: str = "HS256"
   JWT_ACCESS_TOKEN_EX: timedelta = timedelta(minutes=15)
   JWT_REFRESH_TOKEN_EX: timedelta = timedelta(days=7)
+  COUNT_CACHE_TTL: timedelta = timedelta(minutes=5)
+  COUNT_ESTIMATE_THRESHOLD: int = 10000
+  BLOG_CACHE_TTL: timedelta = timedelta(minutes=10)
+  TIMELINE_SIZE: int = 500
+  TIMELINE_TTL: timedelta = timedelta(days=1)
+  LIKE_WRITE_BEHIND: bool = False
+  LIKE_FLUSH_INTERVAL: float = 2
+  LIKE_FLUSH_BATCH_SIZE: int = 500
+  LIKE_COUNT_TTL: timedelta = timedelta(days=1)
+  TRENDING_HALF_LIFE: timedelta = timedelta(hours=12)
+  TRENDING_DECAY_INTERVAL: float = 300
+  TRENDING_MAX_SIZE: int = 10000
+  TRENDING_MIN_SCORE: float = 0.01
+  TRENDING_LIKE_WEIGHT: float = 1
+  TRENDING_COMMENT_WEIGHT: float = 3
+  TRENDING_VIEW_WEIGHT: float = 0.1
+  RATE_LIMIT_ENABLED: bool = True
+  # Share of a quota a client may spend at once. 1.0 lets the whole "100/hour"
+  # go in a burst like the fixed windows before GCRA, after which it refills
+  # one token per period/limit. Routes can set their own with `burst=`.
+  RATE_LIMIT_BURST_RATIO: float = 1.0
+  RATE_LIMIT_BATCH: int = 10
+  RATE_LIMIT_MAX_KEYS: int = 10000
+  RATE_LIMIT_REDIS_TIMEOUT: float = 0.05
+  RATE_LIMIT_FALLBACK_PERIOD: float = 5
+  PRINCIPAL_CACHE_SIZE: int = 10000
+  PRINCIPAL_CACHE_TTL: timedelta = timedelta(seconds=60)
+  PRINCIPAL_CACHE_REDIS: bool = False
+  PASSWORD_HASH_WORKERS: int = 2
+  PASSWORD_HASH_QUEUE_TIMEOUT: float = 5
+  AVATAR_SIZES: tuple[int, ...] = (32, 64, 256)
+  AVATAR_WORKERS: int = 2
+  AVATAR_QUEUE_SIZE: int = 16
+  AVATAR_MAX_BYTES: int = 5 * 1024 * 1024
+  AVATAR_MAX_PIXELS: int = 40_000_000
+  AVATAR_GC_INTERVAL: float = 3600
+  AVATAR_GC_GRACE: timedelta = timedelta(days=1)
 
   model_config = SettingsConfigDict(
     env_file=".env",
@@ -0,0 +1,62 @@
+from datetime import timedelta
+from functools import cached_property
+from typing import NamedTuple
+from passlib.context import CryptContext
+
+from app.core.avatar_pool import AvatarPool
+from app.core.config import settings
+from app.core.hashing import PasswordHasher
+from app.services.file_service import FileService
+from app.services.redis_service import RedisService
+
+class JWTSettings(NamedTuple):
+  secret_key: str
+  algorithm: str
+  access_token_ex: timedelta
+  refresh_token_ex: timedelta
+
+class Container:
+  """
+  Stateless collaborators shared by every request in the process.
+
+  Each one is built on first use. Anything bound to a database session
+  (repositories, services) is still built per request.
+  """
+  @cached_property
+  def pwd_context(self) -> CryptContext:
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+  @cached_property
+  def password_hasher(self) -> PasswordHasher:
+    return PasswordHasher(
+      self.pwd_context,
+      max_workers=settings.PASSWORD_HASH_WORKERS,
+      queue_timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT,
+    )
+
+  @cached_property
+  def redis_service(self) -> RedisService:
+    # Wraps the process-wide connection pool
+    return RedisService()
+
+  @cached_property
+  def file_service(self) -> FileService:
+    return FileService()
+
+  @cached_property
+  def avatar_pool(self) -> AvatarPool:
+    return AvatarPool(
+      max_workers=settings.AVATAR_WORKERS,
+      queue_size=settings.AVATAR_QUEUE_SIZE,
+    )
+
+  @cached_property
+  def jwt(self) -> JWTSettings:
+    return JWTSettings(
+      secret_key=settings.SECRET_KEY,
+      algorithm=settings.JWT_ALGORITHM,
+      access_token_ex=settings.JWT_ACCESS_TOKEN_EX,
+      refresh_token_ex=settings.JWT_REFRESH_TOKEN_EX,
+    )
+
+container = Container()
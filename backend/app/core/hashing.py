@@ -0,0 +1,96 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from threading import Lock
+import asyncio
+import time
+
+from app.core.metrics import Histogram
+
+class RouteHashStats:
+  """Queue wait and hashing time for one route."""
+  def __init__(self):
+    self.queue_wait = Histogram()
+    self.hash_time = Histogram()
+    self.timeouts = 0
+
+  def snapshot(self) -> dict:
+    return {
+      "timeouts": self.timeouts,
+      "queue_wait_ms": self.queue_wait.snapshot(),
+      "hash_ms": self.hash_time.snapshot(),
+    }
+
+class PasswordHasher:
+  """
+  Runs bcrypt on its own bounded thread pool.
+
+  bcrypt releases the GIL while hashing, so a few dedicated threads keep
+  auth bursts off the event loop and off the threadpool shared by the rest
+  of the API. Calls that cannot start within `queue_timeout` seconds are
+  rejected with 503 instead of piling up.
+  """
+  def __init__(self, pwd_context: CryptContext, max_workers: int, queue_timeout: float):
+    self.pwd_context = pwd_context
+    self.max_workers = max_workers
+    self.queue_timeout = queue_timeout
+    self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+    self.stats: defaultdict[str, RouteHashStats] = defaultdict(RouteHashStats)
+    self.queued = 0
+    self.running = 0
+    self._lock = Lock()
+
+  async def hash(self, password: str, route: str) -> str:
+    """Hash a password."""
+    return await self._submit(route, self.pwd_context.hash, password)
+
+  async def verify(self, password: str, hashed_password: str, route: str) -> bool:
+    """Check a password against its hash."""
+    return await self._submit(route, self.pwd_context.verify, password, hashed_password)
+
+  def snapshot(self) -> dict:
+    """Current queue depth plus per-route timings."""
+    return {
+      "max_workers": self.max_workers,
+      "queue_timeout_s": self.queue_timeout,
+      "queued": self.queued,
+      "running": self.running,
+      "routes": {route: stats.snapshot() for route, stats in list(self.stats.items())},
+    }
+
+  async def _submit(self, route: str, fn, *args):
+    stats = self.stats[route]
+    with self._lock:
+      self.queued += 1
+
+    future = self.executor.submit(self._run, stats, time.perf_counter(), fn, *args)
+    result = asyncio.wrap_future(future)
+
+    # Only time spent waiting for a worker counts against the timeout
+    await asyncio.wait([result], timeout=self.queue_timeout)
+    if not result.done() and future.cancel():
+      with self._lock:
+        self.queued -= 1
+      stats.timeouts += 1
+      raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, please retry shortly",
+        headers={"Retry-After": "1"},
+      )
+
+    return await result
+
+  def _run(self, stats: RouteHashStats, queued_at: float, fn, *args):
+    started_at = time.perf_counter()
+    stats.queue_wait.observe((started_at - queued_at) * 1000)
+    with self._lock:
+      self.queued -= 1
+      self.running += 1
+
+    try:
+      return fn(*args)
+    finally:
+      stats.hash_time.observe((time.perf_counter() - started_at) * 1000)
+      with self._lock:
+        self.running -= 1
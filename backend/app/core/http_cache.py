@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response, status
+from typing import NamedTuple
+import hashlib
+
+class Validator(NamedTuple):
+  """Strong ETag and Last-Modified of a representation."""
+  etag: str
+  last_modified: datetime
+
+  @property
+  def headers(self) -> dict:
+    return {
+      "ETag": self.etag,
+      "Last-Modified": format_datetime(self.last_modified, usegmt=True),
+      # Let clients keep the body but revalidate before reusing it
+      "Cache-Control": "no-cache",
+    }
+
+def make_validator(*parts, timestamps: list[datetime | None]) -> Validator:
+  """Build a validator from the values a representation depends on."""
+  digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+  last_modified = max(_as_utc(t) for t in timestamps if t is not None)
+  return Validator(f'"{digest}"', last_modified.replace(microsecond=0))
+
+def is_not_modified(request: Request, validator: Validator) -> bool:
+  """Evaluate If-None-Match, or If-Modified-Since when no ETag was sent."""
+  if_none_match = request.headers.get("if-none-match")
+  if if_none_match is not None:
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or validator.etag in tags
+
+  if_modified_since = request.headers.get("if-modified-since")
+  if if_modified_since:
+    try:
+      return validator.last_modified <= _as_utc(parsedate_to_datetime(if_modified_since))
+    except (TypeError, ValueError):
+      return False
+
+  return False
+
+def not_modified(validator: Validator) -> Response:
+  """An empty 304 carrying the current validators."""
+  return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator.headers)
+
+def _as_utc(value: datetime) -> datetime:
+  # SQLite hands back naive datetimes, and they are stored as UTC
+  return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
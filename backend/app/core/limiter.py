@@ -1,8 +1,230 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-
-limiter = Limiter(
-  key_func=get_remote_address,
-  strategy="fixed-window",
-  storage_uri="redis://redis:6379"
-)
\ No newline at end of file
+from collections import OrderedDict
+from fastapi import HTTPException, Request, status
+from typing import NamedTuple
+import asyncio
+import functools
+import inspect
+import math
+import re
+import time
+
+from app.core.config import settings
+from app.core.container import container
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+class Quota(NamedTuple):
+  """`limit` tokens per `period` seconds, of which up to `burst` can be spent at once."""
+  limit: int
+  period: float
+  burst: int
+
+  @property
+  def interval(self) -> float:
+    """Seconds it takes to earn one token back."""
+    return self.period / self.limit
+
+def parse_rate(rate: str) -> tuple[int, float]:
+  """Parse "100/hour" or "10/5 minutes" into a limit and a period in seconds."""
+  match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)?\s*(second|minute|hour|day)s?\s*", rate)
+  if match is None:
+    raise ValueError(f"Invalid rate limit {rate!r}")
+  limit, multiplier, unit = match.groups()
+  return int(limit), int(multiplier or 1) * PERIODS[unit]
+
+def gcra(tat: float, now: float, quota: Quota, cost: int, want: int) -> tuple[int, float, float]:
+  """
+  Generic cell rate algorithm.
+
+  Grants as many tokens up to `want` as the quota allows right now, but at
+  least `cost`. Returns the tokens granted (0 when refused), the new
+  theoretical arrival time and, when refused, the seconds until `cost`
+  tokens are available.
+  """
+  start = max(tat, now)
+  available = math.floor((now + quota.burst * quota.interval - start) / quota.interval + 1e-9)
+  if available < cost:
+    return 0, tat, start + (cost - quota.burst) * quota.interval - now
+
+  granted = min(want, available)
+  return granted, start + granted * quota.interval, 0.0
+
+def get_remote_address(request: Request) -> str:
+  """The client's address, the default rate limiting key."""
+  return request.client.host if request.client else "127.0.0.1"
+
+class RateLimiter:
+  """
+  GCRA rate limiting shared across workers through Redis, with a local token bucket in front.
+
+  Each route and client has a theoretical arrival time in Redis, so quotas
+  refill smoothly instead of resetting at window boundaries. Workers reserve
+  `batch` tokens at a time and spend them locally, so most requests skip
+  Redis. Reserved tokens are already charged, spending them later never lets
+  a client past its quota. Quota held by one worker is just not available
+  to another.
+
+  When Redis fails or takes longer than `redis_timeout`, every worker limits
+  on its own for `fallback_period` seconds.
+  """
+  def __init__(
+    self,
+    key_func=get_remote_address,
+    burst_ratio: float = 1.0,
+    batch: int = 10,
+    max_keys: int = 10000,
+    redis_timeout: float = 0.05,
+    fallback_period: float = 5,
+    enabled: bool = True,
+  ):
+    self.key_func = key_func
+    self.burst_ratio = burst_ratio
+    self.batch = batch
+    self.max_keys = max_keys
+    self.redis_timeout = redis_timeout
+    self.fallback_period = fallback_period
+    self.enabled = enabled
+    # Tokens reserved from Redis, when refused clients may try again, and arrival times while limiting locally
+    self._tokens: OrderedDict[str, int] = OrderedDict()
+    self._refused_until: OrderedDict[str, float] = OrderedDict()
+    self._local_tats: OrderedDict[str, float] = OrderedDict()
+    self._fallback_until = 0.0
+
+  def limit(
+    self,
+    rate: str,
+    cost: int = 1,
+    scope: str | None = None,
+    burst: int | None = None,
+    refund_client_errors: bool = False,
+  ):
+    """
+    Limit a route to `rate` per client, each call spending `cost` tokens.
+
+    Up to `burst` tokens can be spent at once, by default `burst_ratio` of
+    the limit. Routes share a quota when they share a `scope`, by default
+    every route has its own. With `refund_client_errors` a call the endpoint
+    rejects with a 4xx gets its tokens back. The endpoint needs a
+    `request: Request` parameter.
+    """
+    limit, period = parse_rate(rate)
+    if burst is None:
+      burst = math.ceil(limit * self.burst_ratio)
+    quota = Quota(limit, period, burst=max(cost, burst))
+
+    def decorator(endpoint):
+      request_param = next(
+        (name for name, param in inspect.signature(endpoint).parameters.items() if param.annotation is Request),
+        None,
+      )
+      if request_param is None:
+        raise TypeError(f"{endpoint.__name__} needs a `request: Request` parameter to be rate limited")
+
+      name = scope or f"{endpoint.__module__}.{endpoint.__name__}"
+
+      @functools.wraps(endpoint)
+      async def wrapper(*args, **kwargs):
+        request = kwargs[request_param]
+        key = f"ratelimit:{name}:{self.key_func(request)}"
+        await self.hit(key, quota, cost, rate)
+        try:
+          return await endpoint(*args, **kwargs)
+        except HTTPException as http_exc:
+          if refund_client_errors and 400 <= http_exc.status_code < 500:
+            self.refund(key, cost)
+          raise http_exc
+
+      return wrapper
+
+    return decorator
+
+  async def hit(self, key: str, quota: Quota, cost: int, rate: str):
+    """Spend `cost` tokens from a client's quota or raise 429."""
+    if not self.enabled:
+      return
+
+    tokens = self._tokens.get(key, 0)
+    if tokens >= cost:
+      self._remember(self._tokens, key, tokens - cost)
+      return
+
+    # Refused clients are turned away here until their quota refills
+    retry_after = self._refused_until.get(key, 0) - time.time()
+    if retry_after > 0:
+      self._reject(rate, retry_after)
+
+    if time.monotonic() < self._fallback_until:
+      granted, retry_after = self._reserve_locally(key, quota, cost)
+    else:
+      try:
+        granted, retry_after = await asyncio.wait_for(
+          self._reserve(key, quota, cost, max(cost, self.batch)),
+          timeout=self.redis_timeout,
+        )
+      except Exception as e:
+        print(f"Error reserving rate limit tokens, limiting locally for {self.fallback_period}s: {e!r}")
+        self._fallback_until = time.monotonic() + self.fallback_period
+        granted, retry_after = self._reserve_locally(key, quota, cost)
+
+    if not granted:
+      self._remember(self._refused_until, key, time.time() + retry_after)
+      self._reject(rate, retry_after)
+
+    # Whatever was reserved beyond this request serves the next ones
+    self._remember(self._tokens, key, tokens + granted - cost)
+
+  def refund(self, key: str, cost: int):
+    """
+    Give a client back `cost` tokens it spent.
+
+    They go to this worker's local tokens, already charged in Redis, so a
+    refund never lets a client past its quota.
+    """
+    if self.enabled:
+      self._remember(self._tokens, key, self._tokens.get(key, 0) + cost)
+
+  def _reject(self, rate: str, retry_after: float):
+    raise HTTPException(
+      status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+      detail=f"Rate limit exceeded: {rate}",
+      headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+  async def _reserve(self, key: str, quota: Quota, cost: int, want: int) -> tuple[int, float]:
+    """Take up to `want` tokens from the shared quota in Redis."""
+    async def apply(pipe) -> tuple[int, float]:
+      tat = await pipe.get(key)
+      now = time.time()
+      granted, new_tat, retry_after = gcra(float(tat or 0), now, quota, cost, want)
+
+      pipe.multi()
+      if granted:
+        # Once the arrival time has passed the key carries no information
+        pipe.set(key, new_tat, px=max(1, math.ceil((new_tat - now) * 1000)))
+      return granted, retry_after
+
+    return await container.redis_service.transaction(apply, key)
+
+  def _reserve_locally(self, key: str, quota: Quota, cost: int) -> tuple[int, float]:
+    """Take `cost` tokens from this worker's own quota."""
+    now = time.time()
+    granted, new_tat, retry_after = gcra(self._local_tats.get(key, 0), now, quota, cost, cost)
+    if granted:
+      self._remember(self._local_tats, key, new_tat)
+    return granted, retry_after
+
+  def _remember(self, entries: OrderedDict, key: str, value):
+    """Store a per-client value, evicting the least recently used one when full."""
+    entries[key] = value
+    entries.move_to_end(key)
+    while len(entries) > self.max_keys:
+      entries.popitem(last=False)
+
+limiter = RateLimiter(
+  burst_ratio=settings.RATE_LIMIT_BURST_RATIO,
+  batch=settings.RATE_LIMIT_BATCH,
+  max_keys=settings.RATE_LIMIT_MAX_KEYS,
+  redis_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT,
+  fallback_period=settings.RATE_LIMIT_FALLBACK_PERIOD,
+  enabled=settings.RATE_LIMIT_ENABLED,
+)
@@ -0,0 +1,40 @@
+from bisect import bisect_left
+from threading import Lock
+
+class Histogram:
+  """Fixed-bucket latency histogram in milliseconds, cheap enough for hot paths."""
+  DEFAULT_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+  def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+    self.buckets = tuple(buckets)
+    self.counts = [0] * (len(self.buckets) + 1)
+    self.count = 0
+    self.sum = 0.0
+    self.max = 0.0
+    self._lock = Lock()
+
+  def observe(self, value_ms: float):
+    """Record one observation."""
+    with self._lock:
+      self.counts[bisect_left(self.buckets, value_ms)] += 1
+      self.count += 1
+      self.sum += value_ms
+      self.max = max(self.max, value_ms)
+
+  def snapshot(self) -> dict:
+    """Cumulative bucket counts (Prometheus `le` style) plus totals."""
+    with self._lock:
+      counts, total, total_ms, max_ms = list(self.counts), self.count, self.sum, self.max
+
+    cumulative, running = {}, 0
+    for bound, count in zip([*map(str, self.buckets), "+Inf"], counts):
+      running += count
+      cumulative[bound] = running
+
+    return {
+      "count": total,
+      "sum_ms": round(total_ms, 3),
+      "avg_ms": round(total_ms / total, 3) if total else 0.0,
+      "max_ms": round(max_ms, 3),
+      "buckets": cumulative,
+    }
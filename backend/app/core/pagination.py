@@ -0,0 +1,106 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Any, List, Literal, NamedTuple
+from uuid import UUID
+import json
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, bindparam, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+class Cursor(NamedTuple):
+  """Decoded keyset position: the (created_at, id) of a boundary row."""
+  created_at: datetime
+  id: UUID
+  direction: Literal["next", "prev"] = "next"
+
+class Page(NamedTuple):
+  """A page of rows plus the cursors needed to continue from it."""
+  items: List[Any]
+  total: int | None = None
+  next_cursor: str | None = None
+  prev_cursor: str | None = None
+  total_is_exact: bool = True
+
+def encode_cursor(created_at: datetime, id: UUID, direction: Literal["next", "prev"] = "next") -> str:
+  """Encode a keyset position into an opaque, url-safe token."""
+  payload = json.dumps({"t": created_at.isoformat(), "id": str(id), "d": direction}, separators=(",", ":"))
+  return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str) -> Cursor:
+  """Decode a token produced by `encode_cursor`."""
+  try:
+    padded = token + "=" * (-len(token) % 4)
+    payload = json.loads(urlsafe_b64decode(padded.encode()))
+    direction = payload.get("d", "next")
+    if direction not in ("next", "prev"):
+      raise ValueError(direction)
+
+    return Cursor(datetime.fromisoformat(payload["t"]), UUID(payload["id"]), direction)
+  except Exception:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+async def paginate(session: AsyncSession, stmt: Select, model, limit: int, offset: int = 0, cursor: str | None = None) -> Page:
+  """
+  Fetch one page of `stmt`, newest first.
+
+  Without a cursor this is plain LIMIT/OFFSET. With a cursor it seeks on
+  (created_at, id) so the cost does not grow with the page depth. One extra
+  row is fetched to find out whether another page exists. The total is left
+  for the caller to fill in.
+  """
+  position = decode_cursor(cursor) if cursor else None
+  key, boundary = _keyset(session, model, position)
+
+  if position and position.direction == "prev":
+    stmt = (
+      stmt.where(key > boundary)
+        .order_by(model.created_at.asc(), model.id.asc())
+        .limit(limit + 1)
+    )
+    rows = (await session.scalars(stmt)).all()
+    return build_page(list(reversed(rows[:limit])), len(rows) > limit, position, offset)
+
+  stmt = stmt.order_by(model.created_at.desc(), model.id.desc())
+  if position:
+    stmt = stmt.where(key < boundary)
+  else:
+    stmt = stmt.offset(offset)
+
+  rows = (await session.scalars(stmt.limit(limit + 1))).all()
+  return build_page(list(rows[:limit]), len(rows) > limit, position, offset)
+
+def build_page(rows: List[Any], has_more: bool, position: Cursor | None = None, offset: int = 0) -> Page:
+  """
+  Wrap rows, newest first, with the cursors around them.
+
+  `has_more` says whether rows exist beyond them in the paging direction.
+  """
+  if not rows:
+    return Page(rows)
+
+  first, last = rows[0], rows[-1]
+  if position and position.direction == "prev":
+    return Page(
+      rows,
+      next_cursor=encode_cursor(last.created_at, last.id),
+      prev_cursor=encode_cursor(first.created_at, first.id, "prev") if has_more else None,
+    )
+
+  return Page(
+    rows,
+    next_cursor=encode_cursor(last.created_at, last.id) if has_more else None,
+    prev_cursor=encode_cursor(first.created_at, first.id, "prev") if (position or offset > 0) else None,
+  )
+
+def _keyset(session: AsyncSession, model, position: Cursor | None):
+  """Build the (created_at, id) row values compared when seeking."""
+  if position is None:
+    return None, None
+
+  created_at, boundary = model.created_at, bindparam("cursor_created_at", position.created_at, type_=model.created_at.type)
+  if session.get_bind().dialect.name == "sqlite":
+    # SQLite stores func.now() as text without fractional seconds, so compare normalized values
+    created_at, boundary = func.datetime(created_at), func.datetime(boundary)
+
+  return tuple_(created_at, model.id), tuple_(boundary, position.id)
@@ -0,0 +1,71 @@
+from typing import Awaitable, Callable
+import asyncio
+
+from app.services.redis_service import RedisService
+
+class PeriodicTask:
+  """
+  Runs `job` every `interval` seconds in the background, between `start` and `stop`.
+
+  `action` describes the job in error messages ("flushing buffered likes").
+  A failing run is printed and the next one goes ahead. With `run_first`
+  the first run starts right away instead of after one interval, and with
+  `run_on_stop` the job runs one last time once stopped.
+  """
+  def __init__(
+    self,
+    action: str,
+    job: Callable[[], Awaitable],
+    interval: float,
+    run_first: bool = True,
+    run_on_stop: bool = False,
+  ):
+    self.action = action
+    self.job = job
+    self.interval = interval
+    self.run_first = run_first
+    self.run_on_stop = run_on_stop
+    self._task: asyncio.Task | None = None
+
+  async def run(self):
+    """Run the job every `interval` seconds until cancelled."""
+    if not self.run_first:
+      await asyncio.sleep(self.interval)
+    while True:
+      try:
+        await self.job()
+      except Exception as e:
+        print(f"Error {self.action}: {e}")
+      await asyncio.sleep(self.interval)
+
+  def start(self):
+    """Start running the job in the background."""
+    if self._task is None:
+      self._task = asyncio.create_task(self.run())
+
+  async def stop(self):
+    """Stop the background runs, waiting for one in progress to be cancelled."""
+    if self._task is None:
+      return
+
+    self._task.cancel()
+    try:
+      await self._task
+    except asyncio.CancelledError:
+      pass
+    self._task = None
+
+    if self.run_on_stop:
+      try:
+        await self.job()
+      except Exception as e:
+        print(f"Error {self.action} on shutdown: {e}")
+
+async def claim_interval(redis_service: RedisService, key: str, interval: float) -> bool:
+  """
+  Claim a periodic job's run for this interval, False when another worker already has.
+
+  The lock is left to expire rather than released, so at most one run
+  happens per interval across workers.
+  """
+  return bool(await redis_service.redis.set(key, 1, nx=True, ex=max(1, int(interval))))
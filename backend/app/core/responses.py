@@ -0,0 +1,23 @@
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+import time
+
+from app.core.server_timing import record_serialize
+
+class ModelResponse(JSONResponse):
+  """
+  JSON response rendered in one pass by pydantic-core's serializer.
+
+  Returning it from an endpoint skips FastAPI's response_model round trip
+  (dump to dict, validate again, encode), so the model an endpoint built is
+  serialized exactly once. response_model is still declared for the docs.
+  """
+  def render(self, content) -> bytes:
+    started = time.perf_counter()
+    try:
+      if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content)
+      return to_json(content)
+    finally:
+      record_serialize(started)
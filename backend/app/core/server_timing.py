@@ -0,0 +1,109 @@
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import json
+import time
+
+class RequestTimings:
+  """Time spent in the database, Redis and serialization during one request."""
+  __slots__ = ("started", "db_ms", "db_count", "redis_ms", "redis_count", "serialize_ms")
+
+  def __init__(self):
+    self.started = time.perf_counter()
+    self.db_ms = 0.0
+    self.db_count = 0
+    self.redis_ms = 0.0
+    self.redis_count = 0
+    self.serialize_ms = 0.0
+
+  def elapsed_ms(self) -> float:
+    return (time.perf_counter() - self.started) * 1000
+
+  def header(self, total_ms: float) -> str:
+    """The Server-Timing header value."""
+    return ", ".join((
+      f'db;dur={self.db_ms:.1f};desc="{self.db_count} queries"',
+      f'redis;dur={self.redis_ms:.1f};desc="{self.redis_count} commands"',
+      f"serialize;dur={self.serialize_ms:.1f}",
+      f"total;dur={total_ms:.1f}",
+    ))
+
+# Set for the duration of a request, tasks started by it share the same counters
+current_timings: ContextVar[RequestTimings | None] = ContextVar("current_timings", default=None)
+
+def record_redis(started: float, commands: int = 1):
+  """Count Redis commands sent in one round trip that started at `started` (perf_counter)."""
+  timings = current_timings.get()
+  if timings is not None:
+    timings.redis_ms += (time.perf_counter() - started) * 1000
+    timings.redis_count += commands
+
+def record_serialize(started: float):
+  """Count time spent rendering a response body since `started` (perf_counter)."""
+  timings = current_timings.get()
+  if timings is not None:
+    timings.serialize_ms += (time.perf_counter() - started) * 1000
+
+def instrument_engine(engine: AsyncEngine):
+  """Time every statement the engine executes against the current request."""
+  sync_engine = engine.sync_engine
+
+  @event.listens_for(sync_engine, "before_cursor_execute")
+  def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, so a failing statement leaves nothing behind
+    context._timing_started = time.perf_counter()
+
+  @event.listens_for(sync_engine, "after_cursor_execute")
+  def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = current_timings.get()
+    if timings is not None:
+      timings.db_ms += (time.perf_counter() - context._timing_started) * 1000
+      timings.db_count += 1
+
+class ServerTimingMiddleware:
+  """
+  Adds a Server-Timing header with the database, Redis, serialization and total time of each request.
+
+  Requests that take at least `log_threshold_ms` are also printed as one
+  JSON line with the same fields. None turns the log off.
+  """
+  def __init__(self, app: ASGIApp, log_threshold_ms: float | None = None):
+    self.app = app
+    self.log_threshold_ms = log_threshold_ms
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send):
+    if scope["type"] != "http":
+      await self.app(scope, receive, send)
+      return
+
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    status_code = None
+
+    async def timed_send(message: Message):
+      nonlocal status_code
+      if message["type"] == "http.response.start":
+        status_code = message["status"]
+        MutableHeaders(scope=message).append("Server-Timing", timings.header(timings.elapsed_ms()))
+      await send(message)
+
+    try:
+      await self.app(scope, receive, timed_send)
+    finally:
+      current_timings.reset(token)
+      total_ms = timings.elapsed_ms()
+      if self.log_threshold_ms is not None and total_ms >= self.log_threshold_ms:
+        print(json.dumps({
+          "event": "request",
+          "method": scope["method"],
+          "path": scope["path"],
+          "status": status_code,
+          "total_ms": round(total_ms, 1),
+          "db_ms": round(timings.db_ms, 1),
+          "db_queries": timings.db_count,
+          "redis_ms": round(timings.redis_ms, 1),
+          "redis_commands": timings.redis_count,
+          "serialize_ms": round(timings.serialize_ms, 1),
+        }))
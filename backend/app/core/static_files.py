@@ -0,0 +1,66 @@
+from os import PathLike
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+import mimetypes
+import os
+import re
+
+from app.core.compression import accepted_encodings
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Sibling suffix of each precompressed coding, best first
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+class ImmutableStaticFiles(StaticFiles):
+  """
+  StaticFiles that marks content-addressed files immutable and serves precompressed siblings.
+
+  Files whose path matches `immutable` never change at their URL, so they are
+  cached for a year without revalidation. When `<file>.br` or `<file>.gz`
+  exists and the client accepts it, that is sent instead. ETags, conditional
+  requests and ranges are handled by FileResponse as usual.
+  """
+  def __init__(self, *args, immutable: re.Pattern, **kwargs):
+    super().__init__(*args, **kwargs)
+    self.immutable = immutable
+
+  def file_response(
+    self,
+    full_path: PathLike,
+    stat_result: os.stat_result,
+    scope: Scope,
+    status_code: int = 200,
+  ) -> Response:
+    request_headers = Headers(scope=scope)
+    headers = {}
+    if self.immutable.match(self.get_path(scope).replace(os.sep, "/")):
+      headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+
+    media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+    accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+    for encoding, suffix in PRECOMPRESSED:
+      try:
+        sibling_stat = os.stat(f"{full_path}{suffix}")
+      except OSError:
+        continue
+
+      headers["Vary"] = "Accept-Encoding"
+      if encoding in accepted:
+        # Its own size and mtime give the coded sibling its own ETag
+        full_path, stat_result = f"{full_path}{suffix}", sibling_stat
+        headers["Content-Encoding"] = encoding
+        break
+
+    response = FileResponse(
+      full_path,
+      status_code=status_code,
+      stat_result=stat_result,
+      media_type=media_type,
+      headers=headers,
+    )
+    if self.is_not_modified(response.headers, request_headers):
+      return NotModifiedResponse(response.headers)
+    return response
@@ -1,19 +1,46 @@
 from typing import Annotated
 from fastapi import Depends
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from app.core.config import settings
+from app.core.server_timing import instrument_engine
+from app.db.pool_stats import InstrumentedQueuePool, instrument_pool
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Map the sync driver in DATABASE_URL (shared with alembic) to its asyncio counterpart
+ASYNC_DRIVERS = {
+  "sqlite": "sqlite+aiosqlite",
+  "postgresql": "postgresql+asyncpg",
+  "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+def get_async_database_url(url: str) -> str:
+  """Return the asyncio flavour of a database URL."""
+  scheme, sep, rest = url.partition("://")
+  return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+def get_pool_options(url: str) -> dict:
+  """Pool sizing from Settings; in-memory SQLite keeps its single static connection."""
+  if url.startswith("sqlite") and (":memory:" in url or url.endswith("://")):
+    return {}
+
+  return {
+    "poolclass": InstrumentedQueuePool,
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+  }
+
+database_url = settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+engine = create_async_engine(database_url, **get_pool_options(database_url))
+instrument_pool(engine)
+instrument_engine(engine)
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
-def get_db():
-  db = SessionLocal()
-  try:
+async def get_db():
+  async with SessionLocal() as db:
     yield db
-  finally:
-    db.close()
 
-SessionDep =  Annotated[Session, Depends(get_db)]
+SessionDep =  Annotated[AsyncSession, Depends(get_db)]
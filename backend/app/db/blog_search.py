@@ -0,0 +1,66 @@
+"""
+Full-text search DDL for blogs.
+
+The search index is not part of the ORM mapping: Postgres gets a generated
+`search_vector` tsvector column with a GIN index, SQLite gets an FTS5 table
+holding each blog's id, title and content, kept in sync by triggers. Either way the database keeps
+it up to date on insert and update.
+"""
+from sqlalchemy import DDL, Table, event
+import html
+
+SEARCH_CONFIG = "english"
+
+# Snippets come back from the database with the matches between these
+# private use characters, so the content can be escaped before they become <mark>
+MATCH_START = "\ue000"
+MATCH_END = "\ue001"
+
+POSTGRES_DDL = (
+  f"""
+  ALTER TABLE blogs ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(content, '')), 'B')
+  ) STORED
+  """,
+  "CREATE INDEX ix_blogs_search_vector ON blogs USING GIN (search_vector)",
+)
+
+SQLITE_DDL = (
+  # Keyed on the blog id, the implicit rowid of blogs can change on VACUUM
+  "CREATE VIRTUAL TABLE blogs_fts USING fts5(blog_id UNINDEXED, title, content)",
+  """
+  CREATE TRIGGER blogs_fts_ai AFTER INSERT ON blogs BEGIN
+    INSERT INTO blogs_fts(blog_id, title, content) VALUES (new.id, new.title, new.content);
+  END
+  """,
+  """
+  CREATE TRIGGER blogs_fts_ad AFTER DELETE ON blogs BEGIN
+    DELETE FROM blogs_fts WHERE blog_id = old.id;
+  END
+  """,
+  """
+  CREATE TRIGGER blogs_fts_au AFTER UPDATE OF title, content ON blogs BEGIN
+    UPDATE blogs_fts SET title = new.title, content = new.content WHERE blog_id = old.id;
+  END
+  """,
+)
+
+# Objects alembic autogenerate should leave alone
+SEARCH_COLUMNS = {("blogs", "search_vector")}
+SEARCH_TABLE_PREFIX = "blogs_fts"
+
+def highlight(snippet: str) -> str:
+  """HTML-escape a snippet of blog content and wrap its matches in <mark>."""
+  return (
+    html.escape(snippet)
+      .replace(MATCH_START, "<mark>")
+      .replace(MATCH_END, "</mark>")
+  )
+
+def register_blog_search(table: Table):
+  """Create the search index whenever metadata.create_all creates the blogs table."""
+  for statement in POSTGRES_DDL:
+    event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+  for statement in SQLITE_DDL:
+    event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
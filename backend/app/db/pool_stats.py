@@ -0,0 +1,68 @@
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+import time
+
+from app.core.metrics import Histogram
+
+class PoolStats:
+  """Per-process connection pool statistics, fed by pool events."""
+  def __init__(self):
+    self.wait = Histogram()
+    self.hold = Histogram()
+    self.connects = 0
+    self.checkouts = 0
+    self.timeouts = 0
+
+  def snapshot(self, engine: AsyncEngine) -> dict:
+    """Current pool occupancy plus the wait and hold time histograms."""
+    pool = engine.sync_engine.pool
+    occupancy = {
+      name: getattr(pool, name)()
+      for name in ("size", "checkedin", "checkedout", "overflow")
+      if hasattr(pool, name)
+    }
+
+    return {
+      "pool": type(pool).__name__,
+      **occupancy,
+      "connects": self.connects,
+      "checkouts": self.checkouts,
+      "timeouts": self.timeouts,
+      "wait_ms": self.wait.snapshot(),
+      "hold_ms": self.hold.snapshot(),
+    }
+
+pool_stats = PoolStats()
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+  """Queue pool that records how long callers wait for a connection."""
+  def _do_get(self):
+    start = time.perf_counter()
+    try:
+      return super()._do_get()
+    except PoolTimeoutError:
+      pool_stats.timeouts += 1
+      raise
+    finally:
+      pool_stats.wait.observe((time.perf_counter() - start) * 1000)
+
+def instrument_pool(engine: AsyncEngine):
+  """Count connections and time how long each checkout is held."""
+  sync_engine = engine.sync_engine
+
+  @event.listens_for(sync_engine, "connect")
+  def on_connect(dbapi_connection, connection_record):
+    pool_stats.connects += 1
+
+  @event.listens_for(sync_engine, "checkout")
+  def on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_stats.checkouts += 1
+    connection_record.info["checked_out_at"] = time.perf_counter()
+
+  @event.listens_for(sync_engine, "checkin")
+  def on_checkin(dbapi_connection, connection_record):
+    checked_out_at = connection_record.info.pop("checked_out_at", None)
+    if checked_out_at is not None:
+      pool_stats.hold.observe((time.perf_counter() - checked_out_at) * 1000)
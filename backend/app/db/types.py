@@ -0,0 +1,19 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator
+import uuid
+
+class UUID(TypeDecorator):
+  """
+  The Postgres UUID column type, also taking ids given as strings.
+
+  Ids reach the repositories as strings from path parameters, tokens and
+  payloads. Postgres casts those itself, but the generic type SQLite falls
+  back to binds through `.hex`, so strings are parsed here first.
+  """
+  impl = postgresql.UUID
+  cache_ok = True
+
+  def process_bind_param(self, value, dialect):
+    if isinstance(value, str):
+      return uuid.UUID(value)
+    return value
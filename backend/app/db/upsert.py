@@ -0,0 +1,18 @@
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import Insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Dialects that understand INSERT ... ON CONFLICT DO NOTHING
+INSERT_CONSTRUCTS = {
+  "postgresql": postgresql.insert,
+  "sqlite": sqlite.insert,
+}
+
+def insert_ignoring_conflicts(db_session: AsyncSession, table: Table) -> Insert:
+  """An INSERT into `table` that skips rows clashing with an existing key instead of failing."""
+  dialect = db_session.get_bind().dialect.name
+  if dialect not in INSERT_CONSTRUCTS:
+    raise ValueError(f"INSERT ... ON CONFLICT is not supported on {dialect}")
+
+  return INSERT_CONSTRUCTS[dialect](table).on_conflict_do_nothing()
@@ -1,22 +1,55 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
+import re
 from app.api.v1 import register_routes
-from app.core.limiter import limiter
+from app.core.body_limit import BodySizeLimitMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
+from app.core.container import container
+from app.core.server_timing import ServerTimingMiddleware
+from app.core.static_files import ImmutableStaticFiles
+from app.services.avatar_collector import avatar_collector
+from app.services.file_service import CONTENT_ADDRESSED
+from app.services.like_buffer import like_buffer
+from app.services.trending import trending
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  # Buffered likes are flushed in the background and drained on shutdown
+  if settings.LIKE_WRITE_BEHIND:
+    like_buffer.start()
+  trending.start()
+  avatar_collector.start()
+  yield
+  await avatar_collector.stop()
+  await trending.stop()
+  await like_buffer.stop()
+  await container.avatar_pool.stop()
 
 def create_app() -> FastAPI:
-  app = FastAPI(title="Blogsite API")
-  app.state.limiter = limiter
-  app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+  app = FastAPI(title="Blogsite API", lifespan=lifespan)
+  app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+  )
+  # Uploads are cut off while streaming in, the multipart framing gets some slack
+  app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={re.compile(r"^/api/v1/users/[^/]+/avatar$"): settings.AVATAR_MAX_BYTES + 64 * 1024},
+  )
+  # Outermost, so the total covers every other middleware
+  if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware, log_threshold_ms=settings.SERVER_TIMING_LOG_MS)
 
   @app.get("/")
-  def root():
+  async def root():
     return {"message": "Welcome to the Blogsite API"}
 
   register_routes(app)
   
-  app.mount("/static", StaticFiles(directory="app/static"), name="static")
+  # Avatars are content-addressed and cached for good
+  app.mount("/static", ImmutableStaticFiles(directory="app/static", immutable=CONTENT_ADDRESSED), name="static")
   return app
 
 app = create_app()
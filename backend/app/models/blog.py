@@ -1,28 +1,41 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Table, UniqueConstraint, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index, Integer, Table, UniqueConstraint, func
 from sqlalchemy.orm import relationship
 import uuid
 
 from app.db.base import Base
+from app.db.types import UUID
+from app.db.blog_search import register_blog_search
 
 blog_likes = Table(
   "blog_likes",
   Base.metadata,
   Column("user_id", UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
   Column("blog_id", UUID(as_uuid=True), ForeignKey("blogs.id", ondelete="CASCADE"), primary_key=True),
-  UniqueConstraint("user_id", "blog_id", name="unique_user_blog_like")
+  Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+  UniqueConstraint("user_id", "blog_id", name="unique_user_blog_like"),
+  Index("ix_blog_likes_created_at", "created_at"),
 )
 
 class Blog(Base):
   __tablename__ = 'blogs'
+  __table_args__ = (
+    Index('ix_blogs_created_at_id', 'created_at', 'id'),
+    Index('ix_blogs_author_id_created_at_id', 'author_id', 'created_at', 'id'),
+  )
   
   id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
   title = Column(String(255), nullable=False)
   content = Column(Text, nullable=False)
   author_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+  like_count = Column(Integer, nullable=False, default=0, server_default="0")
+  comment_count = Column(Integer, nullable=False, default=0, server_default="0")
   created_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
   updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now(), nullable=False)
+  # Bumped when likes, comments or embedded liker profiles change, updated_at only tracks edits
+  activity_at = Column(DateTime(timezone=True), nullable=True)
 
   comments = relationship("Comment", back_populates="blog", cascade="all, delete-orphan")
   author = relationship("User", back_populates="blogs", foreign_keys='Blog.author_id')
   liked_by = relationship("User", secondary=blog_likes, back_populates="liked_blogs", passive_deletes=True)
+
+register_blog_search(Blog.__table__)
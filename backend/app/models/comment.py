@@ -1,28 +1,42 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, Table, UniqueConstraint, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, ForeignKey, DateTime, Index, Integer, Table, UniqueConstraint, func
 from sqlalchemy.orm import relationship
 import uuid
 
 from app.db.base import Base
+from app.db.types import UUID
 
 comment_likes = Table(
   "comment_likes",
   Base.metadata,
   Column("user_id", UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
   Column("comment_id", UUID(as_uuid=True), ForeignKey("comments.id", ondelete="CASCADE"), primary_key=True),
+  Column("created_at", DateTime, nullable=False, server_default=func.now()),
   UniqueConstraint('user_id', 'comment_id', name='unique_user_comment_like'),
 )
 
 class Comment(Base):
   __tablename__ = 'comments'
+  __table_args__ = (
+    Index('ix_comments_parent_id_created_at_id', 'parent_id', 'created_at', 'id'),
+    Index('ix_comments_blog_id_parent_id_created_at_id', 'blog_id', 'parent_id', 'created_at', 'id'),
+    Index('ix_comments_path', 'path'),
+  )
   
   id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
   blog_id = Column(UUID(as_uuid=True), ForeignKey('blogs.id'), nullable=False)
   author_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
   parent_id = Column(UUID(as_uuid=True), ForeignKey('comments.id'), nullable=True)
+  # Materialized path: the hex ids of the ancestors and the comment itself, each followed by "/".
+  # Byte-order collation so a subtree is one contiguous index range
+  path = Column(String().with_variant(String(collation="C"), "postgresql"), nullable=False)
+  depth = Column(Integer, nullable=False, default=0, server_default="0")
   content = Column(String, nullable=False)
+  reply_count = Column(Integer, nullable=False, default=0, server_default="0")
+  like_count = Column(Integer, nullable=False, default=0, server_default="0")
   created_at = Column(DateTime, nullable=False, default=func.now())
   updated_at = Column(DateTime, nullable=False, default=func.now(), onupdate=func.now())
+  # Bumped when likes, replies or embedded liker profiles change, updated_at only tracks edits
+  activity_at = Column(DateTime, nullable=True)
 
   author = relationship('User')
   blog = relationship('Blog', back_populates='comments')
@@ -1,9 +1,9 @@
 from sqlalchemy import Column, String, DateTime, func
-from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
 
 from app.db.base import Base
+from app.db.types import UUID
 from app.models.blog import blog_likes
 
 class User(Base):
@@ -1,12 +1,35 @@
-from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime, timedelta
+from typing import NamedTuple
+import math
+import re
+from sqlalchemy import ColumnElement, Row, Select, column, delete, exists, func, literal, literal_column, select, table, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload, selectinload
 
+from app.core.pagination import Page, paginate
+from app.db.blog_search import MATCH_END, MATCH_START, SEARCH_CONFIG, highlight
+from app.db.upsert import insert_ignoring_conflicts
 from app.schemas.blog_schema import BlogCreate
-from app.models.blog import Blog
+from app.models.blog import Blog, blog_likes
+from app.models.comment import Comment
 from app.models.user import User
 
+# Relationships serialized by BlogResponse, loaded in a fixed number of queries
+# per page. Anything else raises instead of silently lazy loading per row.
+BLOG_RESPONSE_LOADERS = (
+  joinedload(Blog.author),
+  selectinload(Blog.liked_by),
+  raiseload("*"),
+)
+
+class SearchHit(NamedTuple):
+  """A blog matching a full-text search, with its rank and highlighted snippet."""
+  blog: Blog
+  rank: float
+  snippet: str
+
 class BlogRepository:
-  def __init__(self, db_session: Session):
+  def __init__(self, db_session: AsyncSession):
     self.db_session = db_session
   
   def create(self, blog: BlogCreate) -> Blog:
@@ -14,48 +37,258 @@ class BlogRepository:
     self.db_session.add(new_blog)
     return new_blog
 
-  def get_by_user(self, user_id: str, limit: int = 5, offset: int = 0) -> List[Blog]:
+  def query_by_user(self, user_id: str) -> Select:
+    """Query for all blogs by a specific user."""
+    return select(Blog).where(Blog.author_id == user_id)
+
+  async def get_by_user(
+    self,
+    user_id: str,
+    limit: int = 5,
+    offset: int = 0,
+    cursor: str | None = None,
+    loaders: tuple = BLOG_RESPONSE_LOADERS,
+  ) -> Page:
     """Retrieve all blogs by a specific user."""
-    total = self.db_session.query(Blog).filter(Blog.author_id == user_id).count()
-    blogs = (
-      self.db_session.query(Blog)
-      .filter(Blog.author_id == user_id)
-      .order_by(Blog.created_at.desc())
-      .limit(limit)
-      .offset(offset)
-      .all()
-    )
+    stmt = self.query_by_user(user_id).options(*loaders)
 
-    return blogs, total
+    return await paginate(self.db_session, stmt, Blog, limit, offset, cursor)
   
-  def get_by_id(self, blog_id: str) -> Blog:
+  async def get_by_id(self, blog_id: str, loaders: tuple = ()) -> Blog | None:
     """Retrieve a blog by its ID."""
-    return self.db_session.query(Blog).filter(Blog.id == blog_id).first()
+    stmt = select(Blog).options(*loaders).where(Blog.id == blog_id)
+    if loaders:
+      # Make sure an instance already in the session gets the planned relationships
+      stmt = stmt.execution_options(populate_existing=True)
+
+    return (await self.db_session.scalars(stmt)).first()
+
+  async def get_by_ids(self, blog_ids: list[str], loaders: tuple = BLOG_RESPONSE_LOADERS) -> list[Blog]:
+    """Retrieve several blogs in the order of `blog_ids`, skipping any that no longer exist."""
+    if not blog_ids:
+      return []
 
-  def get_all(self, limit: int = 5, offset: int = 0) -> List[Blog]:
+    stmt = select(Blog).options(*loaders).where(Blog.id.in_(blog_ids))
+    blogs = {str(blog.id): blog for blog in (await self.db_session.scalars(stmt)).all()}
+    return [blogs[str(blog_id)] for blog_id in blog_ids if str(blog_id) in blogs]
+
+  async def get_latest_ids(self, limit: int, author_id: str | None = None) -> list[Row]:
+    """The (id, created_at) of the newest blogs, optionally by one author, newest first."""
+    stmt = select(Blog.id, Blog.created_at).order_by(Blog.created_at.desc(), Blog.id.desc()).limit(limit)
+    if author_id is not None:
+      stmt = stmt.where(Blog.author_id == author_id)
+
+    return list((await self.db_session.execute(stmt)).all())
+
+  def query_all(self) -> Select:
+    """Query for all blogs."""
+    return select(Blog)
+
+  async def get_all(
+    self,
+    limit: int = 5,
+    offset: int = 0,
+    cursor: str | None = None,
+    loaders: tuple = BLOG_RESPONSE_LOADERS,
+  ) -> Page:
     """Retrieve all blogs with pagination."""
-    total = self.db_session.query(Blog).count()
-    blogs = (
-      self.db_session.query(Blog)
-      .order_by(Blog.created_at.desc())
-      .limit(limit)
-      .offset(offset)
-      .all()
-    )
-    return blogs, total
+    stmt = self.query_all().options(*loaders)
+
+    return await paginate(self.db_session, stmt, Blog, limit, offset, cursor)
   
+  def query_search(self, q: str) -> Select:
+    """Query for the blogs matching a full-text search."""
+    stmt, _, _ = self._search(q)
+    return stmt
+
+  async def search(
+    self,
+    q: str,
+    limit: int = 5,
+    offset: int = 0,
+    loaders: tuple = BLOG_RESPONSE_LOADERS,
+  ) -> Page:
+    """Retrieve the blogs matching a full-text search, best match first."""
+    stmt, rank, snippet = self._search(q)
+    stmt = (
+      stmt.add_columns(rank.label("rank"), snippet.label("snippet"))
+        .options(*loaders)
+        .order_by(rank.desc(), Blog.id)
+        .offset(offset)
+        .limit(limit)
+    )
+
+    rows = (await self.db_session.execute(stmt)).all()
+    return Page([SearchHit(blog, rank, highlight(snippet)) for blog, rank, snippet in rows])
+
+  def _search(self, q: str) -> tuple[Select, ColumnElement, ColumnElement]:
+    """The matching query plus rank (higher is better) and snippet expressions for this dialect."""
+    dialect = self.db_session.get_bind().dialect.name
+
+    if dialect == "postgresql":
+      vector = literal_column("blogs.search_vector")
+      query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+      snippet = func.ts_headline(
+        SEARCH_CONFIG, Blog.content, query,
+        f"StartSel={MATCH_START}, StopSel={MATCH_END}, MaxFragments=2, MaxWords=30, MinWords=10",
+      )
+      return select(Blog).where(vector.op("@@")(query)), func.ts_rank_cd(vector, query), snippet
+
+    if dialect == "sqlite":
+      # Quote every term and "quoted phrase" so FTS5 query syntax in user input is matched literally
+      terms = " ".join(
+        '"' + (phrase or term).replace('"', '""') + '"'
+        for phrase, term in re.findall(r'"([^"]+)"|(\S+)', q)
+      )
+      fts = table("blogs_fts", column("blog_id"))
+      stmt = (
+        select(Blog)
+          .join(fts, fts.c.blog_id == literal_column("blogs.id"))
+          .where(literal_column("blogs_fts").op("MATCH")(terms))
+      )
+      # bm25 is lower for better matches, the blog id column carries no weight
+      rank = -func.bm25(literal_column("blogs_fts"), 0.0, 10.0, 1.0)
+      snippet = func.snippet(literal_column("blogs_fts"), 2, MATCH_START, MATCH_END, "…", 24)
+      return stmt, rank, snippet
+
+    raise ValueError(f"Full-text search is not supported on {dialect}")
+
   def update(self, blog: Blog, blog_data: BlogCreate) -> Blog:
     """Update an existing blog post."""
     for key, value in blog_data.model_dump().items():
       setattr(blog, key, value)
     return blog
   
-  def delete(self, blog: Blog):
+  async def delete(self, blog: Blog):
     """Delete a blog post."""
-    self.db_session.delete(blog)
+    await self.db_session.delete(blog)
   
-  def add_blog_like(self, blog: Blog, user: User):
-    blog.liked_by.append(user)
+  def query_trending_scores(
+    self,
+    since: datetime,
+    half_life: timedelta,
+    like_weight: float,
+    comment_weight: float,
+  ) -> Select:
+    """
+    Time-decayed activity score of every blog liked or commented on since `since`, highest first.
+
+    Each like and comment adds its weight, halved for every `half_life` of its age.
+    """
+    rate = math.log(2) / half_life.total_seconds()
+
+    def decayed(created_at, weight: float) -> ColumnElement:
+      return weight * func.exp(-rate * self._age_in_seconds(created_at))
+
+    activity = union_all(
+      select(blog_likes.c.blog_id, decayed(blog_likes.c.created_at, like_weight).label("score"))
+        .where(blog_likes.c.created_at >= since),
+      # comments.created_at is a naive UTC timestamp
+      select(Comment.blog_id, decayed(Comment.created_at, comment_weight).label("score"))
+        .where(Comment.created_at >= since.replace(tzinfo=None)),
+    ).subquery()
 
-  def remove_blog_like(self, blog: Blog, user: User):
-    blog.liked_by.remove(user)
+    score = func.sum(activity.c.score).label("score")
+    return (
+      select(activity.c.blog_id, score)
+        .group_by(activity.c.blog_id)
+        .order_by(score.desc())
+    )
+
+  def _age_in_seconds(self, created_at) -> ColumnElement:
+    """Seconds elapsed since a timestamp column, in this dialect."""
+    if self.db_session.get_bind().dialect.name == "sqlite":
+      return (func.julianday("now") - func.julianday(created_at)) * 86400
+
+    return func.extract("epoch", func.now() - created_at)
+
+  async def add_like(self, blog_id: str, user_id: str) -> bool:
+    """Like a blog in one statement, False when it is already liked or does not exist."""
+    return await self.add_likes(blog_id, [user_id]) > 0
+
+  async def add_likes(self, blog_id: str, user_ids: list[str]) -> int:
+    """Like a blog on behalf of several users, returning how many likes were new."""
+    # The users are selected next to the blog id, EXISTS skips them all when the blog is gone
+    result = await self.db_session.execute(
+      insert_ignoring_conflicts(self.db_session, blog_likes).from_select(
+        ["user_id", "blog_id"],
+        select(User.id, literal(blog_id, Blog.id.type)).where(
+          User.id.in_(user_ids),
+          exists().where(Blog.id == blog_id),
+        ),
+      )
+    )
+    return result.rowcount
+
+  async def remove_like(self, blog_id: str, user_id: str) -> bool:
+    """Unlike a blog, False when it was not liked."""
+    return await self.remove_likes(blog_id, [user_id]) > 0
+
+  async def remove_likes(self, blog_id: str, user_ids: list[str]) -> int:
+    """Remove several users' likes from a blog, returning how many existed."""
+    result = await self.db_session.execute(
+      delete(blog_likes).where(blog_likes.c.blog_id == blog_id, blog_likes.c.user_id.in_(user_ids))
+    )
+    return result.rowcount
+
+  async def get_like_count(self, blog_id: str) -> int | None:
+    """The blog's like count, None when the blog does not exist."""
+    return await self.db_session.scalar(select(Blog.like_count).where(Blog.id == blog_id))
+
+  async def get_like_state(self, blog_id: str, user_id: str) -> Row | None:
+    """The blog's like count and whether the user likes it, None when the blog does not exist."""
+    liked = (
+      select(blog_likes.c.user_id)
+        .where(blog_likes.c.blog_id == Blog.id, blog_likes.c.user_id == user_id)
+        .exists()
+    )
+    return (await self.db_session.execute(
+      select(Blog.like_count, liked.label("liked")).where(Blog.id == blog_id)
+    )).first()
+
+  async def adjust_counters(self, blog_id: str, **deltas: int) -> Row | None:
+    """Atomically add the given deltas to the blog's counter columns and return their new values."""
+    values = {name: getattr(Blog, name) + delta for name, delta in deltas.items()}
+
+    # Counter changes are not content edits, so keep updated_at as it is
+    result = await self.db_session.execute(
+      update(Blog)
+        .where(Blog.id == blog_id)
+        .values(**values, activity_at=func.now(), updated_at=Blog.updated_at)
+        .returning(*(getattr(Blog, name) for name in deltas))
+        .execution_options(synchronize_session=False)
+    )
+    return result.first()
+
+  async def touch_liked_by(self, user_id: str) -> list[str]:
+    """Bump activity_at on every blog the user likes, their profile is embedded there. Returns their ids."""
+    liked = select(blog_likes.c.blog_id).where(blog_likes.c.user_id == user_id)
+    result = await self.db_session.execute(
+      update(Blog)
+        .where(Blog.id.in_(liked))
+        .values(activity_at=func.now(), updated_at=Blog.updated_at)
+        .returning(Blog.id)
+        .execution_options(synchronize_session=False)
+    )
+    return [str(blog_id) for blog_id in result.scalars()]
+
+  async def recount_counters(self) -> int:
+    """Recompute every blog's counters from the source tables."""
+    like_count = (
+      select(func.count())
+        .select_from(blog_likes)
+        .where(blog_likes.c.blog_id == Blog.id)
+        .scalar_subquery()
+    )
+    comment_count = (
+      select(func.count(Comment.id))
+        .where(Comment.blog_id == Blog.id)
+        .scalar_subquery()
+    )
+
+    result = await self.db_session.execute(
+      update(Blog)
+        .values(like_count=like_count, comment_count=comment_count, updated_at=Blog.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -1,135 +1,264 @@
-from sqlalchemy import func
-from sqlalchemy.orm import Session, aliased
+from sqlalchemy import Row, Select, delete, exists, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload, raiseload, selectinload
+import uuid
 
-from app.models.comment import Comment
+from app.core.pagination import Page, paginate
+from app.db.upsert import insert_ignoring_conflicts
+from app.models.comment import Comment, comment_likes
 from app.models.user import User
 from app.schemas.comment_schema import CommentCreate, CommentUpdate
 
+# Relationships serialized by CommentResponse, loaded in a fixed number of queries
+# per page. Anything else raises instead of silently lazy loading per row.
+COMMENT_RESPONSE_LOADERS = (
+  joinedload(Comment.author),
+  selectinload(Comment.liked_by),
+  raiseload("*"),
+)
+
+def in_subtree(comment: Comment):
+  """Match a comment and its descendants with a range scan on the path index."""
+  # Every descendant path starts with the comment's path, which ends in "/", and "0" sorts right after "/"
+  return (Comment.path >= comment.path) & (Comment.path < comment.path[:-1] + "0")
+
 class CommentRepository:
-  def __init__(self, db: Session):
+  def __init__(self, db: AsyncSession):
     self.db = db
   
-  def create(self, comment_data: CommentCreate):
-    """Create a new comment."""
-    comment = Comment(**comment_data.model_dump())
+  def create(self, comment_data: CommentCreate, parent: Comment | None = None):
+    """Create a new comment, placing it under `parent` in the tree index."""
+    comment = Comment(**comment_data.model_dump(), id=uuid.uuid4())
+    comment.path = (parent.path if parent else "") + f"{comment.id.hex}/"
+    comment.depth = parent.depth + 1 if parent else 0
+
     self.db.add(comment)
     return comment
     
-  def get_by_id(self, comment_id: str):
+  async def get_by_id(self, comment_id: str, loaders: tuple = ()) -> Comment | None:
     """Retrieve a comment by its ID."""
-    comment = self.db.query(Comment).filter(Comment.id == comment_id).first()
-    reply_count = (
-      self.db.query(func.count(Comment.id))
-        .filter(Comment.parent_id == comment_id)
-        .scalar()
-    )
-    return comment, reply_count if comment else None
-  
-  def get_top_level_comments(self, blog_id: str, limit: int = 10, offset: int = 0):
-    """Get top-level comments for a specific blog post."""
-    total = (
-      self.db.query(func.count(Comment.id))
-        .filter(Comment.blog_id == blog_id, Comment.parent_id == None)
-        .scalar()
-    )
+    stmt = select(Comment).options(*loaders).where(Comment.id == comment_id)
+    if loaders:
+      # Make sure an instance already in the session gets the planned relationships
+      stmt = stmt.execution_options(populate_existing=True)
 
-    ChildComment = aliased(Comment)
+    return (await self.db.scalars(stmt)).first()
 
-    # Subquery to count replies for each top-level comment
-    subquery = (
-      self.db.query(func.count(ChildComment.id))
-        .filter(ChildComment.parent_id == Comment.id)
-        .correlate(Comment)
-        .scalar_subquery()
-    )
+  def query_top_level_comments(self, blog_id: str) -> Select:
+    """Query for top-level comments of a specific blog post."""
+    return select(Comment).where(Comment.blog_id == blog_id, Comment.parent_id == None)
 
-    comments = (
-      self.db.query(Comment, subquery.label("reply_count"))
-        .filter(Comment.blog_id == blog_id, Comment.parent_id == None)
-        .order_by(Comment.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
+  async def get_top_level_comments(
+    self,
+    blog_id: str,
+    limit: int = 10,
+    offset: int = 0,
+    cursor: str | None = None,
+    loaders: tuple = COMMENT_RESPONSE_LOADERS,
+  ) -> Page:
+    """Get top-level comments for a specific blog post."""
+    stmt = self.query_top_level_comments(blog_id).options(*loaders)
+
+    return await paginate(self.db, stmt, Comment, limit, offset, cursor)
 
-    return comments, total
+  def query_all_top_level_comments(self) -> Select:
+    """Query for top-level comments across all blog posts."""
+    return select(Comment).where(Comment.parent_id == None)
   
-  def get_all_top_level_comments(self, limit: int = 10, offset: int = 0):
+  async def get_all_top_level_comments(
+    self,
+    limit: int = 10,
+    offset: int = 0,
+    cursor: str | None = None,
+    loaders: tuple = COMMENT_RESPONSE_LOADERS,
+  ) -> Page:
     """Get all comments with pagination."""
-    total = (
-      self.db.query(func.count(Comment.id))
-        .filter(Comment.parent_id == None)
-        .scalar()
-    )
+    stmt = self.query_all_top_level_comments().options(*loaders)
 
-    ChildComment = aliased(Comment)
+    return await paginate(self.db, stmt, Comment, limit, offset, cursor)
 
-    # Subquery to count replies for each top-level comment
-    subquery = (
-      self.db.query(func.count(ChildComment.id))
-        .filter(ChildComment.parent_id == Comment.id)
-        .correlate(Comment)
-        .scalar_subquery()
-    )
+  async def get_comment_replies(
+    self,
+    comment_id: str,
+    limit: int = 10,
+    offset: int = 0,
+    cursor: str | None = None,
+    loaders: tuple = COMMENT_RESPONSE_LOADERS,
+  ) -> Page:
+    """Get replies for a specific comment."""
+    stmt = select(Comment).options(*loaders).where(Comment.parent_id == comment_id)
 
-    comments = (
-      self.db.query(Comment, subquery.label("reply_count"))
-        .filter(Comment.parent_id == None)
-        .order_by(Comment.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
+    return await paginate(self.db, stmt, Comment, limit, offset, cursor)
 
-    return comments, total
-  
-  def get_comment_replies(self, comment_id: str, limit: int = 10, offset: int = 0):
-    """Get replies for a specific comment."""
-    total = (
-      self.db.query(func.count(Comment.id))
-        .filter(Comment.parent_id == comment_id)
-        .scalar()
+  async def get_subtree(
+    self,
+    comment: Comment,
+    max_depth: int | None = None,
+    per_level: int = 10,
+    loaders: tuple = COMMENT_RESPONSE_LOADERS,
+  ) -> list[Comment]:
+    """
+    Get the replies under `comment` in one query, parents before children.
+
+    At most `per_level` replies (the oldest) are kept under each parent, and
+    nothing deeper than `max_depth` levels below the comment. Replies under a
+    reply that was cut are never loaded.
+    """
+    descendants = in_subtree(comment) & (Comment.id != comment.id)
+    if max_depth is not None:
+      descendants &= Comment.depth <= comment.depth + max_depth
+
+    ranked = (
+      select(
+        Comment.id,
+        Comment.parent_id,
+        func.row_number().over(
+          partition_by=Comment.parent_id,
+          order_by=(Comment.created_at, Comment.id),
+        ).label("position"),
+      )
+        .where(descendants)
+        .cte("ranked")
     )
 
-    ChildComment = aliased(Comment)
-    
-    # Subquery to count replies for each reply comment
-    subquery = (
-      self.db.query(func.count(ChildComment.id))
-        .filter(ChildComment.parent_id == Comment.id)
-        .correlate(Comment)
-        .scalar_subquery()
+    # Walk down level by level, only from replies that were kept
+    kept = (
+      select(ranked.c.id)
+        .where(ranked.c.parent_id == comment.id, ranked.c.position <= per_level)
+        .cte("kept", recursive=True)
+    )
+    kept = kept.union_all(
+      select(ranked.c.id)
+        .join(kept, ranked.c.parent_id == kept.c.id)
+        .where(ranked.c.position <= per_level)
     )
 
-    replies = (
-      self.db.query(Comment, subquery.label("reply_count"))
-        .filter(Comment.parent_id == comment_id)
-        .order_by(Comment.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
+    stmt = (
+      select(Comment)
+        .options(*loaders)
+        .where(Comment.id.in_(select(kept.c.id)))
+        .order_by(Comment.depth, Comment.created_at, Comment.id)
     )
+    return list((await self.db.scalars(stmt)).all())
 
-    return replies, total
+  async def count_subtree(self, comment: Comment) -> int:
+    """Count a comment and all of its nested replies."""
+    return await self.db.scalar(
+      select(func.count()).where(in_subtree(comment))
+    )
 
-  def update(self, comment_id: str, data: CommentUpdate):
+  async def update(self, comment_id: str, data: CommentUpdate):
     """Update an existing comment."""
-    comment, _ = self.get_by_id(comment_id)
+    comment = await self.get_by_id(comment_id)
     
-    for key, value in data.model_dump().items():
-      setattr(comment, key, value)
+    # A comment keeps its author and place in the tree, moving it would leave paths and counters stale
+    comment.content = data.content
     
     return comment
   
-  def delete(self, comment_id: str):
-    """Delete a comment by its ID."""
-    comment, _ = self.get_by_id(comment_id)
-    
-    self.db.delete(comment)
-  
-  def add_user_like(self, comment: Comment, user: User):
-    comment.liked_by.append(user)
+  async def delete(self, comment: Comment):
+    """Delete a comment together with all of its nested replies."""
+    await self.db.execute(
+      delete(Comment)
+        .where(in_subtree(comment))
+        .execution_options(synchronize_session=False)
+    )
   
-  def remove_user_like(self, comment: Comment, user: User):
-    comment.liked_by.remove(user)
-    
\ No newline at end of file
+  async def add_like(self, comment_id: str, user_id: str) -> bool:
+    """Like a comment in one statement, False when it is already liked or does not exist."""
+    return await self.add_likes(comment_id, [user_id]) > 0
+
+  async def add_likes(self, comment_id: str, user_ids: list[str]) -> int:
+    """Like a comment on behalf of several users, returning how many likes were new."""
+    # The users are selected next to the comment id, EXISTS skips them all when the comment is gone
+    result = await self.db.execute(
+      insert_ignoring_conflicts(self.db, comment_likes).from_select(
+        ["user_id", "comment_id"],
+        select(User.id, literal(comment_id, Comment.id.type)).where(
+          User.id.in_(user_ids),
+          exists().where(Comment.id == comment_id),
+        ),
+      )
+    )
+    return result.rowcount
+
+  async def remove_like(self, comment_id: str, user_id: str) -> bool:
+    """Unlike a comment, False when it was not liked."""
+    return await self.remove_likes(comment_id, [user_id]) > 0
+
+  async def remove_likes(self, comment_id: str, user_ids: list[str]) -> int:
+    """Remove several users' likes from a comment, returning how many existed."""
+    result = await self.db.execute(
+      delete(comment_likes).where(comment_likes.c.comment_id == comment_id, comment_likes.c.user_id.in_(user_ids))
+    )
+    return result.rowcount
+
+  async def get_like_count(self, comment_id: str) -> int | None:
+    """The comment's like count, None when the comment does not exist."""
+    return await self.db.scalar(select(Comment.like_count).where(Comment.id == comment_id))
+
+  async def get_like_state(self, comment_id: str, user_id: str) -> Row | None:
+    """The comment's like count and whether the user likes it, None when the comment does not exist."""
+    liked = (
+      select(comment_likes.c.user_id)
+        .where(comment_likes.c.comment_id == Comment.id, comment_likes.c.user_id == user_id)
+        .exists()
+    )
+    return (await self.db.execute(
+      select(Comment.like_count, liked.label("liked")).where(Comment.id == comment_id)
+    )).first()
+
+  async def adjust_counters(self, comment_id: str, **deltas: int) -> Row | None:
+    """Atomically add the given deltas to the comment's counter columns and return their new values."""
+    values = {name: getattr(Comment, name) + delta for name, delta in deltas.items()}
+
+    # Counter changes are not content edits, so keep updated_at as it is
+    result = await self.db.execute(
+      update(Comment)
+        .where(Comment.id == comment_id)
+        .values(**values, activity_at=func.now(), updated_at=Comment.updated_at)
+        .returning(*(getattr(Comment, name) for name in deltas))
+        .execution_options(synchronize_session=False)
+    )
+    return result.first()
+
+  async def touch_liked_by(self, user_id: str):
+    """Bump activity_at on every comment the user likes, their profile is embedded there."""
+    liked = select(comment_likes.c.comment_id).where(comment_likes.c.user_id == user_id)
+    await self.db.execute(
+      update(Comment)
+        .where(Comment.id.in_(liked))
+        .values(activity_at=func.now(), updated_at=Comment.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+  async def get_version(self, comment_id: str) -> Row | None:
+    """Everything a CommentResponse depends on that changes, without loading the comment."""
+    return (await self.db.execute(
+      select(Comment.updated_at, Comment.activity_at, Comment.like_count, Comment.reply_count, User.updated_at)
+        .join(User, Comment.author_id == User.id)
+        .where(Comment.id == comment_id)
+    )).first()
+
+  async def recount_counters(self) -> int:
+    """Recompute every comment's counters from the source tables."""
+    ChildComment = aliased(Comment)
+
+    reply_count = (
+      select(func.count(ChildComment.id))
+        .where(ChildComment.parent_id == Comment.id)
+        .scalar_subquery()
+    )
+    like_count = (
+      select(func.count())
+        .select_from(comment_likes)
+        .where(comment_likes.c.comment_id == Comment.id)
+        .scalar_subquery()
+    )
+
+    result = await self.db.execute(
+      update(Comment)
+        .values(reply_count=reply_count, like_count=like_count, updated_at=Comment.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -1,41 +1,68 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.blog import Blog
 from app.models.user import User
 from app.schemas.user_schema import UserUpdate
+from app.services.principal_cache import principal_cache
 
 class UserRepository:
-  def __init__(self, db_session: Session):
+  def __init__(self, db_session: AsyncSession):
     self.db_session = db_session
   
-  def get_by_email(self, email: str) -> User | None:
+  async def get_by_email(self, email: str) -> User | None:
     """Retrieve a user by email."""
-    return self.db_session.query(User).filter_by(email=email).first()
+    return (await self.db_session.scalars(select(User).filter_by(email=email))).first()
   
-  def get_by_id(self, user_id: str) -> User | None:
+  async def get_by_id(self, user_id: str) -> User | None:
     """Retrieve a user by ID."""
-    return self.db_session.query(User).filter_by(id=user_id).first()
+    return (await self.db_session.scalars(select(User).filter_by(id=user_id))).first()
 
-  def create(self, user: dict) -> User:
+  async def get_version(self, user_id: str) -> Row | None:
+    """Everything a UserResponse depends on that changes, without loading the user."""
+    return (await self.db_session.execute(
+      select(User.updated_at, func.count(Blog.id), func.max(Blog.updated_at))
+        .outerjoin(Blog, Blog.author_id == User.id)
+        .where(User.id == user_id)
+        .group_by(User.id, User.updated_at)
+    )).first()
+
+  async def create(self, user: dict) -> User:
     """Create a new user in the database."""
     new_user = User(**user)
     self.db_session.add(new_user)
-    self.db_session.commit()
-    self.db_session.refresh(new_user)
+    await self.db_session.commit()
+    await self.db_session.refresh(new_user)
 
     return new_user
     
     
-  def change_password(self, user: User, new_password: str) -> User:
+  async def change_password(self, user: User, new_password: str) -> User:
     """Change the user's password."""
     user.hashed_password = new_password
-    self.db_session.commit()
-    self.db_session.refresh(user)
+    await self.db_session.commit()
+    await principal_cache.invalidate(user.id)
+    await self.db_session.refresh(user)
     return user
   
-  def update_info(self, user: User, user_data: UserUpdate) -> User:
+  async def update_info(self, user: User, user_data: UserUpdate) -> User:
     """Update user information."""
     for key, value in user_data.dict(exclude_unset=True).items():
       setattr(user, key, value)
     
-    self.db_session.commit()
-    self.db_session.refresh(user)
-    return user
\ No newline at end of file
+    await self.db_session.commit()
+    await principal_cache.invalidate(user.id)
+    await self.db_session.refresh(user)
+    return user
+
+  async def update_avatar(self, user: User, avatar_url: str) -> User:
+    """Point the user at a new avatar image."""
+    user.profile_img = avatar_url
+    await self.db_session.commit()
+    await principal_cache.invalidate(user.id)
+    return user
+
+  async def get_avatar_urls(self) -> set[str]:
+    """Every avatar URL some user points at."""
+    return set((await self.db_session.scalars(
+      select(User.profile_img).where(User.profile_img.is_not(None)).distinct()
+    )).all())
@@ -28,6 +28,8 @@ class BlogResponse(BlogBase):
   author_id: UUID 
   created_at: datetime
   updated_at: datetime
+  like_count: int = 0
+  comment_count: int = 0
 
   author: "UserSimple"
   liked_by: List["UserSimple"] = []
@@ -36,5 +38,15 @@ class BlogResponse(BlogBase):
     "from_attributes": True,
   }
 
+class BlogSearchHit(BaseModel):
+  blog: BlogResponse
+  rank: float
+  snippet: str
+
+  model_config = {
+    "from_attributes": True,
+  }
+
 from app.schemas.user_schema import UserSimple
-BlogResponse.model_rebuild()
\ No newline at end of file
+BlogResponse.model_rebuild()
+BlogSearchHit.model_rebuild()
\ No newline at end of file
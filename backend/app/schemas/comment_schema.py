@@ -21,6 +21,7 @@ class CommentResponse(CommentBase):
   created_at: datetime
   updated_at: datetime
   reply_count: int = 0
+  like_count: int = 0
   author: UserSimple
   liked_by: list[UserSimple] = []
 
@@ -28,4 +29,8 @@ class CommentResponse(CommentBase):
     "from_attributes": True,
   }
 
-CommentResponse.model_rebuild()
\ No newline at end of file
+class CommentThread(CommentResponse):
+  replies: list["CommentThread"] = []
+
+CommentResponse.model_rebuild()
+CommentThread.model_rebuild()
\ No newline at end of file
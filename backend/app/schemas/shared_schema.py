@@ -1,34 +1,50 @@
-from typing import Generic, TypeVar, List
-from pydantic import BaseModel, computed_field
+from functools import cached_property
+from typing import Annotated, Generic, TypeVar, List
+from pydantic import AfterValidator, BaseModel, computed_field
+from uuid import UUID
 
 T = TypeVar('T')
 
+# A UUID path parameter, validated and passed on as its canonical string
+ResourceId = Annotated[str, AfterValidator(lambda value: str(UUID(value)))]
+
 class PaginatedResponse(BaseModel, Generic[T]):
   total: int
+  total_is_exact: bool = True
   limit: int
   offset: int
   items: List[T]
+  cursor: str | None = None
+  next_cursor: str | None = None
+  prev_cursor: str | None = None
   
   @computed_field
-  @property
+  @cached_property
   def max_page(self) -> int:
     return (self.total + self.limit - 1) // self.limit
   
   @computed_field
-  @property
+  @cached_property
   def page(self) -> int:
     return (self.offset // self.limit) + 1 if self.limit > 0 else 1
   
   @computed_field
-  @property
+  @cached_property
   def has_next(self) -> bool:
-    return self.page < self.max_page
+    if self.next_cursor is not None:
+      return True
+    # Offset-only listings (such as search results) have no cursors
+    return self.cursor is None and self.total_is_exact and self.offset + self.limit < self.total
   
   @computed_field
-  @property
+  @cached_property
   def has_prev(self) -> bool:
-    return self.page > 1
+    return self.prev_cursor is not None if self.cursor else self.page > 1
 
   model_config = {
     "from_attributes": True,
-  }
\ No newline at end of file
+  }
+
+class LikeStatus(BaseModel):
+  liked: bool
+  like_count: int
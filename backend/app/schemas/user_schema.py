@@ -24,6 +24,11 @@ class UserCreate(UserBase):
 class UserUpdate(UserBase):
   pass
 
+class AvatarAccepted(BaseModel):
+  """An avatar upload queued for processing, `profile_img` is its URL once ready."""
+  detail: str
+  profile_img: str
+
 class UserResponse(UserBase):
   id: UUID
   created_at: datetime
@@ -1,67 +1,79 @@
 from datetime import datetime, timezone
-from fastapi import requests, responses, Depends
+from fastapi import HTTPException, requests, responses, Depends
 from fastapi.security import OAuth2PasswordRequestForm
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from functools import cached_property
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import Literal, Annotated
 import jwt
 
 from app.db.base import SessionDep
-from app.core.config import settings
+from app.core.container import container
+from app.core.hashing import PasswordHasher
 from app.models.user import User
 from app.repositories.user_respository import UserRepository
 from app.schemas.user_schema import UserCreate
 from app.schemas.auth_schema import TokenResponse
+from app.services.principal_cache import Principal
 from app.services.redis_service import RedisService
 
 class AuthService:
-  def __init__(self, db_session: Session):
+  def __init__(self, db_session: AsyncSession):
     self.db_session = db_session
-    self.user_repository = UserRepository(db_session)
-    self.redis_service = RedisService()
-    self.secret_key = settings.SECRET_KEY
-    self.jwt_algorithm = settings.JWT_ALGORITHM
-    self.jwt_access_token_ex = settings.JWT_ACCESS_TOKEN_EX
-    self.jwt_refresh_token_ex = settings.JWT_REFRESH_TOKEN_EX
-    self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    self.redis_service: RedisService = container.redis_service
+    self.secret_key = container.jwt.secret_key
+    self.jwt_algorithm = container.jwt.algorithm
+    self.jwt_access_token_ex = container.jwt.access_token_ex
+    self.jwt_refresh_token_ex = container.jwt.refresh_token_ex
+    self.password_hasher: PasswordHasher = container.password_hasher
+
+  @cached_property
+  def user_repository(self) -> UserRepository:
+    return UserRepository(self.db_session)
      
-  def create_user(self, user_create: UserCreate) -> User:
+  async def create_user(self, user_create: UserCreate) -> User:
     """Create a new user in the database."""
     try:
       # Check if the user email already exists
-      existing_user = self.user_repository.get_by_email(user_create.email)
+      existing_user = await self.user_repository.get_by_email(user_create.email)
 
       if existing_user:
         raise ValueError("Email already registered")
       
       # Encrypt the password before saving
       user_data = user_create.model_dump(exclude={"password"})
-      user_data['hashed_password'] = self._encrypt_password(user_create.password)
+      user_data['hashed_password'] = await self._encrypt_password(user_create.password, route="register")
 
       # Create a new user instance
-      user = self.user_repository.create(user_data)
+      user = await self.user_repository.create(user_data)
 
-      self.db_session.commit()
-      self.db_session.refresh(user)
+      await self.db_session.commit()
+      await self.db_session.refresh(user)
+
+      # A new user has no blogs yet
+      set_committed_value(user, "blogs", [])
 
       # Return the created user
       return user
+    except HTTPException as http_exc:
+      await self.db_session.rollback()
+      raise http_exc
     except Exception as e:
-      self.db_session.rollback()
+      await self.db_session.rollback()
       raise ValueError(f"Error creating user: {str(e)}")
     
-  def authenticate_user(self, credentials: OAuth2PasswordRequestForm) -> responses.JSONResponse:
+  async def authenticate_user(self, credentials: OAuth2PasswordRequestForm) -> responses.JSONResponse:
     """Authenticate a user and return tokens."""
-    user = self.user_repository.get_by_email(credentials.username)
+    user = await self.user_repository.get_by_email(credentials.username)
 
-    if not user or not self._verify_password(credentials.password, user.hashed_password):
+    if not user or not await self._verify_password(credentials.password, user.hashed_password, route="login"):
       raise ValueError("Invalid email or password")
     
     access_token = self._create_tokens(user, type='access')
     refresh_token = self._create_tokens(user, type='refresh')
 
     # Store refresh token in Redis with an expiration time
-    self.redis_service.set(f"refresh_token:{user.id}", refresh_token, ex=self.jwt_refresh_token_ex)
+    await self.redis_service.set(f"refresh_token:{user.id}", refresh_token, ex=self.jwt_refresh_token_ex)
 
     response = responses.JSONResponse(content=TokenResponse(
       user_id=str(user.id),
@@ -79,15 +91,16 @@ class AuthService:
 
     return response
     
-  def refresh_user_token(self, user: User, req: requests.Request) -> responses.JSONResponse:
+  async def refresh_user_token(self, user: Principal, req: requests.Request) -> responses.JSONResponse:
     """Refresh the access token using the refresh token."""
     # Verify the refresh token from Redis
     refresh_token = req.cookies.get("refresh_token")
     
-    if not refresh_token or not self.redis_service.exists(f"refresh_token:{user.id}"):
+    stored_token = await self.redis_service.get(f"refresh_token:{user.id}") if refresh_token else None
+    if not stored_token:
       raise ValueError("Invalid or expired refresh token")
     
-    if not self.redis_service.get(f"refresh_token:{user.id}") == refresh_token:
+    if not stored_token == refresh_token:
       raise ValueError("Refresh token mismatch")
     
     # Create a new access token
@@ -95,7 +108,7 @@ class AuthService:
     refresh_token = self._create_tokens(user, type='refresh')
     
     # Update the refresh token in Redis
-    self.redis_service.set(f"refresh_token:{user.id}", refresh_token, ex=self.jwt_refresh_token_ex)
+    await self.redis_service.set(f"refresh_token:{user.id}", refresh_token, ex=self.jwt_refresh_token_ex)
     
     response = responses.JSONResponse(content=TokenResponse(
       user_id=str(user.id),
@@ -113,30 +126,38 @@ class AuthService:
     
     return response
     
-  def logout_user(self, user: User) -> bool:
+  async def logout_user(self, user: Principal) -> bool:
     """Logout the user by deleting the refresh token from Redis."""
     # Delete the refresh token from Redis
-    self.redis_service.delete(f"refresh_token:{user.id}")
+    await self.redis_service.delete(f"refresh_token:{user.id}")
     return True
   
-  def change_user_password(self, user: User, current_password: str, new_password: str) -> User:
+  async def change_user_password(self, principal: Principal, current_password: str, new_password: str) -> User:
     """Change the user's password."""
     try:
-      if not self._verify_password(current_password, user.hashed_password):
+      # The principal never holds the hash, the row is loaded for it
+      user = await self.user_repository.get_by_id(principal.id)
+      if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+      if not await self._verify_password(current_password, user.hashed_password, route="change-password"):
         raise ValueError("Current password is incorrect")
       
       # Encrypt the new password
-      encrypted_password = self._encrypt_password(new_password)
-      user = self.user_repository.change_password(user, encrypted_password)
+      encrypted_password = await self._encrypt_password(new_password, route="change-password")
+      user = await self.user_repository.change_password(user, encrypted_password)
 
-      self.db_session.commit()
-      self.db_session.refresh(user)
+      await self.db_session.commit()
+      await self.db_session.refresh(user)
       return user
+    except HTTPException as http_exc:
+      await self.db_session.rollback()
+      raise http_exc
     except Exception as e:
-      self.db_session.rollback()
+      await self.db_session.rollback()
       raise ValueError(f"Error changing password: {str(e)}")
 
-  def _create_tokens(self, user: User, type: Literal['access', 'refresh']) -> str:
+  def _create_tokens(self, user: User | Principal, type: Literal['access', 'refresh']) -> str:
     """Create JWT token for the user."""
     expiration = self.jwt_access_token_ex if type == 'access' else self.jwt_refresh_token_ex
     token_data = {
@@ -147,13 +168,14 @@ class AuthService:
     token = jwt.encode(token_data, self.secret_key, algorithm=self.jwt_algorithm)
     return token
   
-  def _verify_password(self, plain_password: str, hashed_password: str) -> bool:
+  async def _verify_password(self, plain_password: str, hashed_password: str, route: str) -> bool:
     """Verify the provided password against the stored hashed password."""
-    return self.pwd_context.verify(plain_password, hashed_password)
+    # bcrypt is CPU bound, it runs on its own bounded pool
+    return await self.password_hasher.verify(plain_password, hashed_password, route)
 
-  def _encrypt_password(self, password: str) -> str:
+  async def _encrypt_password(self, password: str, route: str) -> str:
     """Encrypt the password using a hashing algorithm."""
-    return self.pwd_context.hash(password)
+    return await self.password_hasher.hash(password, route)
 
 def get_auth_service(db_session: SessionDep) -> AuthService:
   """Get the AuthService instance."""
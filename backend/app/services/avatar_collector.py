@@ -0,0 +1,47 @@
+from fastapi.concurrency import run_in_threadpool
+import time
+
+from app.core.config import settings
+from app.core.container import container
+from app.core.periodic import PeriodicTask, claim_interval
+from app.db.base import SessionLocal
+from app.repositories.user_respository import UserRepository
+
+LOCK_KEY = "avatars:gc:lock"
+
+class AvatarCollector:
+  """
+  Deletes avatar versions no user points at any more.
+
+  Avatar URLs are immutable, so pages and caches may keep pointing at a
+  replaced version for a while. A version is only deleted once no user
+  references it and it has not been written for `grace`. Every `interval`
+  seconds one worker does a pass.
+  """
+  def __init__(self):
+    self.redis_service = container.redis_service
+    self.file_service = container.file_service
+    self.interval = settings.AVATAR_GC_INTERVAL
+    self.grace = settings.AVATAR_GC_GRACE
+    self._collector = PeriodicTask("collecting unused avatars", self.collect, self.interval)
+
+  async def collect(self, force: bool = False) -> int:
+    """Delete unreferenced avatar files past the grace period and return how many went."""
+    if not force and not await claim_interval(self.redis_service, LOCK_KEY, self.interval):
+      return 0
+
+    async with SessionLocal() as db_session:
+      referenced = await UserRepository(db_session).get_avatar_urls()
+
+    untouched_since = time.time() - self.grace.total_seconds()
+    return await run_in_threadpool(self.file_service.collect_avatars, referenced, untouched_since)
+
+  def start(self):
+    """Start collecting every `interval` seconds in the background."""
+    self._collector.start()
+
+  async def stop(self):
+    """Stop the background collection."""
+    await self._collector.stop()
+
+avatar_collector = AvatarCollector()
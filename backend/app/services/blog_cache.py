@@ -0,0 +1,113 @@
+from app.core.compression import GZIP_MAGIC, precompress
+from app.core.config import settings
+from app.core.container import container
+from app.core.http_cache import Validator, make_validator
+from app.models.blog import Blog
+from app.schemas.blog_schema import BlogResponse
+from datetime import datetime
+from typing import NamedTuple
+import gzip
+
+class CachedBlog(NamedTuple):
+  """A serialized, possibly gzipped, BlogResponse and the validator it was served with."""
+  body: bytes
+  validator: Validator
+
+class BlogCache:
+  """
+  Serialized BlogResponse bodies in Redis, keyed by blog id. Bodies are
+  stored gzipped (see `precompress`) so hits are not recompressed. The ETag
+  and Last-Modified are stored in front of the body, so a hit or a 304 is
+  answered without touching the database. Every change that moves the
+  validator also drops the entry.
+
+  Each entry is tagged with its author, whose profile is embedded in the
+  body. Likers are embedded too but not tagged, so a like stays one key to
+  drop; a profile update drops the blogs its user liked by id instead.
+  """
+  def __init__(self):
+    self.redis_service = container.redis_service
+    self.ttl = settings.BLOG_CACHE_TTL
+
+  async def get(self, blog_id: str) -> CachedBlog | None:
+    """Return the cached body and validator of a blog, or None on a miss."""
+    try:
+      entry = await self.redis_service.get_bytes(f"blog:{blog_id}")
+    except Exception as e:
+      print(f"Error reading cached blog {blog_id}: {e}")
+      return None
+    return self._unpack(entry) if entry is not None else None
+
+  async def get_many(self, blog_ids: list[str]) -> list[bytes | None]:
+    """Cached bodies of several blogs in one round trip, None for each miss."""
+    try:
+      entries = await self.redis_service.get_many_bytes(f"blog:{blog_id}" for blog_id in blog_ids)
+    except Exception as e:
+      print(f"Error reading cached blogs {blog_ids}: {e}")
+      return [None] * len(blog_ids)
+    return [self._unpack(entry).body if entry is not None else None for entry in entries]
+
+  @staticmethod
+  def load(body: bytes) -> BlogResponse:
+    """Parse a cached body back into a BlogResponse."""
+    if body.startswith(GZIP_MAGIC):
+      body = gzip.decompress(body)
+    return BlogResponse.model_validate_json(body)
+
+  @staticmethod
+  def validator(blog: Blog) -> Validator:
+    """ETag and Last-Modified of a blog loaded with its author."""
+    return make_validator(
+      str(blog.id),
+      blog.updated_at,
+      blog.activity_at,
+      blog.like_count,
+      blog.comment_count,
+      blog.author.updated_at,
+      timestamps=[blog.updated_at, blog.activity_at, blog.author.updated_at],
+    )
+
+  async def set(self, blog: Blog) -> CachedBlog:
+    """Serialize a blog loaded with its relations, cache it and return the stored body and validator."""
+    cached = CachedBlog(
+      precompress(BlogResponse.model_validate(blog).model_dump_json().encode()),
+      self.validator(blog),
+    )
+
+    try:
+      await self.redis_service.set_tagged(
+        f"blog:{blog.id}",
+        self._pack(cached),
+        [f"blog:user:{blog.author_id}"],
+        ex=self.ttl,
+      )
+    except Exception as e:
+      print(f"Error caching blog {blog.id}: {e}")
+
+    return cached
+
+  async def invalidate(self, *blog_ids: str):
+    """Drop cached blogs after they changed."""
+    try:
+      await self.redis_service.delete_many(f"blog:{blog_id}" for blog_id in blog_ids)
+    except Exception as e:
+      print(f"Error invalidating cached blogs {blog_ids}: {e}")
+
+  async def invalidate_user(self, user_id: str):
+    """Drop every cached blog this user wrote."""
+    try:
+      await self.redis_service.delete_tagged(f"blog:user:{user_id}")
+    except Exception as e:
+      print(f"Error invalidating cached blogs of user {user_id}: {e}")
+
+  @staticmethod
+  def _pack(cached: CachedBlog) -> bytes:
+    etag, last_modified = cached.validator
+    return f"{etag}\n{last_modified.isoformat()}\n".encode() + cached.body
+
+  @staticmethod
+  def _unpack(entry: bytes) -> CachedBlog:
+    etag, last_modified, body = entry.split(b"\n", 2)
+    return CachedBlog(body, Validator(etag.decode(), datetime.fromisoformat(last_modified.decode())))
+
+blog_cache = BlogCache()
@@ -1,19 +1,35 @@
 from fastapi import HTTPException, status, Depends
-from sqlalchemy.orm import Session
+from functools import cached_property
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated
 
+from app.core.config import settings
+from app.core.pagination import Page, build_page, decode_cursor
 from app.db.base import SessionDep
 from app.models.blog import Blog
-from app.models.user import User
-from app.repositories.blog_repository import BlogRepository
-from app.schemas.blog_schema import BlogCreate, BlogUpdate
+from app.repositories.blog_repository import BLOG_RESPONSE_LOADERS, BlogRepository
+from app.schemas.blog_schema import BlogCreate, BlogResponse, BlogUpdate
+from app.schemas.shared_schema import LikeStatus
+from app.services.blog_cache import CachedBlog, blog_cache
+from app.services.count_service import CountMode, CountService, count_key
+from app.services.like_buffer import like_buffer
+from app.services.principal_cache import Principal
+from app.services.timelines import timelines
+from app.services.trending import trending
 
 class BlogService:
-  def __init__(self, db_session: Session):
+  def __init__(self, db_session: AsyncSession):
     self.db_session = db_session
-    self.blog_repository = BlogRepository(db_session)
+
+  @cached_property
+  def blog_repository(self) -> BlogRepository:
+    return BlogRepository(self.db_session)
+
+  @cached_property
+  def count_service(self) -> CountService:
+    return CountService(self.db_session)
   
-  def create_blog(self, blog_data: BlogCreate, user_id: str) -> Blog:
+  async def create_blog(self, blog_data: BlogCreate, user_id: str) -> Blog:
     try:
       """Create a new blog post."""
       self._validate_blog_data(blog_data)     
@@ -25,29 +41,130 @@ class BlogService:
         )
       
       blog = self.blog_repository.create(blog_data)
-      self.db_session.commit()
-      self.db_session.refresh(blog)
+      await self.db_session.commit()
+
+      await self.count_service.invalidate("blogs", count_key("blogs:user", blog.author_id))
+      blog = await self.get_blog_or_404(blog.id, with_relations=True)
+
+      # A new blog tops the timelines, have its body ready for them
+      await blog_cache.set(blog)
+      await timelines.add(blog)
       return blog
     except Exception as e:
       print(f"Error creating blog: {e}")
-      self.db_session.rollback()
+      await self.db_session.rollback()
       raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
   
-  def get_blogs(self, limit: int = 5, offset: int = 0):
+  async def get_blogs(
+    self,
+    limit: int = 5,
+    offset: int = 0,
+    cursor: str | None = None,
+    count_mode: CountMode = CountMode.EXACT,
+  ) -> Page:
     """Get all blogs with pagination."""
-    return self.blog_repository.get_all(limit, offset)
+    page = await self.get_timeline_page(limit, offset, cursor)
+    if page is None:
+      page = await self.blog_repository.get_all(limit, offset, cursor)
+    return await self.count_service.with_total(page, self.blog_repository.query_all(), "blogs", count_mode)
+
+  async def get_timeline_page(
+    self,
+    limit: int = 5,
+    offset: int = 0,
+    cursor: str | None = None,
+    author_id: str | None = None,
+  ) -> Page | None:
+    """
+    A page of the newest blogs, or an author's, as BlogResponses built from the
+    Redis timelines and the blog cache. None when the page is outside the cached
+    window and SQL has to serve it.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    window = await timelines.page(
+      limit,
+      offset,
+      position,
+      author_id=author_id,
+      load=lambda size: self.blog_repository.get_latest_ids(size, author_id),
+    )
+    if window is None:
+      return None
+
+    blogs = await self.get_blog_responses(window.ids)
+    if len(blogs) < len(window.ids):
+      # Blogs deleted behind the timeline's back, drop them and let SQL serve this page
+      for blog_id in set(window.ids) - {str(blog.id) for blog in blogs}:
+        await timelines.remove(blog_id, author_id)
+      return None
+
+    return build_page(blogs, window.has_more, position, offset)
+
+  async def get_blog_responses(self, blog_ids: list[str]) -> list[BlogResponse]:
+    """BlogResponses of several blogs in order, from one blog cache multi-get plus one query for the misses."""
+    bodies = await blog_cache.get_many(blog_ids)
+    missing = [blog_id for blog_id, body in zip(blog_ids, bodies) if body is None]
+
+    loaded = {}
+    for blog in await self.blog_repository.get_by_ids(missing):
+      await blog_cache.set(blog)
+      loaded[str(blog.id)] = BlogResponse.model_validate(blog)
 
-  def get_blog_or_404(self, blog_id: str) -> Blog:
+    responses = []
+    for blog_id, body in zip(blog_ids, bodies):
+      response = blog_cache.load(body) if body is not None else loaded.get(blog_id)
+      if response is not None:
+        responses.append(response)
+    return responses
+
+  async def get_blog_or_404(self, blog_id: str, with_relations: bool = False) -> Blog:
     """Get a blog by its ID."""
-    blog = self.blog_repository.get_by_id(blog_id)
+    loaders = BLOG_RESPONSE_LOADERS if with_relations else ()
+    blog = await self.blog_repository.get_by_id(blog_id, loaders)
     if not blog:
       raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blog not found")
     return blog
+
+  async def get_trending_blogs(self, limit: int = 5, offset: int = 0) -> Page:
+    """Blogs ranked by the trending index, best first."""
+    blog_ids, total = await trending.top(limit, offset)
+    blogs = await self.blog_repository.get_by_ids(blog_ids)
+
+    missing = set(blog_ids) - {str(blog.id) for blog in blogs}
+    if missing:
+      await trending.remove(*missing)
+    return Page(items=blogs, total=total)
+
+  async def record_view(self, blog_id: str):
+    """Count a view of a blog towards its trending score."""
+    await trending.bump(blog_id, "view")
+
+  async def search_blogs(self, q: str, limit: int = 5, offset: int = 0) -> Page:
+    """Full-text search over blog titles and content."""
+    q = q.strip()
+    if not q:
+      # Nothing left to match, and an empty MATCH is a syntax error on SQLite
+      return Page(items=[], total=0)
+
+    page = await self.blog_repository.search(q, limit, offset)
+    return await self.count_service.with_total(page, self.blog_repository.query_search(q), "blogs:search")
+
+  async def get_blog_response(self, blog_id: str) -> CachedBlog:
+    """
+    Get the serialized, possibly gzipped, BlogResponse of a blog and its validator.
+
+    Hits come from the blog cache alone, only a miss loads the blog.
+    """
+    cached = await blog_cache.get(blog_id)
+    if cached is None:
+      blog = await self.get_blog_or_404(blog_id, with_relations=True)
+      cached = await blog_cache.set(blog)
+    return cached
   
-  def update_blog(self, blog_id: str, blog_data: BlogUpdate, user_id: str) -> Blog:
+  async def update_blog(self, blog_id: str, blog_data: BlogUpdate, user_id: str) -> Blog:
     try:
       """Update an existing blog post."""
-      blog = self.get_blog_or_404(blog_id)
+      blog = await self.get_blog_or_404(blog_id)
       
       self._validate_blog_data(blog_data)     
 
@@ -58,20 +175,22 @@ class BlogService:
         )
 
       updated_blog = self.blog_repository.update(blog, blog_data)
-      self.db_session.commit()
-      self.db_session.refresh(updated_blog)
-      return updated_blog
+      await self.db_session.commit()
+
+      await blog_cache.invalidate(blog_id)
+
+      return await self.get_blog_or_404(updated_blog.id, with_relations=True)
     except HTTPException as http_exc:
-      self.db_session.rollback()
+      await self.db_session.rollback()
       raise http_exc
     except Exception as e:
-      self.db_session.rollback()
+      await self.db_session.rollback()
       raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
-  def delete_blog(self, blog_id: str, user_id: str) -> dict:
+  async def delete_blog(self, blog_id: str, user_id: str) -> dict:
     """Delete a blog post."""
     try:
-      blog = self.get_blog_or_404(blog_id)
+      blog = await self.get_blog_or_404(blog_id)
       
       if str(blog.author_id) != user_id:
         raise HTTPException(
@@ -79,36 +198,92 @@ class BlogService:
           detail="You can only delete blogs for your own account"
         )
       
-      self.blog_repository.delete(blog)
-      self.db_session.commit()
+      await self.blog_repository.delete(blog)
+      await self.db_session.commit()
+
+      # Comments are deleted along with the blog
+      await blog_cache.invalidate(blog_id)
+      await trending.remove(blog.id)
+      await timelines.remove(blog.id, blog.author_id)
+      await self.count_service.invalidate(
+        "blogs",
+        count_key("blogs:user", blog.author_id),
+        "comments",
+        count_key("comments:blog", blog.id),
+      )
       return {"detail": "Blog deleted successfully"}
     except HTTPException as http_exc:
-      self.db_session.rollback()
+      await self.db_session.rollback()
       raise http_exc
     except Exception as e:
-      self.db_session.rollback()
+      await self.db_session.rollback()
       raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
   
-  def toggle_blog_like(self, blog_id: str, user: User) -> Blog:
+  async def toggle_blog_like(self, blog_id: str, user: Principal) -> LikeStatus:
+    """Flip the user's like on a blog."""
     try:
-      blog = self.get_blog_or_404(blog_id)
+      if settings.LIKE_WRITE_BEHIND:
+        return await self._buffer_blog_like(blog_id, user, liked=None)
 
-      if user in blog.liked_by:
-        self.blog_repository.remove_blog_like(blog, user)
-      else:
-        self.blog_repository.add_blog_like(blog, user)
+      unliked = await self.blog_repository.remove_like(blog_id, user.id)
+      if unliked:
+        return await self._finish_blog_like(blog_id, liked=False, changed=True)
 
-      self.db_session.commit()
-      self.db_session.refresh(blog)
-      return blog
+      # Nothing inserted means the blog is missing, or a concurrent request liked it first
+      changed = await self.blog_repository.add_like(blog_id, user.id)
+      return await self._finish_blog_like(blog_id, liked=True, changed=changed)
     except HTTPException as http_exc:
-      self.db_session.rollback()
+      await self.db_session.rollback()
       raise http_exc
     except Exception as e:
-      self.db_session.rollback()
+      await self.db_session.rollback()
       print(f"Error toggling blog like: {e}")
       raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+  async def set_blog_like(self, blog_id: str, user: Principal, liked: bool) -> LikeStatus:
+    """Like or unlike a blog, repeating the same request changes nothing."""
+    try:
+      if settings.LIKE_WRITE_BEHIND:
+        return await self._buffer_blog_like(blog_id, user, liked=liked)
+
+      if liked:
+        changed = await self.blog_repository.add_like(blog_id, user.id)
+      else:
+        changed = await self.blog_repository.remove_like(blog_id, user.id)
+
+      return await self._finish_blog_like(blog_id, liked=liked, changed=changed)
+    except HTTPException as http_exc:
+      await self.db_session.rollback()
+      raise http_exc
+    except Exception as e:
+      await self.db_session.rollback()
+      print(f"Error setting blog like: {e}")
+      raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+  async def _buffer_blog_like(self, blog_id: str, user: Principal, liked: bool | None) -> LikeStatus:
+    """Record the like in Redis only, the like buffer writes it to blog_likes later."""
+    like_status = await like_buffer.record("blog", blog_id, user.id, liked, self.blog_repository.get_like_state)
+    if like_status is None:
+      raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blog not found")
+    return like_status
+
+  async def _finish_blog_like(self, blog_id: str, liked: bool, changed: bool) -> LikeStatus:
+    """Move the like counter when the like row changed, and report the resulting state."""
+    if changed:
+      counters = await self.blog_repository.adjust_counters(blog_id, like_count=1 if liked else -1)
+      like_count = counters.like_count
+    else:
+      like_count = await self.blog_repository.get_like_count(blog_id)
+      if like_count is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blog not found")
+
+    await self.db_session.commit()
+
+    if changed:
+      await blog_cache.invalidate(blog_id)
+      await trending.bump(blog_id, "like", 1 if liked else -1)
+    return LikeStatus(liked=liked, like_count=like_count)
+
   def _validate_blog_data(self, data: BlogCreate) -> None:
     """Validate the blog data."""
     for key, value in data.model_dump().items():
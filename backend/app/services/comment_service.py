@@ -1,26 +1,55 @@
 from fastapi import HTTPException, status, Depends
-from sqlalchemy.orm import Session
+from functools import cached_property
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import Annotated
 from uuid import UUID
 
+from app.core.config import settings
+from app.core.http_cache import Validator, make_validator
+from app.core.pagination import Page
 from app.db.base import SessionDep
 from app.models.comment import Comment
-from app.models.user import User
-from app.repositories.comment_repository import CommentRepository
+from app.repositories.blog_repository import BlogRepository
+from app.repositories.comment_repository import COMMENT_RESPONSE_LOADERS, CommentRepository
+from app.services.blog_cache import blog_cache
 from app.services.blog_service import BlogService
+from app.services.count_service import CountMode, CountService, count_key
+from app.services.like_buffer import like_buffer
+from app.services.principal_cache import Principal
+from app.services.trending import trending
 from app.services.user_service import UserService
 from app.schemas.comment_schema import CommentCreate, CommentUpdate
+from app.schemas.shared_schema import LikeStatus
 
 class CommentService:
-  def __init__(self, db_session: Session):
+  def __init__(self, db_session: AsyncSession):
     self.db_session = db_session
-    self.comment_repository = CommentRepository(db_session)
-    self.blog_service = BlogService(db_session)
-    self.user_service = UserService(db_session)
+
+  @cached_property
+  def comment_repository(self) -> CommentRepository:
+    return CommentRepository(self.db_session)
+
+  @cached_property
+  def blog_repository(self) -> BlogRepository:
+    return BlogRepository(self.db_session)
+
+  @cached_property
+  def count_service(self) -> CountService:
+    return CountService(self.db_session)
+
+  @cached_property
+  def blog_service(self) -> BlogService:
+    return BlogService(self.db_session)
+
+  @cached_property
+  def user_service(self) -> UserService:
+    return UserService(self.db_session)
   
-  def create_comment(
+  async def create_comment(
     self,
     data: CommentCreate,
+    author: Principal | None = None,
   ) -> Comment:
     """Create a new comment on a blog post."""
     try:
@@ -28,73 +57,122 @@ class CommentService:
       self._validate_comment_data(data)
 
       # Validate references
-      self._validate_comment_reference(data.blog_id, data.author_id, data.parent_id)
+      parent = await self._validate_comment_reference(data.blog_id, data.author_id, data.parent_id, author)
 
       # Process the comment data
       data = self._process_comment_data(data)
 
-      # Create the comment
-      comment = self.comment_repository.create(data)
-      self.db_session.commit()
-      self.db_session.refresh(comment)
-      
-      return comment
+      # Create the comment and bump the counters in the same transaction
+      comment = self.comment_repository.create(data, parent)
+      await self.blog_repository.adjust_counters(data.blog_id, comment_count=1)
+      if data.parent_id:
+        await self.comment_repository.adjust_counters(data.parent_id, reply_count=1)
+
+      await self.db_session.commit()
+
+      # The blog's comment_count changed
+      await blog_cache.invalidate(data.blog_id)
+      await trending.bump(data.blog_id, "comment")
+      await self.count_service.invalidate(*self._count_keys(comment))
+      return await self.get_comment_or_404(comment.id, with_relations=True)
     except HTTPException as http_exc:
-      self.db_session.rollback()
+      await self.db_session.rollback()
       raise http_exc
     except Exception as e:
       print(f"Error creating comment: {e}")
-      self.db_session.rollback()
+      await self.db_session.rollback()
       raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
   
-  def get_comments(self, limit: int = 10, offset: int = 0) -> tuple:
+  async def get_comments(
+    self,
+    limit: int = 10,
+    offset: int = 0,
+    cursor: str | None = None,
+    count_mode: CountMode = CountMode.EXACT,
+  ) -> Page:
     """Get a paginated list of comments."""
-    comments, total = self.comment_repository.get_all_top_level_comments(limit, offset)
-    items = [] 
-    for comment, reply_count in comments:
-      comment.__dict__['reply_count'] = reply_count
-      items.append(comment)
-
-    return items, total
+    page = await self.comment_repository.get_all_top_level_comments(limit, offset, cursor)
+    return await self.count_service.with_total(
+      page,
+      self.comment_repository.query_all_top_level_comments(),
+      "comments",
+      count_mode,
+    )
 
-  def get_blog_comments(self, blog_id: str, limit: int = 10, offset: int = 0) -> tuple:
+  async def get_blog_comments(
+    self,
+    blog_id: str,
+    limit: int = 10,
+    offset: int = 0,
+    cursor: str | None = None,
+    count_mode: CountMode = CountMode.EXACT,
+  ) -> Page:
     """Get comments for a specific blog post."""
-    comments, total = self.comment_repository.get_top_level_comments(blog_id, limit, offset)
-    items = []
-    for comment, reply_count in comments:
-      comment.__dict__['reply_count'] = reply_count
-      items.append(comment)
-
-    return items, total
+    page = await self.comment_repository.get_top_level_comments(blog_id, limit, offset, cursor)
+    return await self.count_service.with_total(
+      page,
+      self.comment_repository.query_top_level_comments(blog_id),
+      count_key("comments:blog", blog_id),
+      count_mode,
+    )
 
-  def get_comment_or_404(self, comment_id: str) -> Comment:
+  async def get_comment_or_404(self, comment_id: str, with_relations: bool = False) -> Comment:
     """Get a comment by its ID."""
-    comment, reply_count = self.comment_repository.get_by_id(comment_id)
+    loaders = COMMENT_RESPONSE_LOADERS if with_relations else ()
+    comment = await self.comment_repository.get_by_id(comment_id, loaders)
 
     if not comment:
       raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found")
     
-    comment.__dict__['reply_count'] = reply_count
-    
     return comment
   
-  def get_comment_replies(self, comment_id: str, limit: int = 10, offset: int = 0) -> tuple:
+  async def get_comment_validator(self, comment_id: str) -> Validator:
+    """Get the ETag and Last-Modified of a comment without loading it."""
+    version = await self.comment_repository.get_version(comment_id)
+    if not version:
+      raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found")
+
+    updated_at, activity_at, _, _, author_updated_at = version
+    return make_validator(str(comment_id), *version, timestamps=[updated_at, activity_at, author_updated_at])
+
+  async def get_comment_replies(self, comment_id: str, limit: int = 10, offset: int = 0, cursor: str | None = None) -> Page:
     """Get replies for a specific comment."""
-    comment = self.get_comment_or_404(comment_id)
-    replies, total = self.comment_repository.get_comment_replies(
+    comment = await self.get_comment_or_404(comment_id)
+    page = await self.comment_repository.get_comment_replies(
       comment_id=comment.id,
       limit=limit,
-      offset=offset
+      offset=offset,
+      cursor=cursor,
     )
-    
-    items = [] 
-    for reply, reply_count in replies:
-      reply.__dict__['reply_count'] = reply_count
-      items.append(reply)
 
-    return items, total
+    # The parent's reply counter is already an exact total
+    return page._replace(total=comment.reply_count)
+
+  async def get_comment_thread(self, comment_id: str, max_depth: int | None = None, per_level: int = 10) -> Comment:
+    """
+    Get a comment with its replies nested under `replies`, down to `max_depth` levels.
+
+    Each comment keeps at most `per_level` replies, its reply_count tells
+    whether more exist.
+    """
+    comment = await self.get_comment_or_404(comment_id, with_relations=True)
+    descendants = await self.comment_repository.get_subtree(comment, max_depth, per_level)
 
-  def update_comment(
+    # Attach the loaded replies without touching the (lazy=raise) relationship
+    children = {comment.id: []}
+    for reply in descendants:
+      children[reply.id] = []
+      if reply.parent_id in children:
+        children[reply.parent_id].append(reply)
+
+    nodes = {reply.id: reply for reply in descendants}
+    nodes[comment.id] = comment
+    for node_id, replies in children.items():
+      set_committed_value(nodes[node_id], "replies", replies)
+
+    return comment
+
+  async def update_comment(
     self,
     comment_id: str,
     data: CommentUpdate,
@@ -105,10 +183,7 @@ class CommentService:
       # Validate the comment data
       self._validate_comment_data(data)
       
-      # Validate references
-      self._validate_comment_reference(data.blog_id, author_id, data.parent_id)
-      
-      comment = self.get_comment_or_404(comment_id)
+      comment = await self.get_comment_or_404(comment_id)
       if str(comment.author_id) != author_id:
         raise HTTPException(
           status_code=status.HTTP_403_FORBIDDEN,
@@ -117,13 +192,20 @@ class CommentService:
       
       # Process the comment data
       data = self._process_comment_data(data)
+
+      # Only the content can change, the references have to match the comment as it is
+      for key in ("author_id", "blog_id", "parent_id"):
+        if getattr(data, key) != getattr(comment, key):
+          raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{key} of a comment cannot be changed"
+          )
       
       # Update the comment
-      updated_comment = self.comment_repository.update(comment_id, data)
-      self.db_session.commit()
-      self.db_session.refresh(updated_comment)
+      updated_comment = await self.comment_repository.update(comment_id, data)
+      await self.db_session.commit()
 
-      return updated_comment
+      return await self.get_comment_or_404(updated_comment.id, with_relations=True)
 
     except HTTPException as http_exc:
       raise http_exc
@@ -131,69 +213,133 @@ class CommentService:
       print(f"Error updating comment: {e}")
       raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
   
-  def delete_comment(self, comment_id: str, author_id: str) -> None:
+  async def delete_comment(self, comment_id: str, author_id: str) -> None:
     """Delete a comment."""
     try:
-      comment = self.get_comment_or_404(comment_id)
-      if str(comment.get("author_id")) != author_id:
+      comment = await self.get_comment_or_404(comment_id)
+      if str(comment.author_id) != author_id:
         raise HTTPException(
           status_code=status.HTTP_403_FORBIDDEN,
           detail="You do not have permission to delete this comment"
         )
-      self.comment_repository.delete(comment_id)
-      self.db_session.commit()
+
+      # Replies are removed with the comment, so the blog loses the whole subtree
+      subtree_size = await self.comment_repository.count_subtree(comment)
+      await self.blog_repository.adjust_counters(comment.blog_id, comment_count=-subtree_size)
+      if comment.parent_id:
+        await self.comment_repository.adjust_counters(comment.parent_id, reply_count=-1)
+
+      count_keys = self._count_keys(comment)
+      await self.comment_repository.delete(comment)
+      await self.db_session.commit()
+
+      await blog_cache.invalidate(comment.blog_id)
+      await self.count_service.invalidate(*count_keys)
 
     except HTTPException as http_exc:
-      self.db_session.rollback()
+      await self.db_session.rollback()
       raise http_exc
     except Exception as e:
       print(f"Error deleting comment: {e}")
-      self.db_session.rollback()
+      await self.db_session.rollback()
       raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
   
-  def toggle_comment_like(self, comment_id: str, user: User) -> Comment:
+  async def toggle_comment_like(self, comment_id: str, user: Principal) -> LikeStatus:
     """Toggle like status for a comment."""   
     try:
-      comment = self.get_comment_or_404(comment_id)
-      
-      if user in comment.liked_by:
-        self.comment_repository.remove_user_like(comment, user)
-      else:
-        self.comment_repository.add_user_like(comment, user)
-      
-      self.db_session.commit()
-      self.db_session.refresh(comment)
-      return comment 
+      if settings.LIKE_WRITE_BEHIND:
+        return await self._buffer_comment_like(comment_id, user, liked=None)
+
+      unliked = await self.comment_repository.remove_like(comment_id, user.id)
+      if unliked:
+        return await self._finish_comment_like(comment_id, liked=False, changed=True)
+
+      # Nothing inserted means the comment is missing, or a concurrent request liked it first
+      changed = await self.comment_repository.add_like(comment_id, user.id)
+      return await self._finish_comment_like(comment_id, liked=True, changed=changed)
     except HTTPException as http_exc:
+      await self.db_session.rollback()
       raise http_exc
     except Exception as e:
+      await self.db_session.rollback()
       print(f"Error toggling like status: {e}")
       raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+  async def set_comment_like(self, comment_id: str, user: Principal, liked: bool) -> LikeStatus:
+    """Like or unlike a comment, repeating the same request changes nothing."""
+    try:
+      if settings.LIKE_WRITE_BEHIND:
+        return await self._buffer_comment_like(comment_id, user, liked=liked)
+
+      if liked:
+        changed = await self.comment_repository.add_like(comment_id, user.id)
+      else:
+        changed = await self.comment_repository.remove_like(comment_id, user.id)
+
+      return await self._finish_comment_like(comment_id, liked=liked, changed=changed)
+    except HTTPException as http_exc:
+      await self.db_session.rollback()
+      raise http_exc
+    except Exception as e:
+      await self.db_session.rollback()
+      print(f"Error setting like status: {e}")
+      raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+  async def _buffer_comment_like(self, comment_id: str, user: Principal, liked: bool | None) -> LikeStatus:
+    """Record the like in Redis only, the like buffer writes it to comment_likes later."""
+    like_status = await like_buffer.record("comment", comment_id, user.id, liked, self.comment_repository.get_like_state)
+    if like_status is None:
+      raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found")
+    return like_status
+
+  async def _finish_comment_like(self, comment_id: str, liked: bool, changed: bool) -> LikeStatus:
+    """Move the like counter when the like row changed, and report the resulting state."""
+    if changed:
+      counters = await self.comment_repository.adjust_counters(comment_id, like_count=1 if liked else -1)
+      like_count = counters.like_count
+    else:
+      like_count = await self.comment_repository.get_like_count(comment_id)
+      if like_count is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found")
+
+    await self.db_session.commit()
+    return LikeStatus(liked=liked, like_count=like_count)
+
   def _validate_comment_data(self, data: CommentCreate | CommentUpdate) -> None:
     """Validate the comment data."""
-    for key, value in data.model_dump().items():
+    for key, value in data.model_dump(exclude={"parent_id"}).items():
       if value is None:
         raise HTTPException(
           status_code=status.HTTP_400_BAD_REQUEST,
           detail=f"{key} is required"
         )
 
-  def _validate_comment_reference(self, blog_id: str, author_id: str, parent_id: str = None) -> None:
-    """Validate the blog and author references for the comment."""
-    blog = self.blog_service.get_blog_or_404(blog_id)
-    user = self.user_service.get_user_or_404(author_id)
+  async def _validate_comment_reference(self, blog_id: str, author_id: str, parent_id: str = None, author: Principal | None = None) -> Comment | None:
+    """Validate the blog and author references for the comment, returning the parent comment."""
+    blog = await self.blog_service.get_blog_or_404(blog_id)
+
+    # The authenticated user is already known to exist
+    if not author or str(author.id) != str(author_id):
+      user = await self.user_service.get_user_or_404(author_id)
 
     parent_comment = None
     if parent_id:
-      parent_comment = self.get_comment_or_404(parent_id)
+      parent_comment = await self.get_comment_or_404(parent_id)
 
       if str(parent_comment.blog_id) != blog_id:
         raise HTTPException(
           status_code=status.HTTP_400_BAD_REQUEST,
           detail="Parent comment does not belong to the specified blog"
         )
+
+    return parent_comment
   
+  def _count_keys(self, comment: Comment) -> list[str]:
+    """Cached totals that change when this comment is created or deleted."""
+    if comment.parent_id:
+      return []
+    return ["comments", count_key("comments:blog", comment.blog_id)]
+
   def _process_comment_data(self, data: CommentCreate | CommentUpdate) -> CommentCreate | CommentUpdate:
     """Process and convert comment data to the appropriate types."""
     data.author_id = UUID(data.author_id) if isinstance(data.author_id, str) else data.author_id
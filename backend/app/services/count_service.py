@@ -0,0 +1,107 @@
+from enum import Enum
+from sqlalchemy import Dialect, Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+import json
+
+from app.core.config import settings
+from app.core.container import container
+from app.core.pagination import Page
+from app.services.redis_service import RedisService
+
+class CountMode(str, Enum):
+  """How the total of a paginated listing is obtained."""
+  EXACT = "exact"
+  CACHED = "cached"
+  ESTIMATED = "estimated"
+
+def count_key(name: str, owner_id: str | UUID | None = None) -> str:
+  """
+  Key of a cached total, e.g. "blogs" or "blogs:user:<id>".
+
+  Ids are put in canonical UUID form, so a total read through a path
+  parameter is the same key its invalidation clears.
+  """
+  return name if owner_id is None else f"{name}:{UUID(str(owner_id))}"
+
+def explain_sql(stmt: Select, dialect: Dialect) -> str:
+  """
+  EXPLAIN (FORMAT JSON) of `stmt` as plain SQL.
+
+  Parameters are rendered inline, through their types' literal processing.
+  Passing the compiled parameters to the driver would skip the bind
+  processors and leave expanding IN parameters unrendered.
+  """
+  compiled = stmt.order_by(None).compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+  return f"EXPLAIN (FORMAT JSON) {compiled}"
+
+class CountService:
+  def __init__(self, db_session: AsyncSession):
+    self.db_session = db_session
+    self.redis_service: RedisService = container.redis_service
+    self.cache_ttl = settings.COUNT_CACHE_TTL
+    self.estimate_threshold = settings.COUNT_ESTIMATE_THRESHOLD
+
+  async def count(self, stmt: Select, key: str, mode: CountMode = CountMode.EXACT) -> tuple[int, bool]:
+    """Count the rows of `stmt`, returning the total and whether it is exact."""
+    if mode == CountMode.CACHED:
+      return await self._cached_count(stmt, key), True
+
+    if mode == CountMode.ESTIMATED:
+      estimate = await self._estimated_count(stmt)
+
+      # Small tables are cheap to count, and planner estimates are least reliable there
+      if estimate is not None and estimate >= self.estimate_threshold:
+        return estimate, False
+
+    return await self._exact_count(stmt), True
+
+  async def with_total(self, page: Page, stmt: Select, key: str, mode: CountMode = CountMode.EXACT) -> Page:
+    """Return `page` with its total filled in using the given mode."""
+    total, exact = await self.count(stmt, key, mode)
+    return page._replace(total=total, total_is_exact=exact)
+
+  async def invalidate(self, *keys: str):
+    """Drop cached totals after rows were created or deleted."""
+    try:
+      await self.redis_service.delete_many(f"count:{key}" for key in keys)
+    except Exception as e:
+      print(f"Error invalidating counts {keys}: {e}")
+
+  async def _exact_count(self, stmt: Select) -> int:
+    """Run a COUNT(*) over `stmt`."""
+    return await self.db_session.scalar(
+      select(func.count()).select_from(stmt.order_by(None).subquery())
+    )
+
+  async def _cached_count(self, stmt: Select, key: str) -> int:
+    """Read the total from Redis, counting and storing it on a miss."""
+    try:
+      cached = await self.redis_service.get(f"count:{key}")
+      if cached is not None:
+        return int(cached)
+    except Exception as e:
+      print(f"Error reading cached count {key}: {e}")
+
+    total = await self._exact_count(stmt)
+
+    try:
+      await self.redis_service.set(f"count:{key}", str(total), ex=self.cache_ttl)
+    except Exception as e:
+      print(f"Error caching count {key}: {e}")
+
+    return total
+
+  async def _estimated_count(self, stmt: Select) -> int | None:
+    """Ask the Postgres planner for a row estimate; None on other databases."""
+    dialect = self.db_session.get_bind().dialect
+    if dialect.name != "postgresql":
+      return None
+
+    connection = await self.db_session.connection()
+    result = await connection.exec_driver_sql(explain_sql(stmt, dialect))
+    plan = result.scalar()
+    if isinstance(plan, str):
+      plan = json.loads(plan)
+
+    return int(plan[0]["Plan"]["Plan Rows"])
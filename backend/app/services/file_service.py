@@ -1,27 +1,178 @@
-from fastapi import UploadFile
+from fastapi import HTTPException, UploadFile, status
 from pathlib import Path
-from PIL import Image
-import io
+from PIL import Image, ImageOps, UnidentifiedImageError
+import hashlib
+import magic
+import math
+import os
+import re
+import shutil
+import tempfile
+
+from app.core.config import settings
+
+AVATAR_QUALITY = 85
+
+# Sniffed type of an accepted avatar upload and the only Pillow format it is opened as
+AVATAR_FORMATS = {
+  "image/jpeg": "JPEG",
+  "image/png": "PNG",
+  "image/webp": "WEBP",
+  "image/gif": "GIF",
+}
+
+CHUNK_SIZE = 64 * 1024
+
+# Avatar versions are named after a hash of their content, the file at such a URL never changes
+CONTENT_ADDRESSED = re.compile(r"^avatars/[^/]+/[0-9a-f]{20}/[^/]+$")
+
+def render_avatar(source: str, directory: str, sizes: tuple[int, ...]):
+  """
+  Decode an uploaded image at reduced resolution and write a square WebP per size.
+
+  Runs in an avatar worker process. The staged upload is removed either way.
+  """
+  try:
+    paths = [Path(directory, f"{size}.webp") for size in sizes]
+    if all(path.exists() for path in paths):
+      # Same content as a version rendered before, keep it from being collected
+      os.utime(directory)
+      return
+
+    largest = max(sizes)
+    with Image.open(source) as image:
+      # JPEGs decode straight to the smallest 1/2, 1/4 or 1/8 scale still covering the largest size
+      image.draft("RGB", (largest, largest))
+
+      # Shrink so the short side just covers the largest size, other formats reduce here
+      scale = largest / min(image.size)
+      if scale < 1:
+        image.thumbnail((math.ceil(image.width * scale), math.ceil(image.height * scale)), reducing_gap=2.0)
+
+      image = ImageOps.exif_transpose(image).convert("RGBA")
+      image = ImageOps.fit(image, (largest, largest), Image.Resampling.LANCZOS)
+
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    for size in sorted(sizes, reverse=True):
+      rendition = image if size == largest else image.resize((size, size), Image.Resampling.LANCZOS)
+
+      # Written aside and renamed, so a size is never served half written
+      path = Path(directory, f"{size}.webp")
+      rendition.save(path.with_suffix(".tmp"), format="webp", quality=AVATAR_QUALITY)
+      os.replace(path.with_suffix(".tmp"), path)
+  finally:
+    Path(source).unlink(missing_ok=True)
 
 class FileService:
   def __init__(self):
     self.upload_folder = "app/static"
-  
-  def save_avatar(self, input: UploadFile, user_id: str) -> str:
-    file_directory = Path(f"{self.upload_folder}/avatars")
-    file_directory.mkdir(parents=True, exist_ok=True)
+    self.avatar_sizes = tuple(settings.AVATAR_SIZES)
+    self.max_bytes = settings.AVATAR_MAX_BYTES
+    self.max_pixels = settings.AVATAR_MAX_PIXELS
+    # Uploads wait for the avatar workers outside the served folder
+    self.staging_folder = Path(tempfile.gettempdir(), "blogsite-avatar-uploads")
+
+  def stage_upload(self, input: UploadFile) -> tuple[Path, str]:
+    """
+    Copy an upload in chunks to a file the avatar workers can read.
+
+    The type is sniffed from the first chunk, the copy stops as soon as it goes
+    over `max_bytes` and the pixel count is read from the header, all before
+    anything is decoded. Returns the staged file and the version its avatar
+    gets, a hash of the upload and of how it is rendered.
+    """
+    chunk = input.file.read(CHUNK_SIZE)
+    content_type = magic.from_buffer(chunk[:2048], mime=True)
+    if content_type not in AVATAR_FORMATS:
+      raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail=f"Avatars must be one of {', '.join(AVATAR_FORMATS)}, not {content_type}",
+      )
+
+    self.staging_folder.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256(f"webp:{AVATAR_QUALITY}:{self.avatar_sizes}:".encode())
+
+    fd, path = tempfile.mkstemp(dir=self.staging_folder)
+    try:
+      with os.fdopen(fd, "wb") as staged:
+        size = 0
+        while chunk:
+          size += len(chunk)
+          if size > self.max_bytes:
+            raise HTTPException(
+              status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+              detail=f"Avatars must be at most {self.max_bytes} bytes",
+            )
+          digest.update(chunk)
+          staged.write(chunk)
+          chunk = input.file.read(CHUNK_SIZE)
+
+      # Only parses the header, decoding is left to the workers
+      try:
+        with Image.open(path, formats=[AVATAR_FORMATS[content_type]]) as image:
+          pixels = image.width * image.height
+      except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image file")
+
+      if pixels > self.max_pixels:
+        raise HTTPException(
+          status_code=status.HTTP_400_BAD_REQUEST,
+          detail=f"Avatars must be at most {self.max_pixels} pixels",
+        )
+    except Exception:
+      Path(path).unlink(missing_ok=True)
+      raise
+
+    return Path(path), digest.hexdigest()[:20]
+
+  def avatar_directory(self, user_id: str, version: str) -> Path:
+    """Where every size of one avatar version is written."""
+    return Path(self.upload_folder, "avatars", str(user_id), version)
+
+  def avatar_url(self, user_id: str, version: str, size: int | None = None) -> str:
+    """
+    URL of one size of an avatar version, the largest by default.
+
+    Sizes sit side by side, so `/static/avatars/<user>/<version>/<size>.webp`
+    with any of AVATAR_SIZES serves the same avatar at that size.
+    """
+    return f"/static/avatars/{user_id}/{version}/{size or max(self.avatar_sizes)}.webp"
+
+  def collect_avatars(self, referenced_urls: set[str], untouched_since: float) -> int:
+    """
+    Delete avatar files no URL in `referenced_urls` points at and not written since `untouched_since`.
+
+    Covers replaced avatar versions, avatars from before versioning and
+    staged uploads a worker never picked up. Returns how many were deleted.
+    """
+    avatars = Path(self.upload_folder, "avatars")
+    referenced = {Path(self.upload_folder, url.removeprefix("/static/")) for url in referenced_urls}
+    # Any size of a version keeps the whole version
+    referenced |= {path.parent for path in referenced}
 
-    # Extract file contents
-    contents = input.file.read()
-    
-    # Open image from bytes using pillow
-    image = Image.open(io.BytesIO(contents))
-    image = image.convert("RGBA")
+    def expired(path: Path) -> bool:
+      return path not in referenced and path.stat().st_mtime < untouched_since
 
-    # Generate unique filename
-    unique_filename = f"{user_id}_avatar.webp"
-    file_path = f"{file_directory}/{unique_filename}"
+    removed = 0
+    for entry in avatars.iterdir() if avatars.is_dir() else ():
+      if entry.is_file() and expired(entry):
+        entry.unlink(missing_ok=True)
+        removed += 1
+      elif entry.is_dir():
+        for version in entry.iterdir():
+          if version.is_dir() and expired(version):
+            shutil.rmtree(version, ignore_errors=True)
+            removed += 1
+        if not any(entry.iterdir()):
+          # A worker may be creating a version in it right now
+          try:
+            entry.rmdir()
+          except OSError:
+            pass
 
-    image.save(file_path, format="webp", quality=85)
+    for staged in self.staging_folder.iterdir() if self.staging_folder.is_dir() else ():
+      if staged.stat().st_mtime < untouched_since:
+        staged.unlink(missing_ok=True)
+        removed += 1
 
-    return f"/static/avatars/{unique_filename}"
+    return removed
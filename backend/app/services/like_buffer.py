@@ -0,0 +1,187 @@
+from typing import Awaitable, Callable
+from sqlalchemy import Row
+import uuid
+
+from app.core.config import settings
+from app.core.container import container
+from app.core.periodic import PeriodicTask
+from app.db.base import SessionLocal
+from app.repositories.blog_repository import BlogRepository
+from app.repositories.comment_repository import CommentRepository
+from app.schemas.shared_schema import LikeStatus
+from app.services.blog_cache import blog_cache
+from app.services.trending import trending
+
+# Repository owning the like table of each kind of target
+LIKE_REPOSITORIES = {
+  "blog": BlogRepository,
+  "comment": CommentRepository,
+}
+
+DIRTY_KEY = "likes:dirty"
+INFLIGHT_KEY = "likes:inflight"
+LOCK_KEY = "likes:flush:lock"
+
+class LikeBuffer:
+  """
+  Write-behind buffer for likes, used when LIKE_WRITE_BEHIND is on.
+
+  Each target ("blog:<id>" or "comment:<id>") has, in Redis:
+  - `likes:<target>:pending`, a hash of user id to their latest intent, "1" like or "0" unlike
+  - `likes:<target>:flushing`, the intents a flush is currently applying
+  - `likes:<target>:count`, the live like count served to clients
+
+  Requests only touch Redis, plus one read of the like tables when Redis
+  does not know the user's state yet. The flusher periodically renames
+  pending hashes to flushing, applies them in one database transaction
+  and then drops them. Applying intents is idempotent, so flushing hashes
+  left behind by a crash are simply applied again on the next run.
+  """
+  def __init__(self):
+    self.redis_service = container.redis_service
+    self.interval = settings.LIKE_FLUSH_INTERVAL
+    self.batch_size = settings.LIKE_FLUSH_BATCH_SIZE
+    self.count_ttl = settings.LIKE_COUNT_TTL
+    self._flusher = PeriodicTask("flushing buffered likes", self.drain, self.interval, run_on_stop=True)
+
+  async def record(
+    self,
+    kind: str,
+    target_id: str,
+    user_id: str,
+    liked: bool | None,
+    load_state: Callable[[str, str], Awaitable[Row | None]],
+  ) -> LikeStatus | None:
+    """
+    Record a like (True), unlike (False) or toggle (None) and return the resulting state.
+
+    `load_state` is the repository's `get_like_state`, used when Redis does not
+    know the user's state or the count. Returns None when the target does not exist.
+    """
+    target = f"{kind}:{target_id}"
+    pending, flushing, count = (f"likes:{target}:{name}" for name in ("pending", "flushing", "count"))
+    user = str(user_id)
+
+    async def apply(pipe) -> LikeStatus | None:
+      intent = await pipe.hget(pending, user) or await pipe.hget(flushing, user)
+      like_count = await pipe.get(count)
+
+      state = None
+      if intent is None or like_count is None:
+        state = await load_state(target_id, user_id)
+        if state is None:
+          pipe.multi()
+          return None
+
+      current = intent == b"1" if intent is not None else state.liked
+      like_count = int(like_count) if like_count is not None else state.like_count
+      wanted = not current if liked is None else liked
+
+      pipe.multi()
+      if wanted != current:
+        like_count += 1 if wanted else -1
+        pipe.hset(pending, user, "1" if wanted else "0")
+        pipe.sadd(DIRTY_KEY, target)
+      pipe.set(count, like_count, ex=self.count_ttl)
+
+      return LikeStatus(liked=wanted, like_count=like_count)
+
+    # Retried whenever a concurrent request or the flusher changes the target
+    return await self.redis_service.transaction(apply, pending, flushing, count)
+
+  async def flush(self) -> int:
+    """Apply buffered intents to the database and return how many targets were written."""
+    token = uuid.uuid4().hex
+    redis = self.redis_service.redis
+
+    # One flusher at a time across every worker
+    if not await redis.set(LOCK_KEY, token, nx=True, ex=max(60, int(self.interval * 10))):
+      return 0
+
+    try:
+      # Replay whatever a crashed flush left behind before taking new intents
+      flushed = await self._apply_inflight()
+
+      targets = [target.decode() for target in await redis.srandmember(DIRTY_KEY, self.batch_size)]
+      if not targets:
+        return flushed
+
+      async with redis.pipeline(transaction=True) as pipe:
+        for target in targets:
+          pipe.srem(DIRTY_KEY, target)
+          pipe.sadd(INFLIGHT_KEY, target)
+          pipe.rename(f"likes:{target}:pending", f"likes:{target}:flushing")
+        # A target whose intents were already moved has no pending hash, RENAME then fails harmlessly
+        await pipe.execute(raise_on_error=False)
+
+      return flushed + await self._apply_inflight()
+    finally:
+      if await redis.get(LOCK_KEY) == token.encode():
+        await redis.delete(LOCK_KEY)
+
+  async def _apply_inflight(self) -> int:
+    """Write every in-flight target's intents in one transaction, then forget them."""
+    redis = self.redis_service.redis
+    targets = [target.decode() for target in await redis.smembers(INFLIGHT_KEY)]
+    if not targets:
+      return 0
+
+    async with redis.pipeline(transaction=False) as pipe:
+      for target in targets:
+        pipe.hgetall(f"likes:{target}:flushing")
+      intents = await pipe.execute()
+
+    blog_deltas = {}
+    async with SessionLocal() as db_session:
+      try:
+        for target, target_intents in zip(targets, intents):
+          kind, target_id = target.split(":", 1)
+          repository = LIKE_REPOSITORIES[kind](db_session)
+
+          likes = [uuid.UUID(user.decode()) for user, intent in target_intents.items() if intent == b"1"]
+          unlikes = [uuid.UUID(user.decode()) for user, intent in target_intents.items() if intent == b"0"]
+
+          # Row counts make a replay a no-op, the counter only moves by what actually changed
+          delta = 0
+          if likes:
+            delta += await repository.add_likes(target_id, likes)
+          if unlikes:
+            delta -= await repository.remove_likes(target_id, unlikes)
+          if delta:
+            await repository.adjust_counters(target_id, like_count=delta)
+          if kind == "blog":
+            blog_deltas[target_id] = delta
+
+        await db_session.commit()
+      except Exception:
+        await db_session.rollback()
+        raise
+
+    async with redis.pipeline(transaction=True) as pipe:
+      pipe.delete(*(f"likes:{target}:flushing" for target in targets))
+      pipe.srem(INFLIGHT_KEY, *targets)
+      await pipe.execute()
+
+    if blog_deltas:
+      await blog_cache.invalidate(*blog_deltas)
+    for blog_id, delta in blog_deltas.items():
+      if delta:
+        await trending.bump(blog_id, "like", delta)
+    return len(targets)
+
+  async def drain(self) -> int:
+    """Flush until nothing is buffered and return how many targets were written."""
+    total = 0
+    while flushed := await self.flush():
+      total += flushed
+    return total
+
+  def start(self):
+    """Start flushing every `interval` seconds, the first run replays anything left by a previous one."""
+    self._flusher.start()
+
+  async def stop(self):
+    """Stop the background flusher and write what is still buffered."""
+    await self._flusher.stop()
+
+like_buffer = LikeBuffer()
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import NamedTuple
+from uuid import UUID
+import json
+import time
+
+from app.core.config import settings
+from app.core.container import container
+from app.models.user import User
+
+class Principal(NamedTuple):
+  """
+  The authenticated user, as the columns needed to act as them.
+
+  Not a User: it is never attached to a session, so nothing can lazy-load
+  through it. Code that needs more, such as the password hash, loads the
+  row by id. The password hash never leaves the database.
+  """
+  id: UUID
+  email: str
+  first_name: str
+  last_name: str
+  profile_img: str | None
+  created_at: datetime
+  updated_at: datetime
+
+  @classmethod
+  def from_user(cls, user: User) -> "Principal":
+    return cls(**{column: getattr(user, column) for column in cls._fields})
+
+class PrincipalCache:
+  """
+  TTL-bounded LRU of authenticated users, keyed by user id.
+
+  The in-process tier is checked first. When `use_redis` is set, misses fall
+  back to Redis so that workers share entries. Entries written by another
+  process can outlive an invalidation by at most `ttl`.
+  """
+  def __init__(self, maxsize: int, ttl: timedelta, use_redis: bool = False):
+    self.maxsize = maxsize
+    self.ttl = ttl
+    self.use_redis = use_redis
+    self._entries: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+
+  async def get(self, user_id: str) -> Principal | None:
+    """Return a cached principal, or None on a miss."""
+    key = str(user_id)
+    entry = self._entries.get(key)
+    if entry:
+      expires_at, principal = entry
+      if expires_at > time.monotonic():
+        self._entries.move_to_end(key)
+        return principal
+      del self._entries[key]
+
+    if not self.use_redis:
+      return None
+
+    try:
+      cached = await container.redis_service.get(f"principal:{key}")
+    except Exception as e:
+      print(f"Error reading principal {key}: {e}")
+      return None
+
+    if cached is None:
+      return None
+
+    principal = self._decode(cached)
+    self._remember(key, principal)
+    return principal
+
+  async def set(self, principal: Principal):
+    """Cache the principal of a freshly loaded user."""
+    key = str(principal.id)
+    self._remember(key, principal)
+
+    if self.use_redis:
+      try:
+        await container.redis_service.set(f"principal:{key}", self._encode(principal), ex=self.ttl)
+      except Exception as e:
+        print(f"Error caching principal {key}: {e}")
+
+  async def invalidate(self, user_id: str):
+    """Forget a user after their row changed."""
+    key = str(user_id)
+    self._entries.pop(key, None)
+
+    if self.use_redis:
+      try:
+        await container.redis_service.delete(f"principal:{key}")
+      except Exception as e:
+        print(f"Error invalidating principal {key}: {e}")
+
+  def _remember(self, key: str, principal: Principal):
+    """Store an entry locally, evicting the least recently used one when full."""
+    self._entries[key] = (time.monotonic() + self.ttl.total_seconds(), principal)
+    self._entries.move_to_end(key)
+    while len(self._entries) > self.maxsize:
+      self._entries.popitem(last=False)
+
+  def _encode(self, principal: Principal) -> str:
+    return json.dumps({
+      **principal._asdict(),
+      "id": str(principal.id),
+      "created_at": principal.created_at.isoformat(),
+      "updated_at": principal.updated_at.isoformat(),
+    })
+
+  def _decode(self, raw: str) -> Principal:
+    data = json.loads(raw)
+    data["id"] = UUID(data["id"])
+    data["created_at"] = datetime.fromisoformat(data["created_at"])
+    data["updated_at"] = datetime.fromisoformat(data["updated_at"])
+    return Principal(**data)
+
+principal_cache = PrincipalCache(
+  maxsize=settings.PRINCIPAL_CACHE_SIZE,
+  ttl=settings.PRINCIPAL_CACHE_TTL,
+  use_redis=settings.PRINCIPAL_CACHE_REDIS,
+)
@@ -1,40 +1,174 @@
-from typing import Union
+from typing import Any, Awaitable, Callable, Iterable, Mapping, Union
 from datetime import timedelta
 import redis
+import redis.asyncio as aioredis
+from redis.asyncio.client import Pipeline
+import time
+
+from app.core.config import settings
+from app.core.server_timing import record_redis
+
+# One connection pool per process, shared by every RedisService instance
+redis_pool = aioredis.ConnectionPool.from_url(
+  settings.REDIS_URL,
+  max_connections=settings.REDIS_MAX_CONNECTIONS,
+  socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+  socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+)
+
+class TimedPipeline(Pipeline):
+  """Pipeline that counts its round trips towards the current request's Server-Timing."""
+  async def immediate_execute_command(self, *args, **options):
+    started = time.perf_counter()
+    try:
+      return await super().immediate_execute_command(*args, **options)
+    finally:
+      record_redis(started)
+
+  async def execute(self, raise_on_error: bool = True):
+    commands = len(self.command_stack)
+    started = time.perf_counter()
+    try:
+      return await super().execute(raise_on_error)
+    finally:
+      record_redis(started, commands)
+
+class TimedRedis(aioredis.Redis):
+  """Client that counts every command towards the current request's Server-Timing."""
+  async def execute_command(self, *args, **options):
+    started = time.perf_counter()
+    try:
+      return await super().execute_command(*args, **options)
+    finally:
+      record_redis(started)
+
+  def pipeline(self, transaction: bool = True, shard_hint: str | None = None) -> TimedPipeline:
+    return TimedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
 
 class RedisService:
   def __init__(self):
-    self.redis = redis.Redis(
-      host='redis',
-      port=6379,
-      db=0
-    )
+    self.redis = TimedRedis(connection_pool=redis_pool)
   
-  def set(self, key: str, value: str, ex: Union[int, timedelta] = None):
+  async def set(self, key: str, value: str, ex: Union[int, timedelta] = None):
     """Set a key-value pair in Redis with an optional expiration time."""
     try:
-      self.redis.set(key, value, ex=ex)
+      await self.redis.set(key, value, ex=ex)
     except redis.RedisError as e:
       raise Exception(f"Redis error: {str(e)}")
   
-  def get(self, key: str) -> Union[str, None]:
+  async def get(self, key: str) -> Union[str, None]:
     """Get a value by key from Redis."""
     try:
-      value = self.redis.get(key)
+      value = await self.redis.get(key)
       return value.decode('utf-8') if value else None
     except redis.RedisError as e:
       raise Exception(f"Redis error: {str(e)}")
   
-  def delete(self, key: str):
+  async def get_bytes(self, key: str) -> Union[bytes, None]:
+    """Get a raw value by key from Redis, without decoding it."""
+    try:
+      return await self.redis.get(key)
+    except redis.RedisError as e:
+      raise Exception(f"Redis error: {str(e)}")
+  
+  async def delete(self, key: str):
     """Delete a key from Redis."""
     try:
-      self.redis.delete(key)
+      await self.redis.delete(key)
     except redis.RedisError as e:
       raise Exception(f"Redis error: {str(e)}") 
 
-  def exists(self, key: str) -> bool:
+  async def exists(self, key: str) -> bool:
     """Check if a key exists in Redis."""
     try:
-      return self.redis.exists(key)
+      return await self.redis.exists(key)
     except redis.RedisError as e:
-      raise Exception(f"Redis error: {str(e)}")
\ No newline at end of file
+      raise Exception(f"Redis error: {str(e)}")
+
+  async def get_many(self, keys: Iterable[str]) -> list[Union[str, None]]:
+    """Get several values in one round trip, in the order of `keys`."""
+    keys = list(keys)
+    if not keys:
+      return []
+
+    try:
+      values = await self.redis.mget(keys)
+      return [value.decode('utf-8') if value else None for value in values]
+    except redis.RedisError as e:
+      raise Exception(f"Redis error: {str(e)}")
+
+  async def get_many_bytes(self, keys: Iterable[str]) -> list[Union[bytes, None]]:
+    """Get several raw values in one round trip, in the order of `keys`, without decoding them."""
+    keys = list(keys)
+    if not keys:
+      return []
+
+    try:
+      return await self.redis.mget(keys)
+    except redis.RedisError as e:
+      raise Exception(f"Redis error: {str(e)}")
+
+  async def set_many(self, mapping: Mapping[str, str], ex: Union[int, timedelta] = None):
+    """Set several key-value pairs in one pipelined round trip."""
+    if not mapping:
+      return
+
+    try:
+      async with self.redis.pipeline(transaction=False) as pipe:
+        for key, value in mapping.items():
+          pipe.set(key, value, ex=ex)
+        await pipe.execute()
+    except redis.RedisError as e:
+      raise Exception(f"Redis error: {str(e)}")
+
+  async def set_tagged(self, key: str, value: Union[str, bytes], tags: Iterable[str], ex: Union[int, timedelta] = None):
+    """Set a value and record its key under each tag, so `delete_tagged` can drop it later."""
+    try:
+      async with self.redis.pipeline(transaction=False) as pipe:
+        pipe.set(key, value, ex=ex)
+        for tag in tags:
+          pipe.sadd(tag, key)
+          if ex is not None:
+            pipe.expire(tag, ex)
+        await pipe.execute()
+    except redis.RedisError as e:
+      raise Exception(f"Redis error: {str(e)}")
+
+  async def delete_tagged(self, *tags: str):
+    """Delete every key recorded under the given tags, and the tags themselves."""
+    if not tags:
+      return
+
+    try:
+      async with self.redis.pipeline(transaction=False) as pipe:
+        for tag in tags:
+          pipe.smembers(tag)
+        members = await pipe.execute()
+
+      keys = set(tags).union(*members)
+      await self.redis.delete(*keys)
+    except redis.RedisError as e:
+      raise Exception(f"Redis error: {str(e)}")
+
+  async def delete_many(self, keys: Iterable[str]):
+    """Delete several keys in one round trip."""
+    keys = list(keys)
+    if not keys:
+      return
+
+    try:
+      await self.redis.delete(*keys)
+    except redis.RedisError as e:
+      raise Exception(f"Redis error: {str(e)}")
+
+  async def transaction(self, func: Callable[[Pipeline], Awaitable[Any]], *watches: str) -> Any:
+    """
+    Run `func` as an optimistic transaction over the watched keys and return its result.
+
+    `func` reads through the pipeline, calls `pipe.multi()` and queues its writes.
+    It is retried from the start whenever a watched key changes underneath it.
+    """
+    try:
+      return await self.redis.transaction(func, *watches, value_from_callable=True)
+    except redis.RedisError as e:
+      raise Exception(f"Redis error: {str(e)}")
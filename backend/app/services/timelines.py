@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, NamedTuple
+from sqlalchemy import Row
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.container import container
+from app.core.pagination import Cursor
+from app.models.blog import Blog
+
+# Lowest member of a timeline filled from the database, its score tells
+# whether older blogs exist beyond the window
+SENTINEL = ""
+WHOLE = -2
+TRUNCATED = -1
+
+LATEST_KEY = "timeline:latest"
+
+def author_key(author_id: str) -> str:
+  return f"timeline:user:{UUID(str(author_id))}"
+
+def to_score(created_at: datetime) -> int:
+  """created_at as integer microseconds, exact in a sorted set score."""
+  if created_at.tzinfo is None:
+    created_at = created_at.replace(tzinfo=timezone.utc)
+  return (created_at - datetime(1970, 1, 1, tzinfo=timezone.utc)) // timedelta(microseconds=1)
+
+class TimelinePage(NamedTuple):
+  """Blog ids of one page, newest first, and whether more exist in the paging direction."""
+  ids: list[str]
+  has_more: bool
+
+class Timelines:
+  """
+  Newest-first blog ids in capped Redis sorted sets: one with every blog
+  and one per author.
+
+  Scores are created_at in microseconds. Blogs created in the same
+  microsecond fall back to comparing ids, which is the order `paginate`
+  uses too. Only timelines filled from the database are trusted. Those
+  carry SENTINEL below every blog.
+
+  Pages inside the window are read from the set. Pages past it, or past
+  a cursor whose blog is gone, are left to SQL.
+  """
+  def __init__(self):
+    self.redis_service = container.redis_service
+    self.size = settings.TIMELINE_SIZE
+    self.ttl = settings.TIMELINE_TTL
+
+  async def add(self, blog: Blog):
+    """Put a new blog at the top of the latest and author timelines."""
+    try:
+      mapping = {str(blog.id): to_score(blog.created_at)}
+      await self._write([LATEST_KEY, author_key(blog.author_id)], mapping)
+    except Exception as e:
+      print(f"Error adding blog {blog.id} to timelines: {e}")
+
+  async def remove(self, blog_id: str, author_id: str | None = None):
+    """Drop a blog from the latest timeline, and its author's when known."""
+    keys = [LATEST_KEY] if author_id is None else [LATEST_KEY, author_key(author_id)]
+    try:
+      async with self.redis_service.redis.pipeline(transaction=False) as pipe:
+        for key in keys:
+          pipe.zrem(key, str(blog_id))
+        await pipe.execute()
+    except Exception as e:
+      print(f"Error removing blog {blog_id} from timelines: {e}")
+
+  async def page(
+    self,
+    limit: int,
+    offset: int = 0,
+    position: Cursor | None = None,
+    author_id: str | None = None,
+    load: Callable[[int], Awaitable[list[Row]]] | None = None,
+  ) -> TimelinePage | None:
+    """
+    One page of the latest or an author's timeline, like `paginate` would return it, or None when SQL has to answer.
+
+    `load(limit)` returns the (id, created_at) of the newest blogs. It fills the
+    timeline when it has not been filled from the database yet.
+    """
+    try:
+      key = LATEST_KEY if author_id is None else author_key(author_id)
+      sentinel, window = await self._read(key, limit, offset, position)
+      if sentinel is None and load is not None:
+        await self._fill(key, await load(self.size))
+        sentinel, window = await self._read(key, limit, offset, position)
+      return window
+    except Exception as e:
+      print(f"Error reading timeline of {author_id or 'all blogs'}: {e}")
+      return None
+
+  async def _read(
+    self,
+    key: str,
+    limit: int,
+    offset: int,
+    position: Cursor | None,
+  ) -> tuple[float | None, TimelinePage | None]:
+    """The sentinel's score (None when the timeline is not trusted) and the page, when the window covers it."""
+    redis = self.redis_service.redis
+    start = offset
+
+    if position is not None:
+      async with redis.pipeline(transaction=False) as pipe:
+        pipe.zscore(key, SENTINEL)
+        pipe.zrevrank(key, str(position.id))
+        pipe.zscore(key, str(position.id))
+        sentinel, rank, score = await pipe.execute()
+
+      # The cursor's blog left the window, or its timestamp does not match
+      if sentinel is None or rank is None or score != to_score(position.created_at):
+        return sentinel, None
+
+      if position.direction == "prev":
+        start = max(0, rank - limit)
+        ids = self._decode(await redis.zrevrange(key, start, rank - 1)) if rank > 0 else []
+        return sentinel, TimelinePage(ids, has_more=start > 0)
+      start = rank + 1
+
+    # One extra id tells whether another page exists
+    async with redis.pipeline(transaction=False) as pipe:
+      pipe.zscore(key, SENTINEL)
+      pipe.zrevrange(key, start, start + limit)
+      sentinel, members = await pipe.execute()
+
+    if sentinel is None:
+      return None, None
+
+    ids = self._decode(members)
+    if len(ids) > limit:
+      return sentinel, TimelinePage(ids[:limit], has_more=True)
+    # Running off the end of the window only means the end of the data when nothing was trimmed
+    return sentinel, TimelinePage(ids, has_more=False) if sentinel == WHOLE else None
+
+  @staticmethod
+  def _decode(members: list[bytes]) -> list[str]:
+    """Blog ids from sorted set members, without the sentinel."""
+    return [member.decode() for member in members if member != SENTINEL.encode()]
+
+  async def _fill(self, key: str, rows: list[Row]):
+    """Merge the newest blogs from the database into a timeline and mark it trusted."""
+    mapping = {str(blog_id): to_score(created_at) for blog_id, created_at in rows}
+    mapping[SENTINEL] = TRUNCATED if len(rows) >= self.size else WHOLE
+    await self._write([key], mapping)
+
+  async def _write(self, keys: list[str], mapping: dict[str, int]):
+    """Add members to timelines and trim each back to `size` blogs."""
+    redis = self.redis_service.redis
+    async with redis.pipeline(transaction=True) as pipe:
+      for key in keys:
+        pipe.zadd(key, mapping)
+        # Rank 0 is the sentinel, keep it and the newest `size` blogs
+        pipe.zremrangebyrank(key, 1, -(self.size + 1))
+        pipe.expire(key, self.ttl)
+      results = await pipe.execute()
+
+    # Once something was trimmed, older blogs exist beyond the window
+    for key, trimmed in zip(keys, results[1::3]):
+      if trimmed:
+        await redis.zadd(key, {SENTINEL: TRUNCATED}, xx=True, gt=True)
+
+timelines = Timelines()
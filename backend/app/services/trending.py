@@ -0,0 +1,120 @@
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+import math
+import time
+
+from app.core.config import settings
+from app.core.container import container
+from app.core.periodic import PeriodicTask, claim_interval
+from app.repositories.blog_repository import BlogRepository
+
+class TrendingIndex:
+  """
+  Blogs ranked by a time-decayed activity score, in a Redis sorted set.
+
+  Likes, comments and views add their weight to a blog's score as they
+  happen. Every `decay_interval` seconds one worker multiplies all scores by
+  the decay for the time elapsed since the previous pass, then prunes blogs
+  below `min_score` and keeps the best `max_size`.
+
+  `rebuild` recomputes the set from likes and comments in the database.
+  Views are not stored there, so they start again from zero.
+  """
+  def __init__(self, key: str = "trending:blogs"):
+    self.redis_service = container.redis_service
+    self.key = key
+    self.weights = {
+      "like": settings.TRENDING_LIKE_WEIGHT,
+      "comment": settings.TRENDING_COMMENT_WEIGHT,
+      "view": settings.TRENDING_VIEW_WEIGHT,
+    }
+    self.half_life = settings.TRENDING_HALF_LIFE
+    self.decay_interval = settings.TRENDING_DECAY_INTERVAL
+    self.min_score = settings.TRENDING_MIN_SCORE
+    self.max_size = settings.TRENDING_MAX_SIZE
+    self._decayer = PeriodicTask("decaying trending scores", self.decay, self.decay_interval, run_first=False)
+
+  async def bump(self, blog_id: str, event: str, count: int = 1):
+    """
+    Add `count` likes, comments or views ("like", "comment", "view") to a blog's score.
+
+    A negative count (unlikes) takes off the full weight while the like it
+    undoes has decayed, so the score is clamped at zero.
+    """
+    try:
+      member = str(UUID(str(blog_id)))
+      score = await self.redis_service.redis.zincrby(self.key, self.weights[event] * count, member)
+      if score < 0:
+        # GT never lowers a score, so a bump landing in between is kept
+        await self.redis_service.redis.zadd(self.key, {member: 0}, gt=True)
+    except Exception as e:
+      print(f"Error bumping trending score of blog {blog_id}: {e}")
+
+  async def remove(self, *blog_ids: str):
+    """Drop blogs from the ranking, e.g. after they were deleted."""
+    try:
+      await self.redis_service.redis.zrem(self.key, *(str(blog_id) for blog_id in blog_ids))
+    except Exception as e:
+      print(f"Error removing blogs {blog_ids} from trending: {e}")
+
+  async def top(self, limit: int, offset: int = 0) -> tuple[list[str], int]:
+    """Ids of the best scored blogs from `offset`, and how many blogs are ranked."""
+    async with self.redis_service.redis.pipeline(transaction=False) as pipe:
+      pipe.zrevrange(self.key, offset, offset + limit - 1)
+      pipe.zcard(self.key)
+      blog_ids, total = await pipe.execute()
+
+    return [blog_id.decode() for blog_id in blog_ids], total
+
+  async def decay(self) -> bool:
+    """Apply the decay accumulated since the last pass and prune, False when another worker just did."""
+    redis = self.redis_service.redis
+    if not await claim_interval(self.redis_service, f"{self.key}:decay:lock", self.decay_interval):
+      return False
+
+    now = time.time()
+    previous = await redis.set(f"{self.key}:decayed_at", now, get=True)
+    if previous is None:
+      return True
+
+    factor = 0.5 ** ((now - float(previous)) / self.half_life.total_seconds())
+    async with redis.pipeline(transaction=True) as pipe:
+      pipe.zunionstore(self.key, {self.key: factor})
+      pipe.zremrangebyscore(self.key, "-inf", f"({self.min_score}")
+      pipe.zremrangebyrank(self.key, 0, -(self.max_size + 1))
+      await pipe.execute()
+    return True
+
+  async def rebuild(self, db_session: AsyncSession) -> int:
+    """Recompute every score from the database and atomically swap it in, returns how many blogs are ranked."""
+    # Anything older than this has decayed below min_score, whatever its weight
+    horizon = self.half_life * math.log2(max(self.weights["like"], self.weights["comment"]) / self.min_score)
+    stmt = BlogRepository(db_session).query_trending_scores(
+      datetime.now(timezone.utc) - horizon,
+      self.half_life,
+      like_weight=self.weights["like"],
+      comment_weight=self.weights["comment"],
+    ).limit(self.max_size)
+
+    scores = {str(blog_id): score for blog_id, score in (await db_session.execute(stmt)).all() if score >= self.min_score}
+
+    async with self.redis_service.redis.pipeline(transaction=True) as pipe:
+      if scores:
+        pipe.zadd(f"{self.key}:rebuild", scores)
+        pipe.rename(f"{self.key}:rebuild", self.key)
+      else:
+        pipe.delete(self.key)
+      pipe.set(f"{self.key}:decayed_at", time.time())
+      await pipe.execute()
+    return len(scores)
+
+  def start(self):
+    """Start decaying every `decay_interval` seconds in the background."""
+    self._decayer.start()
+
+  async def stop(self):
+    """Stop the background decay."""
+    await self._decayer.stop()
+
+trending = TrendingIndex()
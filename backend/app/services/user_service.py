@@ -1,67 +1,138 @@
 from fastapi import HTTPException, status, UploadFile, Depends
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from functools import cached_property
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import Annotated
 
-from app.db.base import SessionDep
+from app.core.container import container
+from app.core.http_cache import Validator, make_validator
+from app.core.pagination import Page
+from app.db.base import SessionDep, SessionLocal
 from app.models.user import User
 from app.services.auth_service import AuthService
-from app.services.file_service import FileService
+from app.services.blog_cache import blog_cache
+from app.services.blog_service import BlogService
+from app.services.count_service import CountMode, CountService, count_key
+from app.services.file_service import FileService, render_avatar
+from app.services.principal_cache import Principal, principal_cache
 from app.schemas.user_schema import UserUpdate
 from app.repositories.user_respository import UserRepository
 from app.repositories.blog_repository import BlogRepository
+from app.repositories.comment_repository import CommentRepository
 
 class UserService:
-  def __init__(self, db_session: Session):
-    self.user_repository = UserRepository(db_session)
-    self.auth_service = AuthService(db_session)
-    self.blog_repository = BlogRepository(db_session)
-    self.file_service = FileService()
+  def __init__(self, db_session: AsyncSession):
+    self.file_service: FileService = container.file_service
     self.db_session = db_session
+
+  @cached_property
+  def user_repository(self) -> UserRepository:
+    return UserRepository(self.db_session)
+
+  @cached_property
+  def auth_service(self) -> AuthService:
+    return AuthService(self.db_session)
+
+  @cached_property
+  def blog_repository(self) -> BlogRepository:
+    return BlogRepository(self.db_session)
+
+  @cached_property
+  def comment_repository(self) -> CommentRepository:
+    return CommentRepository(self.db_session)
+
+  @cached_property
+  def blog_service(self) -> BlogService:
+    return BlogService(self.db_session)
+
+  @cached_property
+  def count_service(self) -> CountService:
+    return CountService(self.db_session)
     
-  def get_user_or_404(self, user_id: str, with_blogs: bool = False) -> User:
+  async def get_user_or_404(self, user_id: str, with_blogs: bool = False) -> User:
     """Retrieve a user by their ID."""
-    user = self.user_repository.get_by_id(user_id)
+    user = await self.user_repository.get_by_id(user_id)
 
-    if with_blogs:
-      blogs, total = self.blog_repository.get_by_user(user_id)
-      user.blogs = blogs
-      
     if not user:
       raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
+    if with_blogs:
+      # BlogSimple has no relationships, and the page is attached without
+      # loading (or orphaning) the rest of the collection
+      page = await self.blog_repository.get_by_user(user_id, loaders=())
+      set_committed_value(user, "blogs", page.items)
+
     return user
 
-  def get_user_blogs(self, user_id: str, limit: int = 5, offset: int = 0):
+  async def get_user_validator(self, user_id: str) -> Validator:
+    """Get the ETag and Last-Modified of a user and their blogs without loading them."""
+    version = await self.user_repository.get_version(user_id)
+    if not version:
+      raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    updated_at, _, blogs_updated_at = version
+    return make_validator(str(user_id), *version, timestamps=[updated_at, blogs_updated_at])
+
+  async def get_principal(self, user_id: str) -> Principal:
+    """Retrieve the authenticated user, from the principal cache when possible."""
+    principal = await principal_cache.get(user_id)
+    if principal is None:
+      principal = Principal.from_user(await self.get_user_or_404(user_id))
+      await principal_cache.set(principal)
+    return principal
+
+  async def get_user_blogs(
+    self,
+    user_id: str,
+    limit: int = 5,
+    offset: int = 0,
+    cursor: str | None = None,
+    count_mode: CountMode = CountMode.EXACT,
+  ) -> Page:
     """Retrieve all blogs by a specific user."""
-    return self.blog_repository.get_by_user(user_id, limit, offset)
+    page = await self.blog_service.get_timeline_page(limit, offset, cursor, author_id=user_id)
+    if page is None:
+      page = await self.blog_repository.get_by_user(user_id, limit, offset, cursor)
+    return await self.count_service.with_total(
+      page,
+      self.blog_repository.query_by_user(user_id),
+      count_key("blogs:user", user_id),
+      count_mode,
+    )
 
-  def update_user(self, current_user: User, user_id: str, user_data: UserUpdate) -> User:
+  async def update_user(self, current_user: Principal, user_id: str, user_data: UserUpdate) -> User:
     """Update user information."""
     try:
-      user = self.get_user_or_404(user_id)
+      user = await self.get_user_or_404(user_id)
       
       # Only allow the current user to update their own information
       if current_user.id != user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to update this user")
       
+      # Blogs and comments this user liked embed their profile
+      liked_blog_ids = await self._touch_liked_by(user.id)
+
       # Update user fields
-      updated_user = self.user_repository.update_info(user, user_data)
-      self.db_session.commit()
-      self.db_session.refresh(updated_user)
-      return updated_user
+      updated_user = await self.user_repository.update_info(user, user_data)
+      await self.db_session.commit()
+
+      # Cached blogs embed the profile of their author and likers
+      await blog_cache.invalidate_user(user_id)
+      await blog_cache.invalidate(*liked_blog_ids)
+
+      return await self.get_user_or_404(str(updated_user.id), with_blogs=True)
     except Exception as e:
-      self.db_session.rollback()
+      await self.db_session.rollback()
       raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
   
-  def update_user_avatar(self, current_user: User, user_id: str, profile_img: UploadFile) -> User:
-    """Update user avatar."""
+  async def update_user_avatar(self, current_user: Principal, user_id: str, profile_img: UploadFile) -> str:
+    """Accept a new avatar and render it in the background, returning the URL it will have once ready."""
     try:
       # Check if the user id and current user match
       if str(current_user.id) != user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to update this user's avatar")
       
-      print(f"Image Type: {profile_img.content_type}")
-      
       # Validate the uploaded file
       if (
         not profile_img
@@ -71,21 +142,58 @@ class UserService:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image file")
       
       # Get the user 
-      user = self.get_user_or_404(user_id)
-      
-      # Save the profile with user id as the filename 
-      avatar_url = self.file_service.save_avatar(profile_img, user_id)
-      
-      # Update the user's profile image URL
-      user.profile_img = avatar_url
-      self.db_session.commit()
-      self.db_session.refresh(user)
+      user = await self.get_user_or_404(user_id)
+
+      staged, version = await run_in_threadpool(self.file_service.stage_upload, profile_img)
+
+      # Versions are named after their content, the same image maps to the same URL
+      avatar_url = self.file_service.avatar_url(user.id, version)
+      if avatar_url == user.profile_img:
+        staged.unlink(missing_ok=True)
+        return avatar_url
+
+      try:
+        container.avatar_pool.submit(
+          render_avatar,
+          str(staged),
+          str(self.file_service.avatar_directory(user.id, version)),
+          self.file_service.avatar_sizes,
+          on_done=lambda: apply_avatar(user.id, avatar_url),
+        )
+      except HTTPException:
+        staged.unlink(missing_ok=True)
+        raise
 
-      return user
+      return avatar_url
+    except HTTPException as http_exc:
+      raise http_exc
     except Exception as e:
-      self.db_session.rollback()
       raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
-      
+
+  async def set_avatar(self, user_id: str, avatar_url: str):
+    """Point a user at a rendered avatar, the one it replaces is left to the avatar collector."""
+    try:
+      user = await self.get_user_or_404(user_id)
+
+      # Update the user's profile image URL
+      liked_blog_ids = await self._touch_liked_by(user.id)
+      await self.user_repository.update_avatar(user, avatar_url)
+      await blog_cache.invalidate_user(user_id)
+      await blog_cache.invalidate(*liked_blog_ids)
+    except Exception:
+      await self.db_session.rollback()
+      raise
+
+  async def _touch_liked_by(self, user_id: str) -> list[str]:
+    """Change the validators of everything that embeds this user as a liker, returning the ids of the blogs."""
+    await self.comment_repository.touch_liked_by(user_id)
+    return await self.blog_repository.touch_liked_by(user_id)
+
+
+async def apply_avatar(user_id: str, avatar_url: str):
+  """Switch a user to a freshly rendered avatar, outside of any request."""
+  async with SessionLocal() as db_session:
+    await UserService(db_session).set_avatar(user_id, avatar_url)
 
 def get_user_service(db_session: SessionDep) -> UserService:
     """Get the user service instance."""
@@ -0,0 +1,43 @@
+"""add like timestamps.
+
+Revision ID: 53dcd8f1dabd
+Revises: cf8c4c116499
+Create Date: 2026-10-18 17:40:21.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '53dcd8f1dabd'
+down_revision: Union[str, Sequence[str], None] = 'cf8c4c116499'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('blog_likes', sa.Column('created_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('comment_likes', sa.Column('created_at', sa.DateTime(), nullable=True))
+
+    # When existing likes happened is unknown, date them with what they liked
+    op.execute("UPDATE blog_likes SET created_at = (SELECT blogs.created_at FROM blogs WHERE blogs.id = blog_likes.blog_id)")
+    op.execute("UPDATE comment_likes SET created_at = (SELECT comments.created_at FROM comments WHERE comments.id = comment_likes.comment_id)")
+
+    with op.batch_alter_table('blog_likes') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(timezone=True), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP'))
+    with op.batch_alter_table('comment_likes') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP'))
+    op.create_index('ix_blog_likes_created_at', 'blog_likes', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_blog_likes_created_at', table_name='blog_likes')
+    with op.batch_alter_table('comment_likes') as batch_op:
+        batch_op.drop_column('created_at')
+    with op.batch_alter_table('blog_likes') as batch_op:
+        batch_op.drop_column('created_at')
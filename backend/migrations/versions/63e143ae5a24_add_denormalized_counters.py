@@ -0,0 +1,46 @@
+"""add denormalized counters.
+
+Revision ID: 63e143ae5a24
+Revises: d46b4cc7c60b
+Create Date: 2026-10-18 10:04:17.226915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '63e143ae5a24'
+down_revision: Union[str, Sequence[str], None] = 'd46b4cc7c60b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('blogs', sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('blogs', sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('comments', sa.Column('reply_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('comments', sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill the counters from the existing rows
+    op.execute(
+        "UPDATE blogs SET "
+        "like_count = (SELECT count(*) FROM blog_likes WHERE blog_likes.blog_id = blogs.id), "
+        "comment_count = (SELECT count(*) FROM comments WHERE comments.blog_id = blogs.id)"
+    )
+    op.execute(
+        "UPDATE comments SET "
+        "reply_count = (SELECT count(*) FROM comments AS replies WHERE replies.parent_id = comments.id), "
+        "like_count = (SELECT count(*) FROM comment_likes WHERE comment_likes.comment_id = comments.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('comments', 'like_count')
+    op.drop_column('comments', 'reply_count')
+    op.drop_column('blogs', 'comment_count')
+    op.drop_column('blogs', 'like_count')
@@ -0,0 +1,70 @@
+"""add blog full text search.
+
+Revision ID: 69e2f1da7e62
+Revises: 6e72637dfda0
+Create Date: 2026-10-18 14:31:09.512740
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '69e2f1da7e62'
+down_revision: Union[str, Sequence[str], None] = '6e72637dfda0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # Generated column, so Postgres keeps it current on insert and update
+        op.execute(
+            "ALTER TABLE blogs ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+            ") STORED"
+        )
+        op.create_index('ix_blogs_search_vector', 'blogs', ['search_vector'], unique=False, postgresql_using='gin')
+
+    elif dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE blogs_fts USING fts5(title, content, content='blogs', content_rowid='rowid')")
+        op.execute(
+            "CREATE TRIGGER blogs_fts_ai AFTER INSERT ON blogs BEGIN "
+            "INSERT INTO blogs_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER blogs_fts_ad AFTER DELETE ON blogs BEGIN "
+            "INSERT INTO blogs_fts(blogs_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER blogs_fts_au AFTER UPDATE OF title, content ON blogs BEGIN "
+            "INSERT INTO blogs_fts(blogs_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content); "
+            "INSERT INTO blogs_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content); "
+            "END"
+        )
+
+        # Index the blogs that already exist
+        op.execute("INSERT INTO blogs_fts(blogs_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.drop_index('ix_blogs_search_vector', table_name='blogs', postgresql_using='gin')
+        op.drop_column('blogs', 'search_vector')
+
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS blogs_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS blogs_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS blogs_fts_ai")
+        op.execute("DROP TABLE IF EXISTS blogs_fts")
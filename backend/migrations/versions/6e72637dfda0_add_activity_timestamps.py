@@ -0,0 +1,30 @@
+"""add activity timestamps.
+
+Revision ID: 6e72637dfda0
+Revises: 63e143ae5a24
+Create Date: 2026-10-18 13:42:51.083164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e72637dfda0'
+down_revision: Union[str, Sequence[str], None] = '63e143ae5a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('blogs', sa.Column('activity_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('comments', sa.Column('activity_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('comments', 'activity_at')
+    op.drop_column('blogs', 'activity_at')
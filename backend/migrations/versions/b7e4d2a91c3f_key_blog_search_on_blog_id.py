@@ -0,0 +1,79 @@
+"""key blog search on blog id.
+
+Revision ID: b7e4d2a91c3f
+Revises: 53dcd8f1dabd
+Create Date: 2026-10-18 21:12:44.903518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4d2a91c3f'
+down_revision: Union[str, Sequence[str], None] = '53dcd8f1dabd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def drop_sqlite_search() -> None:
+    op.execute("DROP TRIGGER IF EXISTS blogs_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS blogs_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS blogs_fts_ai")
+    op.execute("DROP TABLE IF EXISTS blogs_fts")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    # The external content table was keyed on the implicit rowid of blogs, which VACUUM may renumber
+    drop_sqlite_search()
+    op.execute("CREATE VIRTUAL TABLE blogs_fts USING fts5(blog_id UNINDEXED, title, content)")
+    op.execute(
+        "CREATE TRIGGER blogs_fts_ai AFTER INSERT ON blogs BEGIN "
+        "INSERT INTO blogs_fts(blog_id, title, content) VALUES (new.id, new.title, new.content); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER blogs_fts_ad AFTER DELETE ON blogs BEGIN "
+        "DELETE FROM blogs_fts WHERE blog_id = old.id; "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER blogs_fts_au AFTER UPDATE OF title, content ON blogs BEGIN "
+        "UPDATE blogs_fts SET title = new.title, content = new.content WHERE blog_id = old.id; "
+        "END"
+    )
+
+    # Index the blogs that already exist
+    op.execute("INSERT INTO blogs_fts(blog_id, title, content) SELECT id, title, content FROM blogs")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    drop_sqlite_search()
+    op.execute("CREATE VIRTUAL TABLE blogs_fts USING fts5(title, content, content='blogs', content_rowid='rowid')")
+    op.execute(
+        "CREATE TRIGGER blogs_fts_ai AFTER INSERT ON blogs BEGIN "
+        "INSERT INTO blogs_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER blogs_fts_ad AFTER DELETE ON blogs BEGIN "
+        "INSERT INTO blogs_fts(blogs_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER blogs_fts_au AFTER UPDATE OF title, content ON blogs BEGIN "
+        "INSERT INTO blogs_fts(blogs_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content); "
+        "INSERT INTO blogs_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content); "
+        "END"
+    )
+    op.execute("INSERT INTO blogs_fts(blogs_fts) VALUES ('rebuild')")
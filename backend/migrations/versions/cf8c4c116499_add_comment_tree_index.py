@@ -0,0 +1,50 @@
+"""add comment tree index.
+
+Revision ID: cf8c4c116499
+Revises: 69e2f1da7e62
+Create Date: 2026-10-18 15:12:44.307518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cf8c4c116499'
+down_revision: Union[str, Sequence[str], None] = '69e2f1da7e62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    path_type = sa.String(collation='C') if bind.dialect.name == 'postgresql' else sa.String()
+    op.add_column('comments', sa.Column('path', path_type, nullable=True))
+    op.add_column('comments', sa.Column('depth', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill one level at a time, from the top-level comments down
+    hex_id = "replace(CAST(id AS TEXT), '-', '')" if bind.dialect.name == 'postgresql' else "id"
+    op.execute(f"UPDATE comments SET path = {hex_id} || '/', depth = 0 WHERE parent_id IS NULL")
+    while True:
+        result = bind.execute(sa.text(
+            f"UPDATE comments SET "
+            f"path = (SELECT parent.path FROM comments AS parent WHERE parent.id = comments.parent_id) || {hex_id} || '/', "
+            f"depth = (SELECT parent.depth + 1 FROM comments AS parent WHERE parent.id = comments.parent_id) "
+            f"WHERE path IS NULL AND parent_id IN (SELECT id FROM comments WHERE path IS NOT NULL)"
+        ))
+        if result.rowcount == 0:
+            break
+
+    with op.batch_alter_table('comments') as batch_op:
+        batch_op.alter_column('path', existing_type=path_type, nullable=False)
+    op.create_index('ix_comments_path', 'comments', ['path'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_path', table_name='comments')
+    op.drop_column('comments', 'depth')
+    op.drop_column('comments', 'path')
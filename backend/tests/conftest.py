@@ -0,0 +1,86 @@
+import os
+import tempfile
+import uuid
+
+# Settings are read on import, point them at throwaway stores first
+TEST_DIR = tempfile.mkdtemp(prefix="blogsite-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DIR}/test.db"
+os.environ.setdefault("SECRET_KEY", "test-secret-key-long-enough-for-hs256")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["LIKE_WRITE_BEHIND"] = "false"
+
+import fakeredis
+import pytest
+import redis.asyncio as aioredis
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+
+import app.models
+from app.core.container import container
+from app.db.base import Base, engine
+from app.main import app
+from app.services.redis_service import TimedRedis
+
+# Every singleton shares the container's RedisService, swap its client for an in-memory server
+container.redis_service.redis = TimedRedis(connection_pool=aioredis.ConnectionPool(
+  connection_class=fakeredis.FakeAsyncConnection,
+  server=fakeredis.FakeServer(),
+))
+
+Base.metadata.create_all(create_engine(os.environ["DATABASE_URL"]))
+
+@pytest.fixture(scope="session")
+def client():
+  """API client, every request runs on one event loop shared with `run`."""
+  with TestClient(app) as client:
+    yield client
+
+@pytest.fixture(scope="session")
+def run(client):
+  """Run a coroutine function on the client's event loop and return its result."""
+  return lambda fn, *args: client.portal.call(fn, *args)
+
+@pytest.fixture
+def redis(run):
+  """The in-memory Redis, emptied before each test."""
+  run(container.redis_service.redis.flushall)
+  return container.redis_service.redis
+
+@pytest.fixture
+def statements():
+  """SQL statements executed while the test runs."""
+  executed = []
+
+  def record(conn, cursor, statement, parameters, context, executemany):
+    executed.append(statement)
+
+  event.listen(engine.sync_engine, "before_cursor_execute", record)
+  yield executed
+  event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+@pytest.fixture
+def user(client):
+  """A freshly registered user as (id, auth headers)."""
+  email = f"{uuid.uuid4().hex}@example.com"
+  response = client.post("/api/v1/auth/register", json={
+    "email": email,
+    "first_name": "Test",
+    "last_name": "User",
+    "password": "password",
+  })
+  assert response.status_code == 201, response.text
+
+  token = client.post("/api/v1/auth/login", data={"username": email, "password": "password"}).json()["access_token"]
+  return response.json()["id"], {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def create_blog(client, user):
+  """Create a blog as `user` and return it."""
+  user_id, headers = user
+
+  def create(title: str = "Title", content: str = "Content") -> dict:
+    response = client.post("/api/v1/blogs/", json={"title": title, "content": content, "author_id": user_id}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+  return create
@@ -0,0 +1,52 @@
+def test_cached_blog_is_served_without_statements(client, statements, create_blog):
+  blog = create_blog()
+  url = f"/api/v1/blogs/{blog['id']}"
+
+  # Creating a blog caches it, reads and revalidations come from Redis alone
+  statements.clear()
+  response = client.get(url)
+  assert response.status_code == 200, response.text
+  assert response.json()["id"] == blog["id"]
+
+  not_modified = client.get(url, headers={"If-None-Match": response.headers["ETag"]})
+  assert not_modified.status_code == 304
+  assert not_modified.headers["ETag"] == response.headers["ETag"]
+
+  not_modified = client.get(url, headers={"If-Modified-Since": response.headers["Last-Modified"]})
+  assert not_modified.status_code == 304
+  assert statements == []
+
+def test_cache_miss_loads_the_validator_with_the_blog(client, run, redis, create_blog):
+  blog = create_blog()
+  url = f"/api/v1/blogs/{blog['id']}"
+  etag = client.get(url).headers["ETag"]
+
+  run(redis.flushall)
+  response = client.get(url, headers={"If-None-Match": etag})
+  assert response.status_code == 304
+
+def test_like_changes_the_cached_validator(client, user, create_blog):
+  _, headers = user
+  blog = create_blog()
+  url = f"/api/v1/blogs/{blog['id']}"
+  etag = client.get(url).headers["ETag"]
+
+  response = client.put(f"{url}/like", headers=headers)
+  assert response.status_code == 200, response.text
+
+  response = client.get(url, headers={"If-None-Match": etag})
+  assert response.status_code == 200
+  assert response.headers["ETag"] != etag
+  assert response.json()["like_count"] == 1
+
+def test_only_delivered_bodies_count_as_views(client, run, redis, create_blog):
+  blog = create_blog()
+  url = f"/api/v1/blogs/{blog['id']}"
+  etag = client.get(url).headers["ETag"]
+  score = run(redis.zscore, "trending:blogs", blog["id"])
+
+  assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+  assert run(redis.zscore, "trending:blogs", blog["id"]) == score
+
+  assert client.get(url).status_code == 200
+  assert run(redis.zscore, "trending:blogs", blog["id"]) > score
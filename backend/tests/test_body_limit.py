@@ -0,0 +1,71 @@
+import re
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.body_limit import BodySizeLimitMiddleware
+
+LIMIT = 1000
+
+@pytest.fixture(scope="module")
+def reads():
+  """Bytes the `/limited` route got to read, one entry per request that reached it."""
+  return []
+
+@pytest.fixture(scope="module")
+def limited(reads):
+  """A client for a bare app with a body limit on `/limited`."""
+  app = FastAPI()
+  app.add_middleware(BodySizeLimitMiddleware, limits={re.compile(r"^/limited$"): LIMIT})
+
+  @app.post("/limited")
+  @app.post("/unlimited")
+  async def echo(request: Request):
+    body = await request.body()
+    reads.append(len(body))
+    return {"size": len(body)}
+
+  with TestClient(app) as client:
+    yield client
+
+def chunks(count: int, size: int = 300):
+  for _ in range(count):
+    yield b"x" * size
+
+def test_body_under_the_limit_is_read(limited):
+  response = limited.post("/limited", content=b"x" * LIMIT)
+  assert response.status_code == 200, response.text
+  assert response.json() == {"size": LIMIT}
+
+def test_declared_length_over_the_limit_is_refused_unread(limited, reads):
+  reads.clear()
+  response = limited.post("/limited", content=b"x" * (LIMIT + 1))
+  assert response.status_code == 413
+  assert response.json() == {"detail": f"Request body is larger than {LIMIT} bytes"}
+  assert reads == []
+
+def test_streamed_body_is_cut_off_once_over_the_limit(limited, reads):
+  reads.clear()
+  response = limited.post("/limited", content=chunks(10))
+  assert response.status_code == 413
+  assert response.json() == {"detail": f"Request body is larger than {LIMIT} bytes"}
+  assert reads == []
+
+  response = limited.post("/limited", content=chunks(3))
+  assert response.status_code == 200, response.text
+  assert response.json() == {"size": 900}
+
+def test_other_routes_are_not_limited(limited):
+  response = limited.post("/unlimited", content=chunks(10))
+  assert response.status_code == 200, response.text
+  assert response.json() == {"size": 3000}
+
+def test_oversized_avatar_is_refused_before_authentication(client, user):
+  user_id, _ = user
+  response = client.put(
+    f"/api/v1/users/{user_id}/avatar",
+    content=b"x" * 64,
+    headers={"Content-Length": str(10 ** 9), "Content-Type": "application/octet-stream"},
+  )
+  assert response.status_code == 413
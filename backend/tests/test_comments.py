@@ -0,0 +1,61 @@
+import pytest
+
+from app.db.base import SessionLocal
+from app.repositories.comment_repository import CommentRepository
+
+@pytest.fixture
+def comment(client, user, create_blog):
+  """Post a comment as `user` on one blog, optionally as a reply, and return it."""
+  user_id, headers = user
+  blog_id = create_blog()["id"]
+
+  def create(parent_id: str | None = None, content: str = "Comment") -> dict:
+    response = client.post(
+      f"/api/v1/blogs/{blog_id}/comments",
+      json={"content": content, "author_id": user_id, "blog_id": blog_id, "parent_id": parent_id},
+      headers=headers,
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+  return create
+
+def get_subtree(run, comment_id: str, per_level: int) -> set[str]:
+  """Ids of the replies get_subtree loads under a comment."""
+  async def load():
+    async with SessionLocal() as db:
+      repository = CommentRepository(db)
+      root = await repository.get_by_id(comment_id)
+      return {str(reply.id) for reply in await repository.get_subtree(root, per_level=per_level, loaders=())}
+
+  return run(load)
+
+def test_subtree_skips_replies_under_cut_replies(client, run, comment):
+  root = comment()
+  replies = [comment(root["id"]) for _ in range(3)]
+  nested = {reply["id"]: [comment(reply["id"])["id"] for _ in range(2)] for reply in replies}
+
+  thread = client.get(f"/api/v1/comments/{root['id']}/thread", params={"per_level": 2}).json()
+  kept = [reply["id"] for reply in thread["replies"]]
+  assert len(kept) == 2
+
+  expected = set(kept).union(*(nested[reply_id] for reply_id in kept))
+  assert get_subtree(run, root["id"], per_level=2) == expected
+
+def test_update_comment_changes_only_the_content(client, user, comment):
+  _, headers = user
+  root = comment()
+  reply = comment(root["id"])
+  payload = {key: reply[key] for key in ("author_id", "blog_id", "parent_id")}
+
+  response = client.put(f"/api/v1/comments/{reply['id']}", json={**payload, "content": "Edited"}, headers=headers)
+  assert response.status_code == 200, response.text
+  assert response.json()["content"] == "Edited"
+
+  for key, value in (("parent_id", None), ("blog_id", root["id"])):
+    response = client.put(
+      f"/api/v1/comments/{reply['id']}",
+      json={**payload, key: value, "content": "Moved"},
+      headers=headers,
+    )
+    assert response.status_code == 400, response.text
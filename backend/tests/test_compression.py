@@ -0,0 +1,113 @@
+import gzip
+
+import pytest
+from fastapi import Depends, FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, accepted_encodings, precompressed_response, skip_compression
+
+LARGE = b'{"text": "' + b"a" * 4096 + b'"}'
+SMALL = b'{"text": "a"}'
+
+@pytest.fixture(scope="module")
+def compressed():
+  """A client for a bare app behind the compression middleware."""
+  app = FastAPI()
+  app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+  @app.get("/large")
+  async def large():
+    return Response(content=LARGE, media_type="application/json", headers={"ETag": '"large"'})
+
+  @app.get("/small")
+  async def small():
+    return Response(content=SMALL, media_type="application/json")
+
+  @app.get("/image")
+  async def image():
+    return Response(content=LARGE, media_type="image/png")
+
+  @app.get("/skipped", dependencies=[Depends(skip_compression)])
+  async def skipped():
+    return Response(content=LARGE, media_type="application/json")
+
+  @app.get("/stream")
+  async def stream():
+    async def chunks():
+      for _ in range(3):
+        yield b"x" * 100
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+  @app.get("/precompressed")
+  async def precompressed(request: Request):
+    return precompressed_response(request, gzip.compress(LARGE), headers={"ETag": '"stored"'})
+
+  with TestClient(app) as client:
+    yield client
+
+def get(client, path: str, accept_encoding: str = "gzip"):
+  response = client.get(path, headers={"Accept-Encoding": accept_encoding})
+  assert response.status_code == 200, response.text
+  return response
+
+@pytest.mark.parametrize("header, expected", [
+  ("gzip, br", {"gzip", "br"}),
+  ("gzip;q=0, br", {"br"}),
+  ("gzip; q=0.0, identity;q=0.5", {"identity"}),
+  ("gzip;q=oops", set()),
+])
+def test_accepted_encodings(header, expected):
+  assert accepted_encodings(header) == expected
+
+def test_large_body_is_gzipped(compressed):
+  response = get(compressed, "/large")
+  assert response.headers["content-encoding"] == "gzip"
+  assert "Accept-Encoding" in response.headers["vary"]
+  assert int(response.headers["content-length"]) < len(LARGE)
+  assert response.content == LARGE
+
+def test_gzip_refused_with_q_zero_is_not_used(compressed):
+  response = get(compressed, "/large", accept_encoding="gzip;q=0")
+  assert "content-encoding" not in response.headers
+  assert response.content == LARGE
+
+@pytest.mark.parametrize("path", ["/small", "/image", "/skipped"])
+def test_passthrough(compressed, path):
+  response = get(compressed, path)
+  assert "content-encoding" not in response.headers
+  assert int(response.headers["content-length"]) == len(response.content)
+
+def test_etag_is_weakened_when_compressed(compressed):
+  assert get(compressed, "/large").headers["etag"] == 'W/"large"'
+  assert get(compressed, "/large", accept_encoding="identity").headers["etag"] == '"large"'
+
+def test_streamed_body_is_compressed_without_content_length(compressed):
+  response = get(compressed, "/stream")
+  assert response.headers["content-encoding"] == "gzip"
+  assert "content-length" not in response.headers
+  assert response.content == b"x" * 300
+
+def test_precompressed_body_is_sent_as_stored(compressed):
+  response = get(compressed, "/precompressed")
+  assert response.headers["content-encoding"] == "gzip"
+  assert response.headers["etag"] == 'W/"stored"'
+  assert response.content == LARGE
+
+  response = get(compressed, "/precompressed", accept_encoding="identity")
+  assert "content-encoding" not in response.headers
+  assert response.headers["etag"] == '"stored"'
+  assert response.content == LARGE
+
+def test_cached_blog_revalidates_with_its_weakened_etag(client, create_blog):
+  blog = create_blog(content="word " * 1000)
+  url = f"/api/v1/blogs/{blog['id']}"
+
+  response = client.get(url, headers={"Accept-Encoding": "gzip"})
+  assert response.status_code == 200, response.text
+  assert response.headers["content-encoding"] == "gzip"
+  etag = response.headers["etag"]
+  assert etag.startswith("W/")
+
+  response = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+  assert response.status_code == 304
@@ -0,0 +1,84 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from app.db.base import SessionLocal
+from app.models.blog import Blog
+from app.services.count_service import CountMode, CountService, count_key, explain_sql
+
+def count(run, user_id: str, mode: CountMode) -> tuple[int, bool]:
+  """Count `user_id`'s blogs with the given mode."""
+  async def load():
+    async with SessionLocal() as db_session:
+      stmt = select(Blog).where(Blog.author_id == user_id)
+      return await CountService(db_session).count(stmt, count_key("blogs", user_id), mode)
+
+  return run(load)
+
+def invalidate(run, user_id: str):
+  async def apply():
+    async with SessionLocal() as db_session:
+      await CountService(db_session).invalidate(count_key("blogs", user_id))
+
+  run(apply)
+
+def test_exact_counts_every_time(run, user, create_blog):
+  user_id, _ = user
+  create_blog()
+  assert count(run, user_id, CountMode.EXACT) == (1, True)
+
+  create_blog()
+  assert count(run, user_id, CountMode.EXACT) == (2, True)
+
+def test_cached_total_is_kept_until_invalidated(run, redis, user, create_blog):
+  user_id, _ = user
+  create_blog()
+  assert count(run, user_id, CountMode.CACHED) == (1, True)
+  assert run(redis.get, f"count:{count_key('blogs', user_id)}") == b"1"
+
+  # Written behind the service's back, the cached total is stale until invalidated
+  async def insert():
+    async with SessionLocal() as db_session:
+      db_session.add(Blog(title="Title", content="Content", author_id=user_id))
+      await db_session.commit()
+
+  run(insert)
+  assert count(run, user_id, CountMode.CACHED) == (1, True)
+
+  invalidate(run, user_id)
+  assert count(run, user_id, CountMode.CACHED) == (2, True)
+
+def test_estimated_falls_back_to_exact_without_postgres(run, user, create_blog):
+  user_id, _ = user
+  create_blog()
+  assert count(run, user_id, CountMode.ESTIMATED) == (1, True)
+
+@pytest.mark.parametrize("estimate, expected", [(50_000, (50_000, False)), (10, (1, True))])
+def test_estimate_is_used_only_for_large_tables(run, monkeypatch, user, create_blog, estimate, expected):
+  user_id, _ = user
+  create_blog()
+
+  async def estimated_count(self, stmt):
+    return estimate
+
+  monkeypatch.setattr(CountService, "_estimated_count", estimated_count)
+  assert count(run, user_id, CountMode.ESTIMATED) == expected
+
+def test_explain_renders_parameters_inline_for_asyncpg():
+  author_id = str(uuid.uuid4())
+  stmt = (
+    select(Blog)
+      .where(Blog.author_id == author_id, Blog.created_at < datetime(2024, 1, 2, 3, 4, 5))
+      .where(Blog.title.in_(["it's", "100%"]))
+      .order_by(Blog.created_at.desc())
+  )
+
+  sql = explain_sql(stmt, asyncpg_dialect())
+  assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+  assert "$1" not in sql and "POSTCOMPILE" not in sql and "ORDER BY" not in sql
+  assert f"blogs.author_id = '{author_id}'" in sql
+  assert "'2024-01-02 03:04:05'" in sql
+  assert "IN ('it''s', '100%')" in sql
@@ -0,0 +1,26 @@
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.db.base import SessionLocal
+from app.models.blog import Blog
+
+def test_ids_given_as_strings_bind_on_sqlite(run, create_blog):
+  blog_id = create_blog()["id"]
+
+  async def load(blog_id: str):
+    async with SessionLocal() as db_session:
+      return await db_session.scalar(select(Blog.id).where(Blog.id == blog_id))
+
+  assert run(load, blog_id) == uuid.UUID(blog_id)
+  assert run(load, str(uuid.uuid4())) is None
+
+@pytest.mark.parametrize("url", ["/api/v1/blogs/{}", "/api/v1/comments/{}", "/api/v1/users/{}"])
+def test_malformed_ids_are_rejected_before_any_query(client, statements, url):
+  statements.clear()
+  response = client.get(url.format("not-a-uuid"))
+  assert response.status_code == 422
+  assert statements == []
+
+  assert client.get(url.format(uuid.uuid4())).status_code == 404
@@ -0,0 +1,80 @@
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app.db.base import SessionLocal
+from app.models.blog import Blog, blog_likes
+from app.repositories.blog_repository import BlogRepository
+from app.services.like_buffer import INFLIGHT_KEY, like_buffer
+
+@pytest.fixture
+def blog(create_blog) -> str:
+  return create_blog()["id"]
+
+def record(run, blog_id: str, user_id: str, liked: bool | None):
+  """Buffer a like, unlike or toggle the way the blog service does."""
+  async def apply():
+    async with SessionLocal() as db_session:
+      return await like_buffer.record("blog", blog_id, user_id, liked, BlogRepository(db_session).get_like_state)
+
+  return run(apply)
+
+def stored_likes(run, blog_id: str) -> tuple[int, int]:
+  """The blog's like counter and how many like rows it has in the database."""
+  async def load():
+    async with SessionLocal() as db_session:
+      counter = await db_session.scalar(select(Blog.like_count).where(Blog.id == blog_id))
+      rows = await db_session.scalar(select(func.count()).where(blog_likes.c.blog_id == blog_id))
+      return counter, rows
+
+  return run(load)
+
+def test_toggles_collapse_to_the_last_intent(run, redis, user, blog):
+  user_id, _ = user
+
+  states = [record(run, blog, user_id, None) for _ in range(3)]
+  assert [(state.liked, state.like_count) for state in states] == [(True, 1), (False, 0), (True, 1)]
+  assert run(redis.hgetall, f"likes:blog:{blog}:pending") == {user_id.encode(): b"1"}
+
+  state = record(run, blog, user_id, False)
+  assert (state.liked, state.like_count) == (False, 0)
+  assert run(redis.hgetall, f"likes:blog:{blog}:pending") == {user_id.encode(): b"0"}
+
+def test_flush_writes_intents_and_counters(run, redis, user, blog):
+  user_id, _ = user
+  record(run, blog, user_id, True)
+  assert stored_likes(run, blog) == (0, 0)
+
+  assert run(like_buffer.drain) == 1
+  assert stored_likes(run, blog) == (1, 1)
+  assert run(redis.exists, f"likes:blog:{blog}:pending", f"likes:blog:{blog}:flushing") == 0
+
+  # Unliking again is applied on the next flush
+  record(run, blog, user_id, False)
+  run(like_buffer.drain)
+  assert stored_likes(run, blog) == (0, 0)
+
+@pytest.mark.parametrize("committed", [False, True])
+def test_flush_left_behind_by_a_crash_is_applied_once(run, redis, user, blog, committed):
+  user_id, _ = user
+  record(run, blog, user_id, True)
+
+  # A flush took the intents and died, before or after its database commit
+  run(redis.rename, f"likes:blog:{blog}:pending", f"likes:blog:{blog}:flushing")
+  run(redis.srem, "likes:dirty", f"blog:{blog}")
+  run(redis.sadd, INFLIGHT_KEY, f"blog:{blog}")
+  if committed:
+    async def apply():
+      async with SessionLocal() as db_session:
+        repository = BlogRepository(db_session)
+        await repository.add_likes(blog, [uuid.UUID(user_id)])
+        await repository.adjust_counters(blog, like_count=1)
+        await db_session.commit()
+
+    run(apply)
+
+  assert run(like_buffer.drain) == 1
+  assert run(like_buffer.drain) == 0
+  assert stored_likes(run, blog) == (1, 1)
+  assert run(redis.smembers, INFLIGHT_KEY) == set()
@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.blog import Blog, blog_likes
+from app.models.comment import Comment, comment_likes
+from app.services.like_buffer import like_buffer
+
+@pytest.fixture(params=[False, True], ids=["direct", "write-behind"])
+def write_behind(request, monkeypatch, redis) -> bool:
+  monkeypatch.setattr(settings, "LIKE_WRITE_BEHIND", request.param)
+  return request.param
+
+@pytest.fixture(params=["blog", "comment"])
+def target(request, client, user, create_blog) -> tuple[str, str]:
+  """The kind and id of something to like, a blog or a comment on it."""
+  user_id, headers = user
+  blog_id = create_blog()["id"]
+  if request.param == "blog":
+    return "blog", blog_id
+
+  response = client.post(
+    f"/api/v1/blogs/{blog_id}/comments",
+    json={"content": "Comment", "author_id": user_id, "blog_id": blog_id, "parent_id": None},
+    headers=headers,
+  )
+  assert response.status_code == 201, response.text
+  return "comment", response.json()["id"]
+
+def stored_likes(run, kind: str, target_id: str) -> tuple[int, int]:
+  """The like counter and how many like rows the target has in the database."""
+  model, likes, column = (Blog, blog_likes, "blog_id") if kind == "blog" else (Comment, comment_likes, "comment_id")
+
+  async def load():
+    await like_buffer.drain()
+    async with SessionLocal() as db_session:
+      counter = await db_session.scalar(select(model.like_count).where(model.id == target_id))
+      rows = await db_session.scalar(select(func.count()).where(likes.c[column] == target_id))
+      return counter, rows
+
+  return run(load)
+
+def test_repeated_like_and_unlike_are_no_ops(client, run, user, write_behind, target):
+  _, headers = user
+  kind, target_id = target
+  url = f"/api/v1/{kind}s/{target_id}/like"
+
+  for _ in range(3):
+    response = client.put(url, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json() == {"liked": True, "like_count": 1}
+  assert stored_likes(run, kind, target_id) == (1, 1)
+
+  for _ in range(3):
+    response = client.delete(url, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json() == {"liked": False, "like_count": 0}
+  assert stored_likes(run, kind, target_id) == (0, 0)
+
+def test_likes_of_other_users_are_kept(client, run, user, write_behind, target):
+  _, owner_headers = user
+  kind, target_id = target
+  url = f"/api/v1/{kind}s/{target_id}/like"
+  assert client.put(url, headers=owner_headers).json() == {"liked": True, "like_count": 1}
+
+  email = f"{target_id}@example.com"
+  response = client.post("/api/v1/auth/register", json={"email": email, "first_name": "Other", "last_name": "User", "password": "password"})
+  assert response.status_code == 201, response.text
+  token = client.post("/api/v1/auth/login", data={"username": email, "password": "password"}).json()["access_token"]
+  headers = {"Authorization": f"Bearer {token}"}
+
+  assert client.delete(url, headers=headers).json() == {"liked": False, "like_count": 1}
+  assert client.put(url, headers=headers).json() == {"liked": True, "like_count": 2}
+  assert client.put(url, headers=headers).json() == {"liked": True, "like_count": 2}
+  assert stored_likes(run, kind, target_id) == (2, 2)
@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import select
+
+from app.db.base import SessionLocal
+from app.models.comment import Comment
+
+@pytest.fixture
+def reply(client, user, create_blog):
+  """Post replies as `user` under one root comment, returning the root id and a function adding a reply."""
+  user_id, headers = user
+  blog_id = create_blog()["id"]
+
+  def post(parent_id: str | None = None) -> str:
+    response = client.post(
+      f"/api/v1/blogs/{blog_id}/comments",
+      json={"content": "Comment", "author_id": user_id, "blog_id": blog_id, "parent_id": parent_id},
+      headers=headers,
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+  root_id = post()
+  return root_id, lambda: post(root_id)
+
+def newest_first(run, root_id: str) -> list[str]:
+  """Reply ids in listing order, created_at then id, newest first."""
+  async def load():
+    async with SessionLocal() as db_session:
+      rows = await db_session.execute(select(Comment.created_at, Comment.id).where(Comment.parent_id == root_id))
+      return [str(id) for _, id in sorted(rows, reverse=True)]
+
+  return run(load)
+
+def replies(client, root_id: str, **params) -> dict:
+  response = client.get(f"/api/v1/comments/{root_id}/replies", params={"limit": 3, **params})
+  assert response.status_code == 200, response.text
+  return response.json()
+
+def ids(page: dict) -> list[str]:
+  return [item["id"] for item in page["items"]]
+
+def test_cursors_round_trip(client, run, reply):
+  root_id, add = reply
+  for _ in range(7):
+    add()
+  expected = newest_first(run, root_id)
+
+  first = replies(client, root_id)
+  second = replies(client, root_id, cursor=first["next_cursor"])
+  third = replies(client, root_id, cursor=second["next_cursor"])
+  assert [ids(first), ids(second), ids(third)] == [expected[:3], expected[3:6], expected[6:]]
+  assert first["prev_cursor"] is None and third["next_cursor"] is None
+
+  back = replies(client, root_id, cursor=third["prev_cursor"])
+  assert ids(back) == expected[3:6]
+  back = replies(client, root_id, cursor=back["prev_cursor"])
+  assert ids(back) == expected[:3]
+  assert back["prev_cursor"] is None
+
+  assert ids(replies(client, root_id, cursor=back["next_cursor"])) == expected[3:6]
+
+def test_cursor_pages_do_not_shift_when_rows_are_added(client, run, reply):
+  root_id, add = reply
+  for _ in range(4):
+    add()
+  expected = newest_first(run, root_id)
+
+  first = replies(client, root_id)
+  added = add()
+
+  # Created in the same second as the boundary row, it may sort on either side of it by id
+  second = [id for id in ids(replies(client, root_id, cursor=first["next_cursor"])) if id != added]
+  assert second == expected[3:]
+
+def test_offset_page_links_back(client, run, reply):
+  root_id, add = reply
+  for _ in range(4):
+    add()
+  expected = newest_first(run, root_id)
+
+  page = replies(client, root_id, offset=3)
+  assert ids(page) == expected[3:]
+  assert ids(replies(client, root_id, cursor=page["prev_cursor"])) == expected[:3]
+
+def test_invalid_cursor_is_rejected(client, reply):
+  root_id, _ = reply
+  response = client.get(f"/api/v1/comments/{root_id}/replies", params={"cursor": "not-a-cursor"})
+  assert response.status_code == 400
@@ -0,0 +1,40 @@
+import asyncio
+
+from app.core.periodic import PeriodicTask
+
+def test_failing_runs_do_not_stop_the_task_and_stop_runs_it_once_more(run):
+  runs = []
+
+  async def job():
+    runs.append(len(runs))
+    if len(runs) == 1:
+      raise RuntimeError("first run fails")
+
+  task = PeriodicTask("testing", job, interval=0.01, run_on_stop=True)
+
+  async def start_and_stop():
+    task.start()
+    while len(runs) < 3:
+      await asyncio.sleep(0.01)
+    stopped_at = len(runs)
+    await task.stop()
+    return stopped_at
+
+  stopped_at = run(start_and_stop)
+  assert len(runs) == stopped_at + 1
+
+def test_first_run_waits_one_interval_unless_asked(run):
+  runs = []
+
+  async def job():
+    runs.append(1)
+
+  task = PeriodicTask("testing", job, interval=60, run_first=False)
+
+  async def start_and_stop():
+    task.start()
+    await asyncio.sleep(0.05)
+    await task.stop()
+
+  run(start_and_stop)
+  assert runs == []
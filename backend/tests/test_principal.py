@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+import pytest
+
+from app.services.principal_cache import Principal, PrincipalCache, principal_cache
+
+def me(client, headers) -> dict:
+  response = client.post("/api/v1/users/me", headers=headers)
+  assert response.status_code == 201, response.text
+  return response.json()
+
+def user_queries(statements: list[str]) -> int:
+  return sum(1 for statement in statements if "FROM users" in statement)
+
+def test_cached_principal_skips_the_user_query(client, statements, user):
+  user_id, headers = user
+  me(client, headers)
+
+  statements.clear()
+  assert me(client, headers)["id"] == user_id
+  assert user_queries(statements) == 0
+
+def test_principal_is_not_a_partial_user(client, run, user):
+  user_id, headers = user
+  me(client, headers)
+
+  principal = run(principal_cache.get, user_id)
+  assert isinstance(principal, Principal)
+  assert str(principal.id) == user_id
+
+  # Anything not cached is missing outright rather than lazy-loaded
+  for attribute in ("hashed_password", "blogs"):
+    with pytest.raises(AttributeError):
+      getattr(principal, attribute)
+  with pytest.raises(AttributeError):
+    principal.first_name = "Changed"
+
+def test_profile_update_invalidates_the_principal(client, run, user):
+  user_id, headers = user
+  before = me(client, headers)
+
+  response = client.put(f"/api/v1/users/{user_id}/update", headers=headers, json={
+    "email": before["email"],
+    "first_name": "Renamed",
+    "last_name": before["last_name"],
+  })
+  assert response.status_code == 200, response.text
+  assert run(principal_cache.get, user_id) is None
+  assert me(client, headers)["first_name"] == "Renamed"
+
+def test_password_change_invalidates_the_principal(client, run, user):
+  user_id, headers = user
+  email = me(client, headers)["email"]
+
+  response = client.put("/api/v1/auth/change-password", headers=headers, json={
+    "current_password": "password",
+    "new_password": "new-password",
+  })
+  assert response.status_code == 200, response.text
+  assert run(principal_cache.get, user_id) is None
+
+  response = client.post("/api/v1/auth/login", data={"username": email, "password": "new-password"})
+  assert response.status_code == 200, response.text
+  assert me(client, headers)["id"] == user_id
+
+def test_principal_round_trips_through_redis(client, run, redis, user):
+  user_id, headers = user
+  me(client, headers)
+  cache = PrincipalCache(maxsize=10, ttl=timedelta(seconds=60), use_redis=True)
+  principal = run(principal_cache.get, user_id)
+
+  run(cache.set, principal)
+  cache._entries.clear()
+  assert run(cache.get, user_id) == principal
@@ -0,0 +1,38 @@
+import pytest
+
+# Statements a listing may run whatever its page size, page plus relationship loads plus count
+MAX_STATEMENTS = 4
+
+@pytest.fixture
+def listings(client, user, create_blog):
+  """A user with a dozen blogs, the first with a dozen comments, and the URLs listing them."""
+  user_id, headers = user
+  blogs = [create_blog(title=f"Blog {i}") for i in range(12)]
+  blog_id = blogs[0]["id"]
+  for i in range(12):
+    response = client.post(
+      f"/api/v1/blogs/{blog_id}/comments",
+      json={"content": f"Comment {i}", "author_id": user_id, "blog_id": blog_id},
+      headers=headers,
+    )
+    assert response.status_code == 201, response.text
+
+  return ["/api/v1/blogs/", f"/api/v1/users/{user_id}/blogs", f"/api/v1/blogs/{blog_id}/comments"]
+
+def count_statements(client, run, redis, statements, url: str, limit: int) -> int:
+  """Statements run by one cold request for a page of `limit` items."""
+  # Nothing cached, so every page is built from the database
+  run(redis.flushall)
+  statements.clear()
+  response = client.get(url, params={"limit": limit})
+  assert response.status_code == 200, response.text
+  assert len(response.json()["items"]) == limit
+  return len(statements)
+
+def test_listings_run_a_fixed_number_of_statements(client, run, redis, statements, listings):
+  for url in listings:
+    small = count_statements(client, run, redis, statements, url, limit=2)
+    large = count_statements(client, run, redis, statements, url, limit=10)
+
+    assert small == large, f"{url}: {small} statements for 2 items, {large} for 10"
+    assert large <= MAX_STATEMENTS, f"{url}: {large} statements"
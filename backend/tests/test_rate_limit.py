@@ -0,0 +1,45 @@
+from fastapi import HTTPException, Request
+import pytest
+
+from app.core.limiter import RateLimiter
+
+def make_endpoint(limiter: RateLimiter, rate: str, status_code: int | None = None, **options):
+  """A rate limited endpoint that succeeds, or fails with `status_code`."""
+  @limiter.limit(rate, **options)
+  async def endpoint(request: Request):
+    if status_code is not None:
+      raise HTTPException(status_code=status_code)
+    return "ok"
+
+  return endpoint
+
+def call(run, endpoint) -> int:
+  """Call an endpoint as one client and return the status it answers with."""
+  request = Request({"type": "http", "client": ("203.0.113.1", 1234), "headers": []})
+  try:
+    run(lambda: endpoint(request=request))
+    return 200
+  except HTTPException as http_exc:
+    return http_exc.status_code
+
+@pytest.fixture
+def limiter(redis):
+  return RateLimiter(redis_timeout=1)
+
+def test_default_burst_spends_the_whole_quota_at_once(run, limiter):
+  endpoint = make_endpoint(limiter, "100/hour")
+
+  assert [call(run, endpoint) for _ in range(100)] == [200] * 100
+  assert call(run, endpoint) == 429
+
+def test_route_burst_overrides_the_default(run, limiter):
+  endpoint = make_endpoint(limiter, "100/hour", burst=5)
+
+  assert [call(run, endpoint) for _ in range(6)] == [200] * 5 + [429]
+
+def test_client_errors_are_refunded_when_asked(run, limiter):
+  refunded = make_endpoint(limiter, "100/hour", status_code=415, cost=50, scope="refunded", refund_client_errors=True)
+  charged = make_endpoint(limiter, "100/hour", status_code=415, cost=50, scope="charged")
+
+  assert [call(run, refunded) for _ in range(5)] == [415] * 5
+  assert [call(run, charged) for _ in range(3)] == [415, 415, 429]
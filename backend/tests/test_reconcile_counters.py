@@ -0,0 +1,65 @@
+from sqlalchemy import select, update
+
+from app.commands.reconcile_counters import reconcile_counters
+from app.db.base import SessionLocal
+from app.models.blog import Blog
+from app.models.comment import Comment
+
+def counters(run, blog_id: str, comment_id: str) -> tuple:
+  """The blog's (like_count, comment_count, updated_at) and the comment's (reply_count, like_count, updated_at)."""
+  async def load():
+    async with SessionLocal() as db_session:
+      blog = (await db_session.execute(
+        select(Blog.like_count, Blog.comment_count, Blog.updated_at).where(Blog.id == blog_id)
+      )).one()
+      comment = (await db_session.execute(
+        select(Comment.reply_count, Comment.like_count, Comment.updated_at).where(Comment.id == comment_id)
+      )).one()
+      return tuple(blog), tuple(comment)
+
+  return run(load)
+
+def drift(run, blog_id: str, comment_id: str):
+  """Overwrite the counters the way lost or doubled increments would leave them."""
+  async def apply():
+    async with SessionLocal() as db_session:
+      await db_session.execute(
+        update(Blog).where(Blog.id == blog_id).values(like_count=7, comment_count=-1, updated_at=Blog.updated_at)
+      )
+      await db_session.execute(
+        update(Comment).where(Comment.id == comment_id).values(reply_count=0, like_count=3, updated_at=Comment.updated_at)
+      )
+      await db_session.commit()
+
+  run(apply)
+
+def test_reconcile_repairs_drifted_counters(client, run, user, create_blog):
+  user_id, headers = user
+  blog_id = create_blog()["id"]
+
+  def comment(parent_id: str | None = None) -> str:
+    response = client.post(
+      f"/api/v1/blogs/{blog_id}/comments",
+      json={"content": "Comment", "author_id": user_id, "blog_id": blog_id, "parent_id": parent_id},
+      headers=headers,
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+  comment_id = comment()
+  comment(comment_id)
+  comment(comment_id)
+  assert client.put(f"/api/v1/blogs/{blog_id}/like", headers=headers).status_code == 200
+  assert client.put(f"/api/v1/comments/{comment_id}/like", headers=headers).status_code == 200
+
+  (blog_likes, blog_comments, blog_updated), (replies, comment_likes, comment_updated) = counters(run, blog_id, comment_id)
+  assert (blog_likes, blog_comments, replies, comment_likes) == (1, 3, 2, 1)
+
+  drift(run, blog_id, comment_id)
+  assert counters(run, blog_id, comment_id) != ((1, 3, blog_updated), (2, 1, comment_updated))
+
+  blogs, comments = run(reconcile_counters)
+  assert blogs >= 1 and comments >= 3
+
+  # Recounting is not an edit, updated_at stays as it was
+  assert counters(run, blog_id, comment_id) == ((1, 3, blog_updated), (2, 1, comment_updated))
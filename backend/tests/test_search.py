@@ -0,0 +1,81 @@
+import uuid
+
+import pytest
+
+def word() -> str:
+  """A token no other blog in the test database contains."""
+  return "w" + uuid.uuid4().hex
+
+def search(client, q: str) -> list[dict]:
+  response = client.get("/api/v1/blogs/search", params={"q": q, "limit": 10})
+  assert response.status_code == 200, response.text
+  return response.json()["items"]
+
+def test_title_matches_rank_above_content_matches(client, create_blog):
+  term = word()
+  in_content = create_blog(title="Unrelated", content=f"Some text about {term}")
+  in_title = create_blog(title=f"All about {term}", content="Some text")
+
+  hits = search(client, term)
+  assert [hit["blog"]["id"] for hit in hits] == [in_title["id"], in_content["id"]]
+  assert hits[0]["rank"] > hits[1]["rank"]
+
+def test_snippet_highlights_the_match(client, create_blog):
+  term = word()
+  create_blog(content=f"The quick brown {term} jumps over the lazy dog")
+
+  [hit] = search(client, term)
+  assert f"<mark>{term}</mark>" in hit["snippet"]
+
+def test_quoted_phrase_matches_words_in_order(client, create_blog):
+  first, second = word(), word()
+  in_order = create_blog(content=f"{first} {second}")
+  create_blog(content=f"{second} and then {first}")
+
+  assert len(search(client, f"{first} {second}")) == 2
+  assert [hit["blog"]["id"] for hit in search(client, f'"{first} {second}"')] == [in_order["id"]]
+
+def test_query_syntax_is_matched_literally(client, create_blog):
+  term = word()
+  create_blog(content=term)
+
+  for q in (f"{term} OR", f"{term}*", '"', f"NEAR({term}"):
+    assert client.get("/api/v1/blogs/search", params={"q": q}).status_code == 200
+
+def test_snippet_escapes_the_content_around_the_marks(client, create_blog):
+  term = word()
+  create_blog(content=f"<script>alert(1)</script> {term} <img src=x onerror=alert(1)>")
+
+  [hit] = search(client, term)
+  assert "<script>" not in hit["snippet"] and "<img" not in hit["snippet"]
+  assert "&lt;script&gt;" in hit["snippet"]
+  assert f"<mark>{term}</mark>" in hit["snippet"]
+
+def test_empty_query_is_rejected(client):
+  assert client.get("/api/v1/blogs/search", params={"q": ""}).status_code == 422
+
+@pytest.mark.parametrize("q", ["   ", "\t\n"])
+def test_blank_query_finds_nothing(client, q):
+  response = client.get("/api/v1/blogs/search", params={"q": q})
+  assert response.status_code == 200, response.text
+  assert response.json()["items"] == []
+  assert response.json()["total"] == 0
+
+def test_index_follows_updates_and_deletes(client, user, create_blog):
+  user_id, headers = user
+  old, new = word(), word()
+  blog = create_blog(content=old)
+  assert len(search(client, old)) == 1
+
+  response = client.put(
+    f"/api/v1/blogs/{blog['id']}",
+    json={"title": blog["title"], "content": new, "author_id": user_id},
+    headers=headers,
+  )
+  assert response.status_code == 200, response.text
+  assert search(client, old) == []
+  assert [hit["blog"]["id"] for hit in search(client, new)] == [blog["id"]]
+
+  response = client.delete(f"/api/v1/blogs/{blog['id']}", headers=headers)
+  assert response.status_code == 200, response.text
+  assert search(client, new) == []
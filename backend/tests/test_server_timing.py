@@ -0,0 +1,73 @@
+import json
+import re
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.server_timing import ServerTimingMiddleware, record_redis, record_serialize
+
+HEADER = re.compile(
+  r'^db;dur=(\d+\.\d);desc="(\d+) queries", '
+  r'redis;dur=(\d+\.\d);desc="(\d+) commands", '
+  r'serialize;dur=(\d+\.\d), '
+  r'total;dur=(\d+\.\d)$'
+)
+
+def timing(response) -> tuple:
+  match = HEADER.match(response.headers["server-timing"])
+  assert match, response.headers["server-timing"]
+  db_ms, db_count, redis_ms, redis_count, serialize_ms, total_ms = match.groups()
+  return float(db_ms), int(db_count), float(redis_ms), int(redis_count), float(serialize_ms), float(total_ms)
+
+def timed_app(log_threshold_ms: float | None) -> FastAPI:
+  app = FastAPI()
+  app.add_middleware(ServerTimingMiddleware, log_threshold_ms=log_threshold_ms)
+
+  @app.get("/work")
+  async def work():
+    started = time.perf_counter()
+    record_redis(started, commands=3)
+    record_serialize(started)
+    return {}
+
+  return app
+
+def test_header_counts_the_work_done_by_the_request(capsys):
+  with TestClient(timed_app(log_threshold_ms=None)) as client:
+    response = client.get("/work")
+
+  _, db_count, _, redis_count, _, _ = timing(response)
+  assert (db_count, redis_count) == (0, 3)
+  assert capsys.readouterr().out == ""
+
+def test_slow_requests_are_logged_as_json(capsys):
+  with TestClient(timed_app(log_threshold_ms=0)) as client:
+    response = client.get("/work")
+
+  [line] = capsys.readouterr().out.splitlines()
+  log = json.loads(line)
+  assert {key: log[key] for key in ("event", "method", "path", "status", "redis_commands")} == {
+    "event": "request", "method": "GET", "path": "/work", "status": 200, "redis_commands": 3,
+  }
+  assert set(log) >= {"total_ms", "db_ms", "db_queries", "redis_ms", "serialize_ms"}
+
+def test_header_counts_database_and_redis_work(client, redis, user, create_blog):
+  user_id, _ = user
+  blog = create_blog()
+
+  db_ms, db_count, _, _, _, total_ms = timing(client.get(f"/api/v1/users/{user_id}"))
+  assert db_count > 0
+  assert total_ms >= db_ms
+
+  # Served from the blog cache
+  _, _, redis_ms, redis_count, _, total_ms = timing(client.get(f"/api/v1/blogs/{blog['id']}"))
+  assert redis_count > 0
+  assert total_ms >= redis_ms
+
+@pytest.mark.parametrize("path, status_code", [("/api/v1/blogs/not-an-id", 422), ("/missing", 404)])
+def test_header_is_sent_on_errors(client, path, status_code):
+  response = client.get(path)
+  assert response.status_code == status_code
+  timing(response)
@@ -0,0 +1,132 @@
+import pytest
+from sqlalchemy import delete
+
+from app.db.base import SessionLocal
+from app.models.blog import Blog
+from app.repositories.blog_repository import BlogRepository
+from app.services.timelines import SENTINEL, TRUNCATED, WHOLE, author_key, timelines
+
+@pytest.fixture
+def blogs(run, redis, user, create_blog) -> list[str]:
+  """Ids of five blogs by `user`, newest first, with their timeline not filled yet."""
+  user_id, _ = user
+  ids = [create_blog(title=f"Blog {i}")["id"] for i in range(5)]
+  run(redis.delete, author_key(user_id))
+  return sorted_newest_first(run, ids)
+
+def sorted_newest_first(run, ids: list[str]) -> list[str]:
+  """Order ids the way listings do, created_at then id, newest first."""
+  async def load():
+    async with SessionLocal() as db_session:
+      rows = await db_session.execute(Blog.__table__.select().where(Blog.id.in_(ids)))
+      return sorted(((row.created_at, str(row.id)) for row in rows), reverse=True)
+
+  return [blog_id for _, blog_id in run(load)]
+
+def sql_pages(statements: list[str]) -> int:
+  """How many listing queries went to the database."""
+  return sum(1 for statement in statements if "blogs.content" in statement and "ORDER BY" in statement)
+
+def page(run, user_id: str, limit: int, offset: int = 0, loads: list | None = None):
+  """Read an author's timeline, filling it from `blogs` when needed."""
+  async def read():
+    async def load(size: int):
+      if loads is not None:
+        loads.append(size)
+      async with SessionLocal() as db_session:
+        return await BlogRepository(db_session).get_latest_ids(size, user_id)
+
+    return await timelines.page(limit, offset, author_id=user_id, load=load)
+
+  return run(read)
+
+def walk(client, url: str, limit: int) -> list[dict]:
+  """Every page of a listing, following next cursors."""
+  pages = [client.get(url, params={"limit": limit}).json()]
+  while pages[-1]["next_cursor"]:
+    pages.append(client.get(url, params={"limit": limit, "cursor": pages[-1]["next_cursor"]}).json())
+  return pages
+
+def ids(page: dict) -> list[str]:
+  return [item["id"] for item in page["items"]]
+
+def test_page_inside_the_window_is_read_from_redis(run, redis, user, blogs):
+  user_id, _ = user
+  loads = []
+
+  first = page(run, user_id, limit=2, loads=loads)
+  assert (first.ids, first.has_more) == (blogs[:2], True)
+  assert loads == [timelines.size]
+  assert run(redis.zscore, author_key(user_id), SENTINEL) == WHOLE
+
+  last = page(run, user_id, limit=2, offset=4, loads=loads)
+  assert (last.ids, last.has_more) == (blogs[4:], False)
+  assert loads == [timelines.size]
+
+def test_running_off_a_truncated_window_falls_back_to_sql(run, redis, monkeypatch, user, blogs):
+  user_id, _ = user
+  monkeypatch.setattr(timelines, "size", 3)
+
+  inside = page(run, user_id, limit=2)
+  assert (inside.ids, inside.has_more) == (blogs[:2], True)
+  assert run(redis.zscore, author_key(user_id), SENTINEL) == TRUNCATED
+
+  # Only one blog of the next page is in the window, the rest may exist beyond it
+  assert page(run, user_id, limit=2, offset=2) is None
+
+def test_trimming_marks_a_whole_window_truncated(run, redis, monkeypatch, user, create_blog, blogs):
+  user_id, _ = user
+  monkeypatch.setattr(timelines, "size", 6)
+  page(run, user_id, limit=2)
+  assert run(redis.zscore, author_key(user_id), SENTINEL) == WHOLE
+
+  create_blog()
+  create_blog()
+  assert run(redis.zcard, author_key(user_id)) == 6 + 1
+  assert run(redis.zscore, author_key(user_id), SENTINEL) == TRUNCATED
+
+def test_cursors_round_trip_through_the_window(client, statements, user, blogs):
+  user_id, _ = user
+  url = f"/api/v1/users/{user_id}/blogs"
+  client.get(url)
+
+  statements.clear()
+  pages = walk(client, url, limit=2)
+  assert [ids(p) for p in pages] == [blogs[:2], blogs[2:4], blogs[4:]]
+
+  back = client.get(url, params={"limit": 2, "cursor": pages[-1]["prev_cursor"]}).json()
+  assert ids(back) == blogs[2:4]
+  back = client.get(url, params={"limit": 2, "cursor": back["prev_cursor"]}).json()
+  assert ids(back) == blogs[:2]
+  assert back["prev_cursor"] is None
+  assert sql_pages(statements) == 0
+
+def test_cursor_of_a_deleted_blog_is_served_by_sql(client, statements, user, blogs):
+  user_id, headers = user
+  url = f"/api/v1/users/{user_id}/blogs"
+  first = client.get(url, params={"limit": 2}).json()
+
+  # The cursor points at the last blog of the page, gone from the timeline now
+  assert client.delete(f"/api/v1/blogs/{blogs[1]}", headers=headers).status_code == 200
+
+  statements.clear()
+  second = client.get(url, params={"limit": 2, "cursor": first["next_cursor"]}).json()
+  assert ids(second) == blogs[2:4]
+  assert sql_pages(statements) == 1
+
+def test_blog_deleted_behind_the_timeline_is_dropped(client, run, redis, user, blogs):
+  user_id, _ = user
+  url = f"/api/v1/users/{user_id}/blogs"
+  client.get(url)
+
+  async def delete_row():
+    async with SessionLocal() as db_session:
+      await db_session.execute(delete(Blog).where(Blog.id == blogs[0]))
+      await db_session.commit()
+
+  run(delete_row)
+  run(redis.delete, f"blog:{blogs[0]}")
+
+  assert ids(client.get(url, params={"limit": 2}).json()) == blogs[1:3]
+  assert run(redis.zscore, author_key(user_id), blogs[0]) is None
+  assert ids(client.get(url, params={"limit": 2}).json()) == blogs[1:3]
@@ -0,0 +1,34 @@
+import uuid
+
+from app.services.trending import trending
+
+def score(run, redis, blog_id: str) -> float | None:
+  return run(redis.zscore, trending.key, blog_id)
+
+def test_unlike_after_decay_is_clamped_at_zero(run, redis):
+  blog_id = str(uuid.uuid4())
+  run(trending.bump, blog_id, "like")
+
+  # The like has mostly decayed by the time it is undone
+  run(redis.zadd, trending.key, {blog_id: trending.weights["like"] / 4})
+  run(trending.bump, blog_id, "like", -1)
+  assert score(run, redis, blog_id) == 0
+
+  run(trending.bump, blog_id, "view")
+  assert score(run, redis, blog_id) == trending.weights["view"]
+
+def test_unlike_subtracts_while_the_score_allows_it(run, redis):
+  blog_id = str(uuid.uuid4())
+  run(trending.bump, blog_id, "like", 2)
+  run(trending.bump, blog_id, "like", -1)
+  assert score(run, redis, blog_id) == trending.weights["like"]
+
+def test_unliking_a_blog_through_the_api_never_goes_negative(client, run, redis, user, create_blog):
+  _, headers = user
+  blog_id = create_blog()["id"]
+  url = f"/api/v1/blogs/{blog_id}/like"
+
+  assert client.put(url, headers=headers).status_code == 200
+  run(redis.zadd, trending.key, {blog_id: 0.5})
+  assert client.delete(url, headers=headers).status_code == 200
+  assert score(run, redis, blog_id) == 0